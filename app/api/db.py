@@ -5,8 +5,18 @@ from contextlib import contextmanager
 from typing import Generator
 
 from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
+from .search import (
+    SEARCH_INDEX_COLUMNS,
+    create_path_index,
+    create_project_search_index,
+    create_search_index,
+    create_suggest_index,
+    rebuild_path_index,
+    rebuild_project_search_index,
+    rebuild_suggest_index,
+)
 from .settings import settings
 
 
@@ -24,44 +34,38 @@ def init_db() -> None:
     # Create FTS table if not exists
     with engine.connect() as conn:
         cols = {row[1] for row in conn.exec_driver_sql("PRAGMA table_info('search_index')").fetchall()}
-        expected = {
-            "file_id",
-            "project_id",
-            "project_slug",
-            "project_name",
-            "title",
-            "body",
-            "path",
-            "tags",
-            "language",
-            "updated_at",
-            "is_archived",
-            "project_status",
-        }
-        if cols and cols != expected:
+        if cols and cols != set(SEARCH_INDEX_COLUMNS):
             conn.execute(text("DROP TABLE IF EXISTS search_index"))
             conn.commit()
-        conn.execute(
-            text(
-                """
-                CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
-                    file_id UNINDEXED,
-                    project_id UNINDEXED,
-                    project_slug UNINDEXED,
-                    project_name UNINDEXED,
-                    title,
-                    body,
-                    path,
-                    tags,
-                    language,
-                    updated_at UNINDEXED,
-                    is_archived UNINDEXED,
-                    project_status UNINDEXED
-                );
-                """
-            )
-        )
+        create_search_index(conn)
         conn.commit()
+        # Derived file indexes are backfilled from search_index the first time they appear
+        for table, create, rebuild in (
+            ("file_suggest_index", create_suggest_index, rebuild_suggest_index),
+            ("file_path_index", create_path_index, rebuild_path_index),
+        ):
+            exists = conn.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name", {"name": table}
+            ).first()
+            create(conn)
+            if not exists:
+                rebuild(conn)
+        conn.commit()
+
+    with engine.connect() as conn:
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'project_search_index'"
+        ).first()
+        if not exists:
+            create_project_search_index(conn)
+            conn.commit()
+    if not exists:
+        # First start with the table: backfill from existing projects
+        try:
+            rebuild_project_search_index(engine)
+        except Exception:
+            # projects table may not exist yet on a fresh DB
+            pass
 
     # Lightweight migration for bundles table new columns (SQLite only)
     try:
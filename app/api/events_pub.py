@@ -7,9 +7,9 @@ from sqlalchemy.orm import Session
 
 from .db import SessionLocal
 from .models import Event
+from .services.activity import record_event_activity
 from .settings import settings
 
-
 CHANNEL_PREFIX = "events:"
 
 
@@ -17,12 +17,30 @@ def _redis_client() -> redis.Redis:
     return redis.from_url(settings.redis_url)
 
 
+def record_event(db: Session, project_id: str, event_type: str, payload: dict) -> Event:
+    """Persist an event and its activity row in ``db``'s transaction; the caller commits."""
+    ev = Event(project_id=project_id, type=event_type, payload=payload)
+    db.add(ev)
+    db.flush()
+    record_event_activity(db, ev)
+    return ev
+
+
+def fanout_event(project_id: str, event_type: str, payload: dict) -> None:
+    # Publish over Redis (best-effort)
+    msg = json.dumps({"type": event_type, "project_id": project_id, "payload": payload})
+    try:
+        r = _redis_client()
+        r.publish(CHANNEL_PREFIX + project_id, msg)
+    except Exception:
+        pass
+
+
 def publish_event(project_id: str, event_type: str, payload: dict) -> None:
     # Persist to DB (best-effort)
     try:
         db: Session = SessionLocal()
-        ev = Event(project_id=project_id, type=event_type, payload=payload)
-        db.add(ev)
+        record_event(db, project_id, event_type, payload)
         db.commit()
     except Exception:
         pass
@@ -32,11 +50,4 @@ def publish_event(project_id: str, event_type: str, payload: dict) -> None:
         except Exception:
             pass
 
-    # Publish over Redis
-    msg = json.dumps({"type": event_type, "project_id": project_id, "payload": payload})
-    try:
-        r = _redis_client()
-        r.publish(CHANNEL_PREFIX + project_id, msg)
-    except Exception:
-        pass
-
+    fanout_event(project_id, event_type, payload)
@@ -1,9 +1,24 @@
 from __future__ import annotations
 
+import datetime as dt
+import hashlib
+import json
 import os
-from typing import Sequence
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from threading import Lock, RLock
+from typing import Iterator, Sequence
 
-from git import Repo, GitCommandError
+import redis
+from git import GitCommandError, Repo
+from gitdb.exc import BadName
+
+from .app_logging import get_logger
+from .settings import settings
+
+logger = get_logger(component="git_ops")
 
 
 class GitError(Exception):
@@ -13,6 +28,77 @@ class GitError(Exception):
         self.message = message
 
 
+# Repo handles are reused across calls: GitPython keeps a long-lived `git cat-file --batch` and
+# `--batch-check` process per handle for object reads (commits, trees, blobs), so a cached handle
+# turns history/status lookups into pipe reads instead of process spawns. Each handle is used by
+# one thread at a time and closed (killing its cat-file processes) once idle.
+@dataclass
+class _RepoHandle:
+    repo: Repo
+    lock: RLock = field(default_factory=RLock)
+    last_used: float = 0.0
+    users: int = 0
+
+
+_HANDLES: "OrderedDict[str, _RepoHandle]" = OrderedDict()
+_HANDLES_LOCK = Lock()
+
+
+def _close_handle(handle: _RepoHandle) -> None:
+    try:
+        handle.repo.close()
+    except Exception:
+        pass
+
+
+def _evict_handles(now: float) -> list[_RepoHandle]:
+    idle = settings.git_repo_handle_idle_seconds
+    evicted: list[_RepoHandle] = []
+    for key, handle in list(_HANDLES.items()):
+        over_limit = len(_HANDLES) > settings.git_repo_handle_max
+        if handle.users == 0 and (over_limit or now - handle.last_used > idle):
+            evicted.append(_HANDLES.pop(key))
+    return evicted
+
+
+@contextmanager
+def open_repo(path: str) -> Iterator[Repo]:
+    """Cached ``Repo`` for ``path``, held exclusively for the duration of the block."""
+    key = os.path.abspath(path)
+    now = time.monotonic()
+    with _HANDLES_LOCK:
+        handle = _HANDLES.get(key)
+        if handle is not None and not os.path.isdir(handle.repo.git_dir):
+            # Repo was removed or re-created on disk; don't serve the stale handle
+            _HANDLES.pop(key)
+            if handle.users == 0:
+                _close_handle(handle)
+            handle = None
+        if handle is None:
+            handle = _RepoHandle(repo=Repo(key))
+            _HANDLES[key] = handle
+        _HANDLES.move_to_end(key)
+        handle.users += 1
+        evicted = _evict_handles(now)
+    for stale in evicted:
+        _close_handle(stale)
+    try:
+        with handle.lock:
+            yield handle.repo
+    finally:
+        with _HANDLES_LOCK:
+            handle.users -= 1
+            handle.last_used = time.monotonic()
+
+
+def close_repo_handles() -> None:
+    with _HANDLES_LOCK:
+        handles = list(_HANDLES.values())
+        _HANDLES.clear()
+    for handle in handles:
+        _close_handle(handle)
+
+
 def ensure_repo(path: str, repo_url: str | None = None) -> Repo:
     os.makedirs(path, exist_ok=True)
     if (os.path.isdir(os.path.join(path, ".git"))):
@@ -45,115 +131,313 @@ def ensure_repo(path: str, repo_url: str | None = None) -> Repo:
 
 
 def commit_and_push(path: str, rel_paths: Sequence[str], message: str | None = None, push: bool = True) -> dict:
-    repo = Repo(path)
-    # Add files
-    repo.index.add(list(rel_paths) or ["."])
-    if message is None:
-        message = "chore: update artifacts"
-    new_commit = repo.index.commit(message)
-    pushed = False
-    if push and repo.remotes:
+    with open_repo(path) as repo:
+        # Add files
+        repo.index.add(list(rel_paths) or ["."])
+        if message is None:
+            message = "chore: update artifacts"
+        new_commit = repo.index.commit(message)
+        pushed = False
+        if push and repo.remotes:
+            try:
+                repo.remotes.origin.push()
+                pushed = True
+            except GitCommandError as e:
+                raise GitError("NETWORK_ERROR", str(e))
+        return {"committed": True, "pushed": pushed, "commit_sha": new_commit.hexsha}
+
+
+def fetch_remote(path: str) -> bool:
+    """Fetch origin (network I/O); False when the repo has no remote to fetch from."""
+    with open_repo(path) as repo:
+        if not repo.remotes:
+            return False
         try:
-            repo.remotes.origin.push()
-            pushed = True
+            repo.remotes.origin.fetch(prune=True)
         except GitCommandError as e:
             raise GitError("NETWORK_ERROR", str(e))
-    return {"committed": True, "pushed": pushed, "commit_sha": new_commit.hexsha}
+        return True
 
 
-def repo_status(path: str, branch: str | None = None) -> dict:
-    repo = Repo(path)
-    if branch is None:
+def ahead_behind(path: str, branch: str | None = None) -> dict:
+    """Ahead/behind of ``branch`` against origin's last fetched state; no network access."""
+    with open_repo(path) as repo:
+        if branch is None:
+            try:
+                branch = repo.active_branch.name
+            except TypeError:
+                branch = None
+        ahead = 0
+        behind = 0
         try:
-            branch = repo.active_branch.name
-        except TypeError:
-            branch = None
-    ahead = 0
-    behind = 0
-    try:
-        if repo.remotes:
-            repo.remotes.origin.fetch(prune=True)
-            if branch:
-                local = repo.commit(branch)
-                remote_ref = f"origin/{branch}"
-                remote = repo.commit(remote_ref)
+            if repo.remotes and branch:
+                try:
+                    local = repo.commit(branch)
+                    remote = repo.commit(f"origin/{branch}")
+                except (BadName, ValueError):
+                    # Branch not created yet or never pushed: nothing to compare against
+                    return {"branch": branch, "ahead": 0, "behind": 0}
                 # Use rev-list left-right count to compute ahead/behind
                 counts = repo.git.rev_list("--left-right", "--count", f"{remote.hexsha}...{local.hexsha}").split()
                 if len(counts) == 2:
                     behind = int(counts[0])
                     ahead = int(counts[1])
-    except GitCommandError as e:
-        raise GitError("NETWORK_ERROR", str(e))
-    return {"branch": branch, "ahead": ahead, "behind": behind}
+        except GitCommandError as e:
+            raise GitError("NETWORK_ERROR", str(e))
+        return {"branch": branch, "ahead": ahead, "behind": behind}
+
+
+def repo_status(path: str, branch: str | None = None) -> dict:
+    fetch_remote(path)
+    return ahead_behind(path, branch)
+
+
+def current_branch(path: str) -> str | None:
+    """Checked-out branch name read from .git/HEAD; None when detached or missing."""
+    try:
+        with open(os.path.join(path, ".git", "HEAD")) as fh:
+            head = fh.read().strip()
+    except OSError:
+        return None
+    prefix = "ref: refs/heads/"
+    return head[len(prefix) :] if head.startswith(prefix) else None
+
+
+def head_sha(path: str) -> str | None:
+    """Resolve HEAD by reading .git directly (no GitPython, no subprocess).
+
+    None if HEAD is unborn or the repo is missing.
+    """
+    git_dir = os.path.join(path, ".git")
+    try:
+        with open(os.path.join(git_dir, "HEAD")) as fh:
+            head = fh.read().strip()
+    except OSError:
+        return None
+    if not head.startswith("ref:"):
+        return head or None
+    ref = head[4:].strip()
+    try:
+        with open(os.path.join(git_dir, *ref.split("/"))) as fh:
+            return fh.read().strip() or None
+    except OSError:
+        pass
+    try:
+        with open(os.path.join(git_dir, "packed-refs")) as fh:
+            for line in fh:
+                parts = line.strip().split(" ", 1)
+                if len(parts) == 2 and parts[1] == ref:
+                    return parts[0]
+    except OSError:
+        pass
+    return None
+
+
+def _commit_dict(c) -> dict:
+    return {
+        "sha": c.hexsha,
+        "author": c.author.name if c.author else None,
+        "message": c.message.strip(),
+        "date": c.committed_datetime,
+    }
+
+
+def _walk_history(repo: Repo, rev: str, limit: int | None = None, skip: int = 0) -> list[dict]:
+    kwargs: dict = {"skip": skip} if skip else {}
+    if limit is not None:
+        kwargs["max_count"] = limit
+    return [_commit_dict(c) for c in repo.iter_commits(rev, **kwargs)]
+
+
+# Commit history cache: one entry per repo path holding the newest commits (git log order) as of
+# ``head``. ``complete`` means the walk reached the root, so shorter-than-requested lists are final.
+_HISTORY_PREFIX = "git:history:"
+_HISTORY_LOCAL: "OrderedDict[str, dict]" = OrderedDict()
+_HISTORY_LOCK = Lock()
+_HISTORY_LOCAL_MAX = 256
+_REDIS_RETRY_SECONDS = 30.0
+_redis_down_until = 0.0
+
+
+def _history_key(path: str) -> str:
+    return _HISTORY_PREFIX + hashlib.sha1(os.path.abspath(path).encode()).hexdigest()
+
+
+def _redis_client() -> redis.Redis | None:
+    if time.monotonic() < _redis_down_until:
+        return None
+    return redis.from_url(settings.redis_url, socket_connect_timeout=0.25, socket_timeout=0.25)
+
+
+def _mark_redis_down(exc: Exception) -> None:
+    global _redis_down_until
+    _redis_down_until = time.monotonic() + _REDIS_RETRY_SECONDS
+    logger.warning("git_history.redis_unavailable", error=str(exc))
+
+
+def _load_history(key: str) -> dict | None:
+    with _HISTORY_LOCK:
+        entry = _HISTORY_LOCAL.get(key)
+        if entry is not None:
+            _HISTORY_LOCAL.move_to_end(key)
+            return entry
+    client = _redis_client()
+    if client is None:
+        return None
+    try:
+        raw = client.get(key)
+    except redis.RedisError as exc:
+        _mark_redis_down(exc)
+        return None
+    if not raw:
+        return None
+    try:
+        entry = json.loads(raw)
+        for item in entry["commits"]:
+            item["date"] = dt.datetime.fromisoformat(item["date"])
+    except (ValueError, TypeError, KeyError):
+        return None
+    _remember_local(key, entry)
+    return entry
+
+
+def _remember_local(key: str, entry: dict) -> None:
+    with _HISTORY_LOCK:
+        _HISTORY_LOCAL[key] = entry
+        _HISTORY_LOCAL.move_to_end(key)
+        while len(_HISTORY_LOCAL) > _HISTORY_LOCAL_MAX:
+            _HISTORY_LOCAL.popitem(last=False)
+
+
+def _store_history(key: str, entry: dict) -> None:
+    _remember_local(key, entry)
+    client = _redis_client()
+    if client is None:
+        return
+    payload = {
+        **entry,
+        "commits": [{**item, "date": item["date"].isoformat()} for item in entry["commits"]],
+    }
+    try:
+        client.set(
+            key, json.dumps(payload, separators=(",", ":")), ex=settings.git_history_cache_ttl
+        )
+    except redis.RedisError as exc:
+        _mark_redis_down(exc)
+
+
+def _is_ancestor(repo: Repo, old: str, new: str) -> bool:
+    try:
+        return repo.is_ancestor(old, new)
+    except (GitCommandError, ValueError):
+        return False
 
 
 def repo_history(path: str, limit: int = 20) -> list[dict]:
-    repo = Repo(path)
-    commits = list(repo.iter_commits(max_count=limit))
-    out: list[dict] = []
-    for c in commits:
-        out.append({
-            "sha": c.hexsha,
-            "author": c.author.name if c.author else None,
-            "message": c.message.strip(),
-            "date": c.committed_datetime,
-        })
-    return out
+    """The newest ``limit`` commits reachable from HEAD, served from a cache keyed by the HEAD sha.
+
+    HEAD is resolved by reading .git, so an unchanged repo costs no git calls. When HEAD moved
+    forward only the new commits are walked and prepended; deeper requests extend the cached
+    list with ``--skip``. A rewritten history (HEAD no longer descends from the cached head)
+    is walked again from scratch.
+    """
+    head = head_sha(path)
+    if head is None:
+        with open_repo(path) as repo:
+            return _walk_history(repo, "HEAD", limit)
+    key = _history_key(path)
+    entry = _load_history(key)
+    if (
+        entry is not None
+        and entry["head"] == head
+        and (entry["complete"] or len(entry["commits"]) >= limit)
+    ):
+        return [dict(item) for item in entry["commits"][:limit]]
+
+    cap = max(settings.git_history_cache_max_commits, limit)
+    with open_repo(path) as repo:
+        if entry is not None and entry["head"] != head and _is_ancestor(repo, entry["head"], head):
+            fresh = _walk_history(repo, f"{entry['head']}..{head}", cap)
+            if len(fresh) >= cap:
+                commits, complete = fresh, False
+            else:
+                commits, complete = fresh + entry["commits"], entry["complete"]
+        elif entry is not None and entry["head"] == head:
+            commits, complete = list(entry["commits"]), False
+        else:
+            commits, complete = [], False
+        if not complete and len(commits) < limit:
+            want = limit - len(commits)
+            more = _walk_history(repo, head, want, skip=len(commits))
+            seen = {item["sha"] for item in commits}
+            commits.extend(item for item in more if item["sha"] not in seen)
+            complete = len(more) < want
+    if len(commits) > cap:
+        commits, complete = commits[:cap], False
+    _store_history(key, {"head": head, "complete": complete, "commits": commits})
+    logger.debug("git_history.walked", path=path, head=head, cached=len(commits))
+    return [dict(item) for item in commits[:limit]]
+
+
+def history_page(path: str, rev: str, limit: int, skip: int = 0) -> list[dict]:
+    """``limit`` commits from ``rev`` after skipping ``skip``; uncached, for deep walks."""
+    with open_repo(path) as repo:
+        return _walk_history(repo, rev, limit, skip=skip)
 
 
 def list_branches(path: str) -> list[dict]:
-    repo = Repo(path)
-    current = None
-    try:
-        current = repo.active_branch.name
-    except Exception:
+    with open_repo(path) as repo:
         current = None
-    out: list[dict] = []
-    for b in repo.branches:
-        out.append({"name": b.name, "is_current": (b.name == current)})
-    return out
+        try:
+            current = repo.active_branch.name
+        except Exception:
+            current = None
+        out: list[dict] = []
+        for b in repo.branches:
+            out.append({"name": b.name, "is_current": (b.name == current)})
+        return out
 
 
 def create_branch(path: str, name: str, checkout: bool = True) -> None:
-    repo = Repo(path)
-    try:
-        new_b = repo.create_head(name)
-        if checkout:
-            new_b.checkout()
-    except GitCommandError as e:
-        raise GitError("GIT_BRANCH_FAIL", str(e))
+    with open_repo(path) as repo:
+        try:
+            new_b = repo.create_head(name)
+            if checkout:
+                new_b.checkout()
+        except GitCommandError as e:
+            raise GitError("GIT_BRANCH_FAIL", str(e))
 
 
 def checkout_branch(path: str, name: str) -> None:
-    repo = Repo(path)
-    try:
-        repo.git.checkout(name)
-    except GitCommandError as e:
-        raise GitError("GIT_CHECKOUT_FAIL", str(e))
+    with open_repo(path) as repo:
+        try:
+            repo.git.checkout(name)
+        except GitCommandError as e:
+            raise GitError("GIT_CHECKOUT_FAIL", str(e))
 
 
 def pull(path: str) -> dict:
-    repo = Repo(path)
-    try:
-        if not repo.remotes:
-            raise GitError("GIT_PULL_FAIL", "No remote configured")
-        info = repo.remotes.origin.pull()
-        return {"updated": True, "info": [str(i) for i in info]}
-    except GitCommandError as e:
-        raise GitError("GIT_PULL_FAIL", str(e))
+    with open_repo(path) as repo:
+        try:
+            if not repo.remotes:
+                raise GitError("GIT_PULL_FAIL", "No remote configured")
+            info = repo.remotes.origin.pull()
+            return {"updated": True, "info": [str(i) for i in info]}
+        except GitCommandError as e:
+            raise GitError("GIT_PULL_FAIL", str(e))
 
 
 def push(path: str) -> dict:
-    repo = Repo(path)
-    try:
-        if not repo.remotes:
-            raise GitError("GIT_PUSH_FAIL", "No remote configured")
-        info = repo.remotes.origin.push()
-        return {"pushed": True, "info": [str(i) for i in info]}
-    except GitCommandError as e:
-        raise GitError("GIT_PUSH_FAIL", str(e))
+    with open_repo(path) as repo:
+        try:
+            if not repo.remotes:
+                raise GitError("GIT_PUSH_FAIL", "No remote configured")
+            info = repo.remotes.origin.push()
+            return {"pushed": True, "info": [str(i) for i in info]}
+        except GitCommandError as e:
+            raise GitError("GIT_PUSH_FAIL", str(e))
 
 
 def is_dirty(path: str) -> bool:
-    repo = Repo(path)
-    return repo.is_dirty(untracked_files=True)
+    with open_repo(path) as repo:
+        return repo.is_dirty(untracked_files=True)
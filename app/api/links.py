@@ -1,47 +1,214 @@
 from __future__ import annotations
 
 import re
-from typing import Iterable
+from collections import defaultdict
+from typing import Iterable, Sequence
 
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session, undefer
 
-from .db import engine
 from .models import File, Link
-from .search import index_file
-from markdown_it import MarkdownIt
-
+from .search import build_search_blob, index_files
+from .services import link_graph
+from .services.frontmatter import strip_front_matter
+from .services.project_stats import FileStatsEntry, apply_file_change, file_stats_entry
+from .services.render import render_markdown
 
 WIKILINK_RE = re.compile(r"\[\[([^\]]+)\]\]")
-_md = MarkdownIt("commonmark").enable("table").enable("strikethrough")
 
 
 def extract_wikilinks(md_text: str) -> list[str]:
     return [m.group(1).strip() for m in WIKILINK_RE.finditer(md_text)]
 
 
-def upsert_links(db: Session, project_id: str, src_file: File, md_text: str) -> None:
-    # Remove existing links from this source
-    db.query(Link).filter(Link.src_file_id == src_file.id).delete(synchronize_session=False)
-    titles = extract_wikilinks(md_text)
-    if not titles:
+def resolve_titles(db: Session, project_id: str, titles: Iterable[str]) -> dict[str, str]:
+    """Map the given wikilink titles to file ids with one indexed ``title IN (...)`` lookup.
+
+    When several files share a title the one with the smallest path wins, so resolution is stable.
+    """
+    wanted = {title for title in titles if title}
+    if not wanted:
+        return {}
+    title_to_id: dict[str, str] = {}
+    for file_id, title in db.execute(
+        select(File.id, File.title)
+        .where(File.project_id == project_id, File.title.in_(wanted))
+        .order_by(File.title, File.path)
+    ):
+        title_to_id.setdefault(title, file_id)
+    return title_to_id
+
+
+def upsert_links(
+    db: Session, project_id: str, src_file: File, md_text: str, commit: bool = True
+) -> None:
+    upsert_links_bulk(db, project_id, [(src_file, md_text)])
+    if commit:
         db.commit()
+
+
+def upsert_links_bulk(db: Session, project_id: str, sources: Sequence[tuple[File, str]]) -> None:
+    """Bring the outgoing links of ``sources`` (one project) in line with their wikilinks.
+
+    The caller commits.
+
+    Existing rows are diffed against the wanted ones per title: unchanged links are kept,
+    moved/retargeted ones updated in place, and only the difference is inserted or deleted.
+    Costs one link query and one title lookup however many sources there are.
+    """
+    if not sources:
         return
-    # Resolve titles to file ids
-    files = db.scalars(select(File).where(File.project_id == project_id)).all()
-    title_to_file = {f.title: f for f in files}
-    for title in titles:
-        target = title_to_file.get(title)
-        db.add(
-            Link(
-                project_id=project_id,
-                src_file_id=src_file.id,
-                src_path=src_file.path,
-                target_title=title,
-                target_file_id=target.id if target else None,
-            )
+    wanted = [(src, extract_wikilinks(md_text)) for src, md_text in sources]
+    title_to_id = resolve_titles(db, project_id, (title for _, found in wanted for title in found))
+    existing: dict[str, dict[str, list[Link]]] = defaultdict(lambda: defaultdict(list))
+    for link in db.scalars(select(Link).where(Link.src_file_id.in_([src.id for src, _ in wanted]))):
+        existing[link.src_file_id][link.target_title].append(link)
+
+    stale: list[str] = []
+    resolved: dict[str, list[str]] = {}
+    for src, found in wanted:
+        current = existing.pop(src.id, {})
+        resolved[src.id] = [title_to_id[title] for title in found if title in title_to_id]
+        for title in found:
+            target_id = title_to_id.get(title)
+            bucket = current.get(title)
+            if not bucket:
+                db.add(
+                    Link(
+                        project_id=project_id,
+                        src_file_id=src.id,
+                        src_path=src.path,
+                        target_title=title,
+                        target_file_id=target_id,
+                    )
+                )
+                continue
+            link = bucket.pop()
+            if (link.project_id, link.src_path, link.target_file_id) != (
+                project_id,
+                src.path,
+                target_id,
+            ):
+                link.project_id = project_id
+                link.src_path = src.path
+                link.target_file_id = target_id
+        stale.extend(link.id for bucket in current.values() for link in bucket)
+    if stale:
+        db.query(Link).filter(Link.id.in_(stale)).delete(synchronize_session=False)
+    link_graph.stage_sources(db, project_id, resolved)
+
+
+def claim_links(db: Session, project_id: str, file_id: str, title: str) -> int:
+    """Point dangling links to ``title`` in the project at ``file_id``.
+
+    One UPDATE on the title index; the caller commits.
+    """
+    result = db.execute(
+        update(Link)
+        .where(
+            Link.project_id == project_id, Link.target_title == title, Link.target_file_id.is_(None)
+        )
+        .values(target_file_id=file_id)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        link_graph.stage_invalidate(db, project_id)
+    return result.rowcount or 0
+
+
+def release_links(db: Session, file_id: str, keep_title: str | None = None) -> int:
+    """Re-resolve links that point at ``file_id`` under a title other than ``keep_title``.
+
+    Each goes to another file with its title (smallest path first) or becomes dangling. Pass no
+    ``keep_title`` when the file is being deleted. One UPDATE on the target index; caller commits.
+    """
+    other = (
+        select(File.id)
+        .where(
+            File.project_id == Link.project_id, File.title == Link.target_title, File.id != file_id
         )
-    db.commit()
+        .order_by(File.path)
+        .limit(1)
+        .scalar_subquery()
+    )
+    stmt = update(Link).where(Link.target_file_id == file_id)
+    if keep_title is not None:
+        stmt = stmt.where(Link.target_title != keep_title)
+    result = db.execute(
+        stmt.values(target_file_id=other).execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        link_graph.stage_invalidate_file(db, file_id)
+    return result.rowcount or 0
+
+
+def relink_file(
+    db: Session, project_id: str, file_id: str, title: str, old_title: str | None = None
+) -> None:
+    """Keep incoming links in step with a created (``old_title`` None) or renamed file.
+
+    Sources are not touched.
+    """
+    if old_title is None:
+        link_graph.stage_add_file(db, project_id, file_id)
+    elif old_title != title:
+        release_links(db, file_id, keep_title=title)
+    claim_links(db, project_id, file_id, title)
+
+
+def drop_file_links(db: Session, file_id: str) -> None:
+    """Before deleting a file: remove its outgoing links and re-resolve the ones pointing at it."""
+    db.query(Link).filter(Link.src_file_id == file_id).delete(synchronize_session=False)
+    release_links(db, file_id)
+    link_graph.stage_invalidate_file(db, file_id)
+
+
+def relink_dangling(db: Session, project_id: str | None = None) -> int:
+    """Repair links in bulk: resolve dangling ones whose title now exists and re-resolve links whose
+    target is gone or renamed. One UPDATE for the whole table (or one project); caller commits.
+    """
+    match = (
+        select(File.id)
+        .where(File.project_id == Link.project_id, File.title == Link.target_title)
+        .order_by(File.path)
+        .limit(1)
+        .scalar_subquery()
+    )
+    target_ok = (
+        select(File.id)
+        .where(File.id == Link.target_file_id, File.title == Link.target_title)
+        .exists()
+    )
+    stmt = update(Link).where(
+        or_(
+            and_(Link.target_file_id.is_(None), match.is_not(None)),
+            and_(Link.target_file_id.is_not(None), ~target_ok),
+        )
+    )
+    if project_id is not None:
+        stmt = stmt.where(Link.project_id == project_id)
+    result = db.execute(
+        stmt.values(target_file_id=match).execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        link_graph.stage_invalidate(db, project_id)
+    return result.rowcount or 0
+
+
+def sync_link_sources(db: Session, src_file_ids) -> None:
+    """Copy project and path from ``files`` onto the outgoing links of moved files (caller commits).
+
+    ``src_file_ids`` is a list of ids or a SELECT of them; one UPDATE either way.
+    """
+    db.execute(
+        update(Link)
+        .where(Link.src_file_id.in_(src_file_ids))
+        .values(
+            project_id=select(File.project_id).where(File.id == Link.src_file_id).scalar_subquery(),
+            src_path=select(File.path).where(File.id == Link.src_file_id).scalar_subquery(),
+        )
+        .execution_options(synchronize_session=False)
+    )
 
 
 def list_outgoing_links(db: Session, file_id: str) -> list[dict[str, str | None | bool]]:
@@ -58,20 +225,87 @@ def list_outgoing_links(db: Session, file_id: str) -> list[dict[str, str | None
     return out
 
 
-def rewrite_wikilinks(db: Session, project_id: str, old_title: str, new_title: str) -> int:
-    # Replace occurrences in content_md and keep rendered_html/search/links in sync
-    like = f"%[[{old_title}]]%"
-    changed = 0
-    files = db.scalars(select(File).where(File.project_id == project_id, File.content_md.like(like))).all()
-    for f in files:
-        f.content_md = f.content_md.replace(f"[[{old_title}]]", f"[[{new_title}]]")
-        f.rendered_html = _md.render(f.content_md)
-        db.add(f)
-        changed += 1
-        # reindex
-        with engine.begin() as conn:
-            index_file(conn, f.id, f"{f.title}\n{f.content_md}")
-        # refresh links for this source
-        upsert_links(db, f.project_id, f, f.content_md)
-    db.commit()
-    return changed
+def referencing_files(db: Session, project_id: str, titles: Iterable[str]) -> list[File]:
+    """Files with a stored link to any of ``titles``, bodies loaded.
+
+    Read off ix_links_project_target_title.
+    """
+    wanted = {title for title in titles if title}
+    if not wanted:
+        return []
+    src_ids = select(Link.src_file_id).where(
+        Link.project_id == project_id, Link.target_title.in_(wanted)
+    )
+    return list(
+        db.scalars(
+            select(File)
+            .options(undefer(File.content_md))
+            .where(File.id.in_(src_ids))
+            .order_by(File.path)
+        ).all()
+    )
+
+
+def replace_wikilinks(md_text: str, renames: dict[str, str]) -> str:
+    """Apply every ``[[old]] -> [[new]]`` of ``renames`` in a single pass over the text.
+
+    Each wikilink is looked up once, so the cost does not grow with the number of renames and
+    swaps (A -> B, B -> A) cannot chain into each other.
+    """
+
+    def _swap(match: re.Match[str]) -> str:
+        new_title = renames.get(match.group(1).strip())
+        return match.group(0) if new_title is None else f"[[{new_title}]]"
+
+    return WIKILINK_RE.sub(_swap, md_text)
+
+
+def rewrite_wikilinks_many(
+    db: Session,
+    project_id: str,
+    renames: dict[str, str],
+    commit: bool = True,
+    sources: Sequence[File] | None = None,
+) -> int:
+    """Rewrite wikilinks for several renamed titles at once; returns the number of files changed.
+
+    Referencing files come from the links table (or ``sources``, as returned by
+    referencing_files); renders, stats, the search index and link rows are updated for all of
+    them together inside the session's transaction.
+    """
+    renames = {old: new for old, new in renames.items() if old and new and old != new}
+    changed: list[tuple[File, FileStatsEntry]] = []
+    if renames:
+        for f in sources if sources is not None else referencing_files(db, project_id, renames):
+            content = replace_wikilinks(f.content_md or "", renames)
+            if content == f.content_md:
+                continue
+            before = file_stats_entry(f)
+            f.content_md = content
+            f.rendered_html = render_markdown(content)
+            db.add(f)
+            changed.append((f, before))
+    if changed:
+        db.flush()
+        for f, before in changed:
+            apply_file_change(
+                db, project_id, added=file_stats_entry(f), removed=before, content=f.content_md
+            )
+        bodies = [(f, strip_front_matter(f.content_md)) for f, _ in changed]
+        index_files(
+            db.connection(),
+            [
+                (f.id, build_search_blob(f.title, body, f.front_matter), f.title, f.path)
+                for f, body in bodies
+            ],
+        )
+        upsert_links_bulk(db, project_id, bodies)
+    if commit:
+        db.commit()
+    return len(changed)
+
+
+def rewrite_wikilinks(
+    db: Session, project_id: str, old_title: str, new_title: str, commit: bool = True
+) -> int:
+    return rewrite_wikilinks_many(db, project_id, {old_title: new_title}, commit=commit)
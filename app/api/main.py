@@ -2,31 +2,31 @@ from __future__ import annotations
 
 import os
 
-from fastapi import FastAPI, Header, HTTPException, Depends
+from fastapi import Depends, FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import text
+from sqlalchemy import select, text
 
-from .db import engine, init_db
 from .app_logging import setup_logging
+from .db import engine, init_db
+from .migrations import run_upgrade_head
 from .models import *  # noqa
-from .routers import projects, files, search, artifacts, bundles
-from .routers import dirs as dirs_router
-from .routers import repos as repos_router
-from .routers import profile as profile_router
+from .routers import artifacts, bundles, files, projects, search
+from .routers import attachments as attachments_router
 from .routers import config as config_router
-from .routers import tags as tags_router
-from .routers import filters as filters_router
-from .routers import file_types as file_types_router
+from .routers import dirs as dirs_router
 from .routers import events as events_router
+from .routers import file_types as file_types_router
+from .routers import filters as filters_router
+from .routers import groups as groups_router
+from .routers import import_export as import_export_router
 from .routers import jobs as jobs_router
-from .routers import attachments as attachments_router
+from .routers import link_graph as link_graph_router
+from .routers import profile as profile_router
 from .routers import render as render_router
-from .routers import import_export as import_export_router
-from .routers import groups as groups_router
+from .routers import repos as repos_router
 from .routers import sharing as sharing_router
+from .routers import tags as tags_router
 from .settings import settings
-from .migrations import run_upgrade_head
-
 
 setup_logging()
 
@@ -71,9 +71,10 @@ def on_startup() -> None:
     # Phase 3: backfill directories from existing file paths when enabled
     try:
         if int(settings.dirs_persist or 0) == 1:
-            from .models import Project as _Project
-            from .models import File as _File
             from .models import Directory as _Directory
+            from .models import File as _File
+            from .models import Project as _Project
+            from .services.tree_index import rebuild_tree_index
 
             with _SessionLocal() as _db:
                 projects = _db.query(_Project).all()
@@ -93,10 +94,41 @@ def on_startup() -> None:
                         for dp in sorted(paths):
                             if dp not in existing:
                                 _db.add(_Directory(project_id=p.id, path=dp, name=dp.split("/")[-1]))
+                        _db.flush()
+                        rebuild_tree_index(_db, p.id)
                         _db.commit()
     except Exception:
         # Do not block startup on backfill issues
         pass
+    # Rows from before the listing-field columns (or an older derivation) are filled in
+    # by the worker
+    try:
+        from .models import File as _File
+
+        with _SessionLocal() as _db:
+            stale = _db.scalar(select(_File.id).where(_File.listing_fields_stale()).limit(1))
+        if stale is not None:
+            import redis as _redis
+            import rq as _rq
+
+            q = _rq.Queue("default", connection=_redis.from_url(settings.redis_url))
+            q.enqueue(
+                "worker.jobs.file_jobs.backfill_listing_fields",
+                job_id="files.backfill_listing_fields",
+                job_timeout=1800,
+            )
+    except Exception:
+        pass
+
+
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+    # Let queued post-commit writes reach disk, then stop the git cat-file processes
+    from .git_ops import close_repo_handles
+    from .services.unit_of_work import flush_post_commit
+
+    flush_post_commit()
+    close_repo_handles()
 
 
 @app.get("/api/healthz")
@@ -128,3 +160,4 @@ app.include_router(import_export_router.router, prefix="/api", dependencies=auth
 app.include_router(sharing_router.router, prefix="/api", dependencies=auth)
 app.include_router(sharing_router.public_router, prefix="/api")
 app.include_router(groups_router.router, prefix="/api", dependencies=auth)
+app.include_router(link_graph_router.router, prefix="/api", dependencies=auth)
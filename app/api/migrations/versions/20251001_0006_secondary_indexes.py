@@ -0,0 +1,45 @@
+"""Secondary indexes for hot router queries"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251001_0006"
+down_revision = "20250927_0005"
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns). directories(project_id, path) and
+# project_group_memberships(project_id) are already covered by their unique constraints.
+INDEXES = (
+    # project tree / listings, path lookups and existence checks
+    ("ix_files_project_path", "files", ["project_id", "path"]),
+    # project activity feed (latest files per project)
+    ("ix_files_project_updated", "files", ["project_id", "updated_at"]),
+    # recent files across projects, search rebuild catch-up
+    ("ix_files_updated_at", "files", ["updated_at"]),
+    # project activity feed (latest events per project)
+    ("ix_events_project_created", "events", ["project_id", "created_at"]),
+    # upsert_links / outgoing links
+    ("ix_links_src_file", "links", ["src_file_id"]),
+    # backlinks by resolved target
+    ("ix_links_target_file", "links", ["target_file_id"]),
+    # backlinks / relinking by unresolved title
+    ("ix_links_project_target_title", "links", ["project_id", "target_title"]),
+    # group listing and reordering
+    ("ix_group_memberships_group_order", "project_group_memberships", ["group_id", "sort_order"]),
+    # tag usage counts
+    ("ix_project_tags_tag", "project_tags", ["tag_id"]),
+)
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
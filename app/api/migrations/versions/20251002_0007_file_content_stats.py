@@ -0,0 +1,39 @@
+"""Add size_bytes and content_sha256 to files"""
+
+from __future__ import annotations
+
+import hashlib
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251002_0007"
+down_revision = "20251001_0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "files",
+        sa.Column("size_bytes", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+    op.add_column(
+        "files",
+        sa.Column("content_sha256", sa.String(length=64), nullable=True),
+    )
+
+    conn = op.get_bind()
+    rows = conn.execute(sa.text("SELECT id, content_md FROM files")).all()
+    for file_id, content in rows:
+        encoded = (content or "").encode("utf-8")
+        conn.execute(
+            sa.text("UPDATE files SET size_bytes = :size, content_sha256 = :sha WHERE id = :id"),
+            {"size": len(encoded), "sha": hashlib.sha256(encoded).hexdigest(), "id": file_id},
+        )
+
+
+def downgrade() -> None:
+    op.drop_column("files", "content_sha256")
+    op.drop_column("files", "size_bytes")
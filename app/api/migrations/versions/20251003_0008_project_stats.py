@@ -0,0 +1,43 @@
+"""Add project_stats table for dashboard cards"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251003_0008"
+down_revision = "20251002_0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Rows are built lazily on first dashboard read or by the rebuild job
+    op.create_table(
+        "project_stats",
+        sa.Column(
+            "project_id",
+            sa.String(length=255),
+            sa.ForeignKey("projects.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("file_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("language_counts", sa.JSON(), nullable=True),
+        sa.Column("edit_days", sa.JSON(), nullable=True),
+        sa.Column("last_file_id", sa.String(length=255), nullable=True),
+        sa.Column("last_file_title", sa.String(length=255), nullable=True),
+        sa.Column("last_file_path", sa.String(length=1024), nullable=True),
+        sa.Column("last_edited_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("highlight_file_id", sa.String(length=255), nullable=True),
+        sa.Column("highlight_title", sa.String(length=255), nullable=True),
+        sa.Column("highlight_path", sa.String(length=1024), nullable=True),
+        sa.Column("highlight_snippet", sa.Text(), nullable=True),
+        sa.Column(
+            "updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("project_stats")
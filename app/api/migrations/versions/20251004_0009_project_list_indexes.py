@@ -0,0 +1,30 @@
+"""Indexes for SQL-side dashboard project listing"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251004_0009"
+down_revision = "20251003_0008"
+branch_labels = None
+depends_on = None
+
+
+# Every dashboard view filters on is_archived and pages with a keyset on (sort key, id)
+INDEXES = (
+    ("ix_projects_archived_updated", ["is_archived", "updated_at", "id"]),
+    ("ix_projects_archived_created", ["is_archived", "created_at", "id"]),
+    ("ix_projects_archived_name", ["is_archived", sa.text("lower(name)"), "id"]),
+)
+
+
+def upgrade() -> None:
+    for name, columns in INDEXES:
+        op.create_index(name, "projects", columns)
+
+
+def downgrade() -> None:
+    for name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name="projects")
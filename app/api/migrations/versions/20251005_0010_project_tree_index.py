@@ -0,0 +1,53 @@
+"""Directory index for the lazy project tree"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251005_0010"
+down_revision = "20251004_0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("files", sa.Column("dir_path", sa.String(), nullable=False, server_default=""))
+    conn = op.get_bind()
+    rows = conn.execute(sa.text("SELECT id, path FROM files")).all()
+    for file_id, path in rows:
+        parts = [seg for seg in (path or "").split("/") if seg]
+        conn.execute(
+            sa.text("UPDATE files SET dir_path = :dir_path WHERE id = :id"),
+            {"dir_path": "/".join(parts[:-1]), "id": file_id},
+        )
+    op.create_index("ix_files_project_dir", "files", ["project_id", "dir_path", "path"])
+
+    # Rows are built per project on first tree read (services.tree_index.ensure_tree_index)
+    op.create_table(
+        "project_tree_dirs",
+        sa.Column(
+            "project_id",
+            sa.String(),
+            sa.ForeignKey("projects.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("path", sa.String(), primary_key=True),
+        sa.Column("parent_path", sa.String(), nullable=True),
+        sa.Column("name", sa.String(), nullable=False, server_default=""),
+        sa.Column("depth", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("file_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("subtree_files", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("subtree_persisted", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+    op.create_index(
+        "ix_project_tree_dirs_parent", "project_tree_dirs", ["project_id", "parent_path", "path"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_project_tree_dirs_parent", table_name="project_tree_dirs")
+    op.drop_table("project_tree_dirs")
+    op.drop_index("ix_files_project_dir", table_name="files")
+    op.drop_column("files", "dir_path")
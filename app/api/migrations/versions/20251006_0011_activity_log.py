@@ -0,0 +1,87 @@
+"""Unified append-only activity table"""
+
+from __future__ import annotations
+
+import json
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251006_0011"
+down_revision = "20251005_0010"
+branch_labels = None
+depends_on = None
+
+
+def _activity_type(event_type: str) -> str:
+    # Frozen copy of services.activity.activity_type_for_event at the time of this migration
+    if event_type.startswith("bundle."):
+        return "job"
+    if event_type in {"file.created", "file.updated", "file.moved", "file.deleted"}:
+        return "file_change"
+    return "event"
+
+
+def upgrade() -> None:
+    op.create_table(
+        "activity",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("project_id", sa.String(), sa.ForeignKey("projects.id"), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("message", sa.String(), nullable=False, server_default=""),
+        sa.Column("actor", sa.String(), nullable=True),
+        sa.Column("ref", sa.String(), nullable=True),
+        sa.Column("context", sa.JSON(), nullable=False, server_default="{}"),
+        sa.UniqueConstraint("project_id", "ref", name="uix_activity_project_ref"),
+    )
+    op.create_index("ix_activity_project_ts", "activity", ["project_id", "timestamp", "id"])
+    op.create_index(
+        "ix_activity_project_type_ts", "activity", ["project_id", "type", "timestamp", "id"]
+    )
+
+    # Seed history from what the activity tab used to merge at read time: existing events, plus the
+    # latest edit of files no event mentions. Git commits are ingested on demand
+    # (services.activity.ingest_commits).
+    conn = op.get_bind()
+    events = conn.execute(
+        sa.text("SELECT id, project_id, type, payload, created_at FROM events")
+    ).all()
+    for event_id, project_id, event_type, payload, created_at in events:
+        data = json.loads(payload) if isinstance(payload, str) else (payload or {})
+        conn.execute(
+            sa.text(
+                "INSERT INTO activity (project_id, type, timestamp, message, ref, context) "
+                "VALUES (:pid, :type, :ts, :message, :ref, :context)"
+            ),
+            {
+                "pid": project_id,
+                "type": _activity_type(event_type),
+                "ts": created_at,
+                "message": event_type.replace(".", " ").title(),
+                "ref": f"event:{event_id}",
+                "context": json.dumps({"type": event_type, "payload": data}),
+            },
+        )
+    op.execute(
+        """
+        INSERT INTO activity (project_id, type, timestamp, message, ref, context)
+        SELECT project_id, 'file_change', updated_at,
+               COALESCE(NULLIF(title, ''), path) || ' updated',
+               'file:' || id || ':' || updated_at, json_object('file_id', id, 'path', path)
+        FROM files
+        WHERE updated_at IS NOT NULL
+          AND NOT EXISTS (
+            SELECT 1 FROM events
+            WHERE events.project_id = files.project_id
+              AND json_extract(events.payload, '$.file_id') = files.id
+          )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_activity_project_type_ts", table_name="activity")
+    op.drop_index("ix_activity_project_ts", table_name="activity")
+    op.drop_table("activity")
@@ -0,0 +1,38 @@
+"""Cached remote tracking state for repos and artifacts repos"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251007_0012"
+down_revision = "20251006_0011"
+branch_labels = None
+depends_on = None
+
+
+TABLES = ("repos", "artifacts")
+
+
+def _columns() -> list[sa.Column]:
+    return [
+        sa.Column("ahead", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("behind", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("last_fetched_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("next_fetch_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("fetch_failures", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("fetch_error", sa.Text(), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        for column in _columns():
+            op.add_column(table, column)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        for column in reversed(_columns()):
+            op.drop_column(table, column.name)
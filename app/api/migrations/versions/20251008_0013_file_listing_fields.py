@@ -0,0 +1,32 @@
+"""Store derived description/summary/metadata on files"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251008_0013"
+down_revision = "20251007_0012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows keep derived_version NULL and are filled by
+    # worker.jobs.file_jobs.backfill_listing_fields
+    op.add_column("files", sa.Column("description", sa.Text(), nullable=True))
+    op.add_column("files", sa.Column("summary", sa.Text(), nullable=True))
+    op.add_column("files", sa.Column("metadata_fields", sa.JSON(), nullable=True))
+    op.add_column("files", sa.Column("metadata_signature", sa.String(), nullable=True))
+    op.add_column("files", sa.Column("derived_version", sa.Integer(), nullable=True))
+    op.create_index("ix_files_derived_version", "files", ["derived_version"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_files_derived_version", table_name="files")
+    op.drop_column("files", "derived_version")
+    op.drop_column("files", "metadata_signature")
+    op.drop_column("files", "metadata_fields")
+    op.drop_column("files", "summary")
+    op.drop_column("files", "description")
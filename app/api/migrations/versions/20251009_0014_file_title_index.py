@@ -0,0 +1,19 @@
+"""Index files by (project_id, title) for wikilink resolution"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251009_0014"
+down_revision = "20251008_0013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_files_project_title", "files", ["project_id", "title"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_files_project_title", table_name="files")
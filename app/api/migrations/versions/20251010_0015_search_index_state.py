@@ -0,0 +1,26 @@
+"""Persisted generation counter for the search index caches"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20251010_0015"
+down_revision = "20251009_0014"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # One row; every write to the file search tables increments it in the writing transaction
+    op.create_table(
+        "search_index_state",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("generation", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.execute("INSERT INTO search_index_state (id, generation) VALUES (1, 0)")
+
+
+def downgrade() -> None:
+    op.drop_table("search_index_state")
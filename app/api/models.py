@@ -1,26 +1,31 @@
 from __future__ import annotations
 
 import datetime as dt
+import hashlib
 import uuid
 from typing import Any
 
 from sqlalchemy import (
+    Boolean,
     Column,
-    String,
-    Text,
-    Enum,
     DateTime,
+    Enum,
     ForeignKey,
-    UniqueConstraint,
+    Index,
     Integer,
-    Boolean,
+    String,
     Table,
+    Text,
+    UniqueConstraint,
+    event,
+    func,
+    or_,
 )
 from sqlalchemy.dialects.sqlite import JSON
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, Session, mapped_column, relationship, validates
 
 from .db import Base
-
+from .services.frontmatter import LISTING_FIELDS_VERSION, derive_listing_fields
 
 StatusEnum = ("idea", "discovery", "draft", "live")
 VisibilityEnum = ("public", "private")
@@ -37,6 +42,7 @@ project_tags_table = Table(
     Base.metadata,
     Column("project_id", String, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True),
     Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_project_tags_tag", "tag_id"),
 )
 
 
@@ -73,6 +79,12 @@ class Project(Base):
         return [tag.label for tag in self.tag_entities]
 
 
+# Dashboard listing: is_archived filter + keyset order on (sort key, id)
+Index("ix_projects_archived_updated", Project.is_archived, Project.updated_at, Project.id)
+Index("ix_projects_archived_created", Project.is_archived, Project.created_at, Project.id)
+Index("ix_projects_archived_name", Project.is_archived, func.lower(Project.name), Project.id)
+
+
 class User(Base):
     __tablename__ = "user"
 
@@ -89,19 +101,148 @@ class User(Base):
 
 class File(Base):
     __tablename__ = "files"
+    __table_args__ = (
+        Index("ix_files_project_path", "project_id", "path"),
+        Index("ix_files_project_title", "project_id", "title"),
+        Index("ix_files_project_updated", "project_id", "updated_at"),
+        Index("ix_files_updated_at", "updated_at"),
+        Index("ix_files_project_dir", "project_id", "dir_path", "path"),
+        Index("ix_files_derived_version", "derived_version"),
+    )
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id: Mapped[str] = mapped_column(String, ForeignKey("projects.id"), nullable=False)
     path: Mapped[str] = mapped_column(String, nullable=False)
+    # Parent directory of path ("" at the root);
+    # one tree level is WHERE project_id = ? AND dir_path = ?
+    dir_path: Mapped[str] = mapped_column(String, default="")
     title: Mapped[str] = mapped_column(String, nullable=False)
     front_matter: Mapped[dict[str, Any]] = mapped_column(JSON, default=dict)
-    content_md: Mapped[str] = mapped_column(Text, default="")
-    rendered_html: Mapped[str] = mapped_column(Text, default="")
+    # Bodies are deferred: listing queries only read metadata; use undefer() where bodies are needed
+    content_md: Mapped[str] = mapped_column(Text, default="", deferred=True)
+    rendered_html: Mapped[str] = mapped_column(Text, default="", deferred=True)
+    size_bytes: Mapped[int] = mapped_column(Integer, default=0)
+    content_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
     tags: Mapped[list[str]] = mapped_column(JSON, default=list)
-    updated_at: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True), default=now_utc, onupdate=now_utc)
+    # Listing fields derived from front matter and body on write, so reads never re-parse content
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    summary: Mapped[str | None] = mapped_column(Text, nullable=True)
+    metadata_fields: Mapped[list[dict[str, Any]]] = mapped_column(JSON, default=list)
+    metadata_signature: Mapped[str | None] = mapped_column(String, nullable=True)
+    # LISTING_FIELDS_VERSION the fields were derived with;
+    # NULL/older rows are left to the backfill job
+    derived_version: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    updated_at: Mapped[dt.datetime] = mapped_column(
+        DateTime(timezone=True), default=now_utc, onupdate=now_utc
+    )
 
     project: Mapped[Project] = relationship("Project", back_populates="files")
 
+    @validates("content_md")
+    def _track_content_stats(self, _key: str, value: str | None) -> str | None:
+        encoded = (value or "").encode("utf-8")
+        self.size_bytes = len(encoded)
+        self.content_sha256 = hashlib.sha256(encoded).hexdigest()
+        # Listing fields are derived once at flush, whichever of body/front matter changed
+        self.derived_version = None
+        return value
+
+    @validates("front_matter")
+    def _track_front_matter(self, _key: str, value: dict[str, Any] | None) -> dict[str, Any] | None:
+        self.derived_version = None
+        return value
+
+    @classmethod
+    def listing_fields_stale(cls):
+        """Rows whose stored listing fields are missing or from an older LISTING_FIELDS_VERSION."""
+        return or_(cls.derived_version.is_(None), cls.derived_version < LISTING_FIELDS_VERSION)
+
+    def _derive_listing_fields(
+        self, front_matter: dict[str, Any] | None, content: str | None
+    ) -> None:
+        for name, derived in derive_listing_fields(front_matter, content).items():
+            setattr(self, name, derived)
+        self.derived_version = LISTING_FIELDS_VERSION
+
+    def listing_fields(self) -> dict[str, Any]:
+        """The stored listing fields, derived on the fly for rows the backfill has not reached."""
+        if self.derived_version == LISTING_FIELDS_VERSION:
+            return {
+                "description": self.description,
+                "summary": self.summary,
+                "metadata_fields": list(self.metadata_fields or []),
+                "metadata_signature": self.metadata_signature,
+            }
+        return derive_listing_fields(self.front_matter, self.content_md)
+
+    @validates("path")
+    def _track_dir_path(self, _key: str, value: str) -> str:
+        self.dir_path = parent_dir(value)
+        return value
+
+
+@event.listens_for(Session, "before_flush")
+def _derive_pending_listing_fields(session: Session, _flush_context, _instances) -> None:
+    for obj in (*session.new, *session.dirty):
+        if isinstance(obj, File) and obj.derived_version is None:
+            obj._derive_listing_fields(obj.front_matter, obj.content_md)
+
+
+def parent_dir(path: str | None) -> str:
+    parts = [seg for seg in (path or "").split("/") if seg]
+    return "/".join(parts[:-1])
+
+
+class ProjectStats(Base):
+    """Dashboard card aggregates, maintained on file writes (see services.project_stats)."""
+
+    __tablename__ = "project_stats"
+
+    project_id: Mapped[str] = mapped_column(
+        String, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True
+    )
+    file_count: Mapped[int] = mapped_column(Integer, default=0)
+    language_counts: Mapped[dict[str, int]] = mapped_column(JSON, default=dict)
+    # ISO date -> files whose latest edit fell on that day (only the sparkline window is kept)
+    edit_days: Mapped[dict[str, int]] = mapped_column(JSON, default=dict)
+    last_file_id: Mapped[str | None] = mapped_column(String, nullable=True)
+    last_file_title: Mapped[str | None] = mapped_column(String, nullable=True)
+    last_file_path: Mapped[str | None] = mapped_column(String, nullable=True)
+    last_edited_at: Mapped[dt.datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    highlight_file_id: Mapped[str | None] = mapped_column(String, nullable=True)
+    highlight_title: Mapped[str | None] = mapped_column(String, nullable=True)
+    highlight_path: Mapped[str | None] = mapped_column(String, nullable=True)
+    highlight_snippet: Mapped[str | None] = mapped_column(Text, nullable=True)
+    updated_at: Mapped[dt.datetime] = mapped_column(
+        DateTime(timezone=True), default=now_utc, onupdate=now_utc
+    )
+
+
+class ProjectTreeDir(Base):
+    """Materialized-path directory index behind the lazy project tree (see services.tree_index).
+
+    One row per directory that holds files or persisted directories anywhere below it, plus a
+    root row (path "") marking the project as indexed.
+    """
+
+    __tablename__ = "project_tree_dirs"
+    __table_args__ = (Index("ix_project_tree_dirs_parent", "project_id", "parent_path", "path"),)
+
+    project_id: Mapped[str] = mapped_column(
+        String, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True
+    )
+    path: Mapped[str] = mapped_column(String, primary_key=True)
+    parent_path: Mapped[str | None] = mapped_column(String, nullable=True)
+    name: Mapped[str] = mapped_column(String, default="")
+    depth: Mapped[int] = mapped_column(Integer, default=0)
+    # Files directly in this directory / anywhere below it
+    file_count: Mapped[int] = mapped_column(Integer, default=0)
+    subtree_files: Mapped[int] = mapped_column(Integer, default=0)
+    # Persisted Directory rows at or below this path
+    subtree_persisted: Mapped[int] = mapped_column(Integer, default=0)
+
 
 class Directory(Base):
     __tablename__ = "directories"
@@ -112,7 +253,9 @@ class Directory(Base):
     path: Mapped[str] = mapped_column(String, nullable=False)
     name: Mapped[str] = mapped_column(String, nullable=False)
     created_at: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
-    updated_at: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True), default=now_utc, onupdate=now_utc)
+    updated_at: Mapped[dt.datetime] = mapped_column(
+        DateTime(timezone=True), default=now_utc, onupdate=now_utc
+    )
 
     project: Mapped[Project] = relationship("Project", back_populates="directories")
 
@@ -124,9 +267,26 @@ class ArtifactRepo(Base):
     project_id: Mapped[str] = mapped_column(String, ForeignKey("projects.id"), nullable=False)
     repo_url: Mapped[str | None] = mapped_column(String, nullable=True)
     default_branch: Mapped[str] = mapped_column(String, default="main")
-    visibility: Mapped[str] = mapped_column(Enum(*VisibilityEnum, name="visibility_enum"), default="private")
-    provider: Mapped[str] = mapped_column(Enum(*ProviderEnum, name="provider_enum"), default="local")
-    last_synced_at: Mapped[dt.datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    visibility: Mapped[str] = mapped_column(
+        Enum(*VisibilityEnum, name="visibility_enum"), default="private"
+    )
+    provider: Mapped[str] = mapped_column(
+        Enum(*ProviderEnum, name="provider_enum"), default="local"
+    )
+    last_synced_at: Mapped[dt.datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    # Remote tracking state maintained by the worker's fetch scheduler (services.repo_sync)
+    ahead: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    behind: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    last_fetched_at: Mapped[dt.datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    next_fetch_at: Mapped[dt.datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    fetch_failures: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    fetch_error: Mapped[str | None] = mapped_column(Text, nullable=True)
 
     project: Mapped[Project] = relationship("Project", back_populates="artifacts")
 
@@ -138,11 +298,28 @@ class Repo(Base):
     name: Mapped[str] = mapped_column(String, nullable=False)
     scope: Mapped[str] = mapped_column(Enum(*ScopeEnum, name="scope_enum"), default="project")
     project_id: Mapped[str | None] = mapped_column(String, ForeignKey("projects.id"), nullable=True)
-    provider: Mapped[str] = mapped_column(Enum(*ProviderEnum, name="provider_enum"), default="local")
+    provider: Mapped[str] = mapped_column(
+        Enum(*ProviderEnum, name="provider_enum"), default="local"
+    )
     repo_url: Mapped[str | None] = mapped_column(String, nullable=True)
     default_branch: Mapped[str] = mapped_column(String, default="main")
-    visibility: Mapped[str] = mapped_column(Enum(*VisibilityEnum, name="visibility_enum"), default="private")
-    last_synced_at: Mapped[dt.datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    visibility: Mapped[str] = mapped_column(
+        Enum(*VisibilityEnum, name="visibility_enum"), default="private"
+    )
+    last_synced_at: Mapped[dt.datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    # Remote tracking state maintained by the worker's fetch scheduler (services.repo_sync)
+    ahead: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    behind: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    last_fetched_at: Mapped[dt.datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    next_fetch_at: Mapped[dt.datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    fetch_failures: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    fetch_error: Mapped[str | None] = mapped_column(Text, nullable=True)
 
     project: Mapped[Project | None] = relationship("Project", back_populates="repos")
 
@@ -164,6 +341,7 @@ class Bundle(Base):
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (Index("ix_events_project_created", "project_id", "created_at"),)
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id: Mapped[str] = mapped_column(String, ForeignKey("projects.id"), nullable=False)
@@ -172,15 +350,47 @@ class Event(Base):
     created_at: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
 
 
+class Activity(Base):
+    """Append-only project activity feed (file changes, events, jobs, git commits).
+
+    See services.activity.
+    """
+
+    __tablename__ = "activity"
+    __table_args__ = (
+        Index("ix_activity_project_ts", "project_id", "timestamp", "id"),
+        Index("ix_activity_project_type_ts", "project_id", "type", "timestamp", "id"),
+        UniqueConstraint("project_id", "ref", name="uix_activity_project_ref"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    project_id: Mapped[str] = mapped_column(String, ForeignKey("projects.id"), nullable=False)
+    # commit | file_change | job | event
+    type: Mapped[str] = mapped_column(String, nullable=False)
+    timestamp: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
+    message: Mapped[str] = mapped_column(String, default="")
+    actor: Mapped[str | None] = mapped_column(String, nullable=True)
+    # Source identity ("event:<id>", "commit:<sha>") so ingesters can be re-run safely
+    ref: Mapped[str | None] = mapped_column(String, nullable=True)
+    context: Mapped[dict[str, Any]] = mapped_column(JSON, default=dict)
+
+
 class Link(Base):
     __tablename__ = "links"
+    __table_args__ = (
+        Index("ix_links_src_file", "src_file_id"),
+        Index("ix_links_target_file", "target_file_id"),
+        Index("ix_links_project_target_title", "project_id", "target_title"),
+    )
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id: Mapped[str] = mapped_column(String, ForeignKey("projects.id"), nullable=False)
     src_file_id: Mapped[str] = mapped_column(String, ForeignKey("files.id"), nullable=False)
     src_path: Mapped[str] = mapped_column(String, nullable=False)
     target_title: Mapped[str] = mapped_column(String, nullable=False)
-    target_file_id: Mapped[str | None] = mapped_column(String, ForeignKey("files.id"), nullable=True)
+    target_file_id: Mapped[str | None] = mapped_column(
+        String, ForeignKey("files.id"), nullable=True
+    )
     created_at: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
 
 
@@ -208,9 +418,7 @@ class ShareLink(Base):
     revoked_at: Mapped[dt.datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
 
-    __table_args__ = (
-        UniqueConstraint("token", name="uq_share_links_token"),
-    )
+    __table_args__ = (UniqueConstraint("token", name="uq_share_links_token"),)
 
 
 # Phase 5 — Project Groups
@@ -237,7 +445,9 @@ class Tag(Base):
     label: Mapped[str] = mapped_column(String, nullable=False)
     color: Mapped[str | None] = mapped_column(String, nullable=True)
     created_at: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
-    updated_at: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True), default=now_utc, onupdate=now_utc)
+    updated_at: Mapped[dt.datetime] = mapped_column(
+        DateTime(timezone=True), default=now_utc, onupdate=now_utc
+    )
 
     projects: Mapped[list[Project]] = relationship(
         "Project",
@@ -255,13 +465,16 @@ class FileType(Base):
     color: Mapped[str | None] = mapped_column(String, nullable=True)
     icon: Mapped[str | None] = mapped_column(String, nullable=True)
     created_at: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True), default=now_utc)
-    updated_at: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True), default=now_utc, onupdate=now_utc)
+    updated_at: Mapped[dt.datetime] = mapped_column(
+        DateTime(timezone=True), default=now_utc, onupdate=now_utc
+    )
 
 
 class ProjectGroupMembership(Base):
     __tablename__ = "project_group_memberships"
     __table_args__ = (
         UniqueConstraint("project_id", name="uq_group_membership_project"),
+        Index("ix_group_memberships_group_order", "group_id", "sort_order"),
     )
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -6,12 +6,13 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from ..db import SessionLocal
+from ..events_pub import publish_event
+from ..git_ops import GitError, commit_and_push, current_branch, ensure_repo, repo_history
 from ..models import ArtifactRepo, Project
 from ..schemas import ArtifactsCommitRequest, ArtifactsConnectRequest, ArtifactsStatus, CommitEntry
+from ..services.activity import ingest_commits
+from ..services.repo_sync import artifacts_path, enqueue_fetch, sync_target
 from ..settings import settings
-from ..git_ops import ensure_repo, commit_and_push, GitError, repo_status, repo_history
-from ..events_pub import publish_event
-
 
 router = APIRouter(prefix="/projects", tags=["artifacts"])
 
@@ -68,25 +69,36 @@ def artifacts_commit(project_id: str, body: ArtifactsCommitRequest, db: Session
         publish_event(project_id=p.id, event_type="commit.failed", payload={"code": e.code, "message": e.message})
         raise HTTPException(status_code=400, detail={"code": e.code, "message": e.message})
     publish_event(project_id=p.id, event_type="commit.completed", payload=result)
+    ingest_commits(db, p)
+    ar = db.query(ArtifactRepo).filter(ArtifactRepo.project_id == project_id).first()
+    if ar:
+        sync_target(db, ar, fetch=False)
     return result
 
 
 @router.get("/{project_id}/artifacts/status", response_model=ArtifactsStatus)
-def artifacts_status(project_id: str, db: Session = Depends(get_db)):
+def artifacts_status(project_id: str, refresh: int = 0, db: Session = Depends(get_db)):
+    # Served from the row the worker's fetch scheduler maintains; never touches the network.
+    # ?refresh=1 queues an immediate fetch and returns the current cached values.
     p = db.get(Project, project_id)
     if not p:
         raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "Project"})
     ar = db.query(ArtifactRepo).filter(ArtifactRepo.project_id == project_id).first()
-    proj_dir = os.path.join(settings.data_dir, "projects", p.slug)
-    art_dir = os.path.join(proj_dir, "artifacts")
-    if not os.path.isdir(os.path.join(art_dir, ".git")):
-        return ArtifactsStatus(provider=ar.provider if ar else "local", repo_url=ar.repo_url if ar else None, branch=None, ahead=0, behind=0, last_sync=ar.last_synced_at if ar else None)
-    try:
-        st = repo_status(art_dir, (ar.default_branch if ar else None))
-        return ArtifactsStatus(provider=ar.provider if ar else "local", repo_url=ar.repo_url if ar else None, branch=st.get("branch"), ahead=st.get("ahead", 0), behind=st.get("behind", 0), last_sync=ar.last_synced_at if ar else None)
-    except GitError:
-        # Gracefully degrade: return basic status without ahead/behind
-        return ArtifactsStatus(provider=ar.provider if ar else "local", repo_url=ar.repo_url if ar else None, branch=ar.default_branch if ar else None, ahead=0, behind=0, last_sync=ar.last_synced_at if ar else None)
+    art_dir = artifacts_path(p)
+    connected = os.path.isdir(os.path.join(art_dir, ".git"))
+    if connected and ar and refresh:
+        enqueue_fetch("artifacts", ar.id)
+    return ArtifactsStatus(
+        provider=ar.provider if ar else "local",
+        repo_url=ar.repo_url if ar else None,
+        branch=(current_branch(art_dir) or (ar.default_branch if ar else None))
+        if connected
+        else None,
+        ahead=(ar.ahead or 0) if ar and connected else 0,
+        behind=(ar.behind or 0) if ar and connected else 0,
+        last_sync=ar.last_synced_at if ar else None,
+        last_fetched=ar.last_fetched_at if ar else None,
+    )
 
 
 @router.get("/{project_id}/artifacts/history", response_model=list[CommitEntry])
@@ -1,25 +1,24 @@
 from __future__ import annotations
 
+import datetime as dt
+import hashlib
+import json
 import os
+import zipfile
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
 import redis
 import rq
+import yaml
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 
-from ..events_pub import publish_event
 from ..db import SessionLocal
-from ..models import File, Project, Bundle
+from ..events_pub import publish_event
+from ..models import Bundle, File, Project
 from ..schemas import BundleCreateRequest, BundleRead
+from ..services.unit_of_work import flush_post_commit
 from ..settings import settings
-import json
-import datetime as dt
-import os
-import zipfile
-import hashlib
-import yaml
-
 
 router = APIRouter(prefix="/projects", tags=["bundles"])
 bundles_router = APIRouter(prefix="/bundles", tags=["bundles"])
@@ -44,7 +43,8 @@ def export_project_bundle(project_id: str, body: BundleCreateRequest, db: Sessio
         file_ids = selection.file_ids
     files = [db.get(File, fid) for fid in file_ids]
     files = [f for f in files if f]
-    # translate DB files to on-disk relative paths
+    # translate DB files to on-disk relative paths; the export job reads the mirror
+    flush_post_commit()
     file_rel_paths = [os.path.join("files", f.path) for f in files]
     proj_dir = os.path.join(settings.data_dir, "projects", p.slug)
     # Persist Bundle row (queued)
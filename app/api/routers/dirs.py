@@ -9,24 +9,26 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from ..db import SessionLocal, engine
+from ..app_logging import get_logger
+from ..db import SessionLocal
 from ..events_pub import publish_event
 from ..models import Directory, File, Project
 from ..schemas import (
-    DirectoryCreate,
-    DirectoryRead,
-    DirectoryMoveRequest,
-    DirectoryMoveDryRunResult,
-    DirectoryMoveApplyResult,
     DirectoryChange,
-    FileMovePreview,
+    DirectoryCreate,
     DirectoryDeleteRequest,
     DirectoryDeleteResult,
+    DirectoryMoveApplyResult,
+    DirectoryMoveDryRunResult,
+    DirectoryMoveRequest,
+    DirectoryRead,
+    FileMovePreview,
 )
+from ..services.bulk_move import apply_prefix_move, is_within, normalize_dir_path, plan_prefix_move
+from ..services.tree_index import rebuild_tree_index
+from ..services.unit_of_work import UnitOfWork, flush_post_commit
 from ..settings import settings
 from ..utils import safe_join
-from ..search import index_file
-from ..app_logging import get_logger
 
 
 def require_dirs_enabled():
@@ -81,6 +83,8 @@ def create_dir(project_id: str, body: DirectoryCreate, db: Session = Depends(get
         return existing
     d = Directory(project_id=project_id, path=norm, name=name)
     db.add(d)
+    db.flush()
+    rebuild_tree_index(db, project_id)
     db.commit()
     db.refresh(d)
     # Ensure on-disk directory exists
@@ -103,34 +107,22 @@ def move_dir(project_id: str, body: DirectoryMoveRequest, db: Session = Depends(
     if not proj:
         raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "Project"})
     start = time.perf_counter()
-    old_norm = "/".join([seg for seg in body.old_path.split("/") if seg])
-    new_norm = "/".join([seg for seg in body.new_path.split("/") if seg])
+    old_norm = normalize_dir_path(body.old_path)
+    new_norm = normalize_dir_path(body.new_path)
     if old_norm == new_norm:
         return DirectoryMoveDryRunResult(applied=False, dir_changes=[], file_moves=[], dirs_count=0, files_count=0)
+    if is_within(new_norm, old_norm):
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "BAD_PATH", "message": "Cannot move a directory into itself"},
+        )
 
-    # Collect affected directories
-    all_dirs: list[Directory] = db.scalars(
-        select(Directory).where(Directory.project_id == project_id)
-    ).all()
-    affected_dirs: list[Directory] = [d for d in all_dirs if d.path == old_norm or d.path.startswith(old_norm + "/")]
-    dir_changes: list[DirectoryChange] = []
-    for d in affected_dirs:
-        suffix = d.path[len(old_norm) :]
-        if suffix.startswith("/"):
-            suffix = suffix[1:]
-        new_path = new_norm if not suffix else f"{new_norm}/{suffix}"
-        dir_changes.append(DirectoryChange(old_path=d.path, new_path=new_path))
-
-    # Collect affected files
-    files: list[File] = db.scalars(select(File).where(File.project_id == project_id)).all()
-    affected_files: list[File] = [f for f in files if f.path == old_norm or f.path.startswith(old_norm + "/")]
-    file_moves: list[FileMovePreview] = []
-    for f in affected_files:
-        suffix = f.path[len(old_norm) :]
-        if suffix.startswith("/"):
-            suffix = suffix[1:]
-        new_path = new_norm if not suffix else f"{new_norm}/{suffix}"
-        file_moves.append(FileMovePreview(file_id=f.id, old_path=f.path, new_path=new_path))
+    plan = plan_prefix_move(db, project_id, old_norm, new_norm)
+    dir_changes = [DirectoryChange(old_path=old, new_path=new) for old, new in plan.dir_moves]
+    file_moves = [
+        FileMovePreview(file_id=fid, old_path=old, new_path=new)
+        for fid, old, new in plan.file_moves
+    ]
 
     if body.dry_run:
         _log_dir_event(
@@ -150,53 +142,23 @@ def move_dir(project_id: str, body: DirectoryMoveRequest, db: Session = Depends(
             files_count=len(file_moves),
         )
 
-    # Apply on disk (best-effort): move top-level directory once
+    # One transaction for rows, links and indexes;
+    # the directory is renamed on disk once, after commit
+    uow = UnitOfWork(db)
+    apply_prefix_move(db, plan)
     proj_dir = os.path.join(settings.data_dir, "projects", proj.slug)
-    old_abs = safe_join(proj_dir, "files", old_norm)
-    new_abs = safe_join(proj_dir, "files", new_norm)
-    try:
-        # If old_abs exists and is a directory, move subtree
-        if os.path.isdir(old_abs):
-            os.makedirs(os.path.dirname(new_abs), exist_ok=True)
-            shutil.move(old_abs, new_abs)
-        else:
-            os.makedirs(new_abs, exist_ok=True)
-    except Exception:
-        # Non-fatal; continue updating DB
-        os.makedirs(new_abs, exist_ok=True)
-
-    # Apply to DB for directories
-    for ch in dir_changes:
-        d = next((x for x in affected_dirs if x.path == ch.old_path), None)
-        if d:
-            d.path = ch.new_path
-            d.name = ch.new_path.split("/")[-1]
-            db.add(d)
-    db.commit()
-
-    # Apply to DB for files and reindex
-    for mv in file_moves:
-        f = db.get(File, mv.file_id)
-        if not f:
-            continue
-        f.path = mv.new_path
-        db.add(f)
-        db.commit()
-        db.refresh(f)
-        # reindex with new path
-        try:
-            with engine.begin() as conn:
-                index_file(conn, f.id, f"{f.title}\n{f.content_md}", title=f.title, path=f.path)
-        except Exception:
-            pass
-
-    event_payload = {"old_path": old_norm, "new_path": new_norm, "dirs": len(dir_changes), "files": len(file_moves)}
-    try:
-        publish_event(project_id, "dir.moved", event_payload)
-        if old_norm != new_norm:
-            publish_event(project_id, "dir.renamed", event_payload)
-    except Exception:
-        pass
+    uow.move_dir(safe_join(proj_dir, "files", old_norm), safe_join(proj_dir, "files", new_norm))
+    uow.publish(
+        project_id,
+        "dir.moved",
+        {
+            "old_path": old_norm,
+            "new_path": new_norm,
+            "dirs": len(dir_changes),
+            "files": len(file_moves),
+        },
+    )
+    uow.commit()
     _log_dir_event(
         "dir.move",
         project_id,
@@ -225,21 +187,34 @@ def delete_dir(project_id: str, body: DirectoryDeleteRequest, db: Session = Depe
     norm = "/".join([seg for seg in body.path.split("/") if seg])
     # Check emptiness unless force
     if not body.force:
-        has_files = db.scalars(select(File).where(File.project_id == project_id, File.path.like(norm + "%"))).first()
-        has_subdirs = db.scalars(select(Directory).where(Directory.project_id == project_id, Directory.path.like(norm + "%"))).first()
+        has_files = db.scalars(
+            select(File).where(File.project_id == project_id, File.path.like(norm + "%"))
+        ).first()
+        has_subdirs = db.scalars(
+            select(Directory).where(
+                Directory.project_id == project_id, Directory.path.like(norm + "%")
+            )
+        ).first()
         # If there is the directory itself only, allow deletion; else block
         if has_files or (has_subdirs and (has_subdirs.path != norm)):
-            raise HTTPException(status_code=409, detail={"code": "DIR_NOT_EMPTY", "message": "Directory not empty"})
+            raise HTTPException(
+                status_code=409, detail={"code": "DIR_NOT_EMPTY", "message": "Directory not empty"}
+            )
 
     # Delete subtree directories
     removed = 0
-    dirs = db.scalars(select(Directory).where(Directory.project_id == project_id, Directory.path.like(norm + "%"))).all()
+    dirs = db.scalars(
+        select(Directory).where(Directory.project_id == project_id, Directory.path.like(norm + "%"))
+    ).all()
     for d in dirs:
         db.delete(d)
         removed += 1
+    db.flush()
+    rebuild_tree_index(db, project_id)
     db.commit()
 
     # Remove on disk if empty or force
+    flush_post_commit()
     proj_dir = os.path.join(settings.data_dir, "projects", proj.slug)
     abs_dir = safe_join(proj_dir, "files", norm)
     try:
@@ -257,5 +232,7 @@ def delete_dir(project_id: str, body: DirectoryDeleteRequest, db: Session = Depe
         publish_event(project_id, "dir.deleted", {"path": norm, "removed": removed})
     except Exception:
         pass
-    _log_dir_event("dir.delete", project_id, start, path=norm, removed_dirs=removed, forced=bool(body.force))
+    _log_dir_event(
+        "dir.delete", project_id, start, path=norm, removed_dirs=removed, forced=bool(body.force)
+    )
     return DirectoryDeleteResult(deleted=True, removed_dirs=removed)
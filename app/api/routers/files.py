@@ -1,51 +1,65 @@
 from __future__ import annotations
 
-import os
-import mimetypes
-import hashlib
 import datetime as dt
+import hashlib
+import mimetypes
+import os
 from typing import Any, List
 
-from fastapi import APIRouter, Depends, HTTPException, Response, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from fastapi.responses import FileResponse
-from markdown_it import MarkdownIt
-from sqlalchemy import select, text, func
-from sqlalchemy.orm import Session
-
-from ..db import SessionLocal, engine
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, undefer
+
+from ..db import SessionLocal
+from ..links import (
+    drop_file_links,
+    list_outgoing_links,
+    referencing_files,
+    relink_file,
+    rewrite_wikilinks,
+    rewrite_wikilinks_many,
+    sync_link_sources,
+    upsert_links,
+    upsert_links_bulk,
+)
 from ..models import File, Project, Tag
 from ..schemas import (
+    DirectoryChange,
+    FileBatchItemResult,
+    FileBatchOperation,
     FileCreate,
     FileCreateWithProject,
+    FileMovePreview,
+    FilePreviewResponse,
     FileRead,
+    FilesBatchMoveRequest,
+    FilesBatchMoveResult,
+    FilesBatchWriteRequest,
+    FilesBatchWriteResult,
     LinkInfo,
-    MoveFileRequest,
-    MoveFileDryRunResult,
     MoveFileApplyResult,
-    FilePreviewResponse,
-    RecentFilesResponse,
+    MoveFileDryRunResult,
+    MoveFileRequest,
     RecentFileEntry,
     RecentFileProject,
+    RecentFilesResponse,
 )
-from ..settings import settings
-from ..utils import safe_join, slugify
-import os
-from ..search import index_file
-from ..links import upsert_links, rewrite_wikilinks, list_outgoing_links
-import shutil
-from ..events_pub import publish_event
-from ..schemas import FilesBatchMoveRequest, FilesBatchMoveResult, FileMovePreview, DirectoryChange
-from ..models import Directory
+from ..search import build_search_blob, index_file, index_files, remove_from_index
+from ..services.bulk_move import apply_prefix_move, is_within, normalize_dir_path, plan_prefix_move
 from ..services.frontmatter import (
-    prepare_front_matter,
     build_tag_details,
-    extract_front_matter,
-    summarize_markdown,
-    build_metadata_fields,
-    build_metadata_signature,
+    prepare_front_matter,
+    strip_front_matter,
 )
+from ..services.link_graph import stage_invalidate
+from ..services.project_stats import apply_file_change, apply_file_move, file_stats_entry
+from ..services.render import render_markdown
 from ..services.tagging import ensure_tags
-
+from ..services.tree_index import apply_file_paths, move_file_path
+from ..services.unit_of_work import UnitOfWork, mirror_pending
+from ..settings import settings
+from ..utils import safe_join, slugify
 
 router = APIRouter(prefix="/files", tags=["files"])
 
@@ -58,12 +72,21 @@ def get_db():
         db.close()
 
 
-md = MarkdownIt("commonmark").enable("table").enable("strikethrough")
+# Flipped once no row is left for the listing-fields backfill; every write stores current fields
+_LISTING_FIELDS_CURRENT = False
+
 
+def _listing_load_options(db: Session) -> list:
+    """Undefer the body while unbackfilled rows remain.
 
-def render_markdown(md_text: str) -> str:
-    # MVP: basic Markdown render; Mermaid/KaTeX handled on client later
-    return md.render(md_text)
+    Deriving their listing fields then needs no query per row.
+    """
+    global _LISTING_FIELDS_CURRENT
+    if not _LISTING_FIELDS_CURRENT:
+        _LISTING_FIELDS_CURRENT = (
+            db.scalar(select(File.id).where(File.listing_fields_stale()).limit(1)) is None
+        )
+    return [] if _LISTING_FIELDS_CURRENT else [undefer(File.content_md)]
 
 
 _PREVIEW_MAX_BYTES = 200_000
@@ -161,21 +184,11 @@ def _serialize_file(
     front_matter = file_obj.front_matter or {}
     tags = list(file_obj.tags or [])
     tag_details = build_tag_details(tags, tag_lookup)
-    icon_hint = front_matter.get('icon') if isinstance(front_matter.get('icon'), str) else None
+    icon_hint = front_matter.get("icon") if isinstance(front_matter.get("icon"), str) else None
     if not icon_hint:
-        if file_obj.path and '.' in file_obj.path:
-            icon_hint = file_obj.path.rsplit('.', 1)[-1].lower()
-    _, body = extract_front_matter(file_obj.content_md or '')
-    description_value = front_matter.get('description') if isinstance(front_matter.get('description'), str) else None
-    if description_value:
-        description_value = description_value.strip() or None
-    summary_text = summarize_markdown(body)
-    if description_value:
-        truncated_description = description_value if len(description_value) <= 180 else description_value[:179].rstrip() + '…'
-    else:
-        truncated_description = None
-    metadata_fields = build_metadata_fields(front_matter)
-    metadata_signature = build_metadata_signature(front_matter)
+        if file_obj.path and "." in file_obj.path:
+            icon_hint = file_obj.path.rsplit(".", 1)[-1].lower()
+    listing = file_obj.listing_fields()
     project_payload = None
     if project is not None:
         project_payload = {
@@ -194,14 +207,14 @@ def _serialize_file(
         rendered_html=file_obj.rendered_html,
         tags=tags,
         front_matter=front_matter,
-        description=description_value,
-        links=list(front_matter.get('links') or []),
+        description=listing["description"],
+        links=list(front_matter.get("links") or []),
         icon_hint=icon_hint,
         tag_details=tag_details,
-        summary=truncated_description or summary_text,
+        summary=listing["summary"],
         updated_at=file_obj.updated_at,
-        metadata_fields=metadata_fields,
-        metadata_signature=metadata_signature,
+        metadata_fields=listing["metadata_fields"],
+        metadata_signature=listing["metadata_signature"],
         project=project_payload,
     )
 
@@ -220,7 +233,10 @@ def _apply_template_to_payload(template_id: str | None, content_md: str) -> str:
     if not template_id:
         return content_md
     if template_id not in _DEFAULT_TEMPLATE_IDS:
-        raise HTTPException(status_code=400, detail={"code": "INVALID_TEMPLATE", "message": "Template not supported"})
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "INVALID_TEMPLATE", "message": "Template not supported"},
+        )
     return content_md
 
 
@@ -247,86 +263,68 @@ def _create_file_internal(
         rendered_html=rendered,
         tags=tags,
     )
-    db.add(f)
-    db.commit()
-    db.refresh(f)
-
     proj_dir = os.path.join(settings.data_dir, "projects", project.slug)
     abs_path = safe_join(proj_dir, "files", body.path)
-    os.makedirs(os.path.dirname(abs_path), exist_ok=True)
-    with open(abs_path, "w") as fh:
-        fh.write(prepared.content)
-
-    with engine.begin() as conn:
-        index_file(
-            conn,
-            f.id,
-            _build_search_blob(f.title, prepared.body, prepared.front_matter),
-            title=f.title,
-            path=f.path,
-        )
 
-    upsert_links(db, project.id, f, prepared.body)
+    # Row, stats, tree index, search index, links and events commit together; the disk
+    # mirror and Redis fan-out run after the commit
+    uow = UnitOfWork(db)
+    db.add(f)
+    db.flush()
+    apply_file_change(db, project.id, added=file_stats_entry(f), content=prepared.content)
+    apply_file_paths(db, project.id, added=f.path)
+    index_file(
+        db.connection(),
+        f.id,
+        build_search_blob(f.title, prepared.body, prepared.front_matter),
+        title=f.title,
+        path=f.path,
+    )
+    upsert_links(db, project.id, f, prepared.body, commit=False)
+    relink_file(db, project.id, f.id, f.title)
+    uow.write_file(abs_path, prepared.content)
+
     tag_lookup: dict[str, Tag] = {}
     if tags:
-        tag_rows = db.scalars(select(Tag).where(Tag.slug.in_({slugify(tag) for tag in tags if slugify(tag)}))).all()
+        tag_rows = db.scalars(
+            select(Tag).where(Tag.slug.in_({slugify(tag) for tag in tags if slugify(tag)}))
+        ).all()
         tag_lookup = {row.slug: row for row in tag_rows}
     serialized = _serialize_file(f, tag_lookup, project=project)
-    serialized_dict = serialized.model_dump() if hasattr(serialized, "model_dump") else serialized.dict()
+    serialized_dict = (
+        serialized.model_dump() if hasattr(serialized, "model_dump") else serialized.dict()
+    )
     metadata_fields_payload = serialized_dict.get("metadata_fields", [])
     tags_payload = serialized_dict.get("tags", [])
     metadata_signature = serialized_dict.get("metadata_signature")
-    try:
-        publish_event(
+    uow.publish(
+        project.id,
+        "file.created",
+        {
+            "file_id": f.id,
+            "path": f.path,
+            "title": f.title,
+            "tags": tags_payload,
+            "metadata_signature": metadata_signature,
+            "metadata_fields": metadata_fields_payload,
+            "updated_at": f.updated_at.isoformat() if f.updated_at else None,
+        },
+    )
+    if tags_payload:
+        uow.publish(
             project.id,
-            "file.created",
+            "file.tagged",
             {
                 "file_id": f.id,
-                "path": f.path,
-                "title": f.title,
                 "tags": tags_payload,
-                "metadata_signature": metadata_signature,
-                "metadata_fields": metadata_fields_payload,
-                "updated_at": f.updated_at.isoformat() if f.updated_at else None,
+                "added": tags_payload,
+                "removed": [],
             },
         )
-    except Exception:
-        pass
-    if tags_payload:
-        try:
-            publish_event(
-                project.id,
-                "file.tagged",
-                {
-                    "file_id": f.id,
-                    "tags": tags_payload,
-                    "added": tags_payload,
-                    "removed": [],
-                },
-            )
-        except Exception:
-            pass
+    uow.commit()
     return serialized
 
 
-def _build_search_blob(title: str, body: str, front_matter: dict[str, Any]) -> str:
-    fm_parts: list[str] = []
-    for key, value in (front_matter or {}).items():
-        if isinstance(value, (str, int, float)):
-            fm_parts.append(str(value))
-        elif isinstance(value, (list, tuple, set)):
-            for item in value:
-                if isinstance(item, (str, int, float)):
-                    fm_parts.append(str(item))
-                elif isinstance(item, dict):
-                    fm_parts.extend(str(v) for v in item.values() if isinstance(v, (str, int, float)))
-        elif isinstance(value, dict):
-            fm_parts.extend(str(v) for v in value.values() if isinstance(v, (str, int, float)))
-    fm_text = "\n".join(fm_parts)
-    combined = "\n".join(filter(None, [title, fm_text, body]))
-    return combined
-
-
 @router.post("/project/{project_id}", response_model=FileRead, status_code=201)
 def create_file(project_id: str, body: FileCreate, db: Session = Depends(get_db)):
     project = _get_project_or_404(db, project_id)
@@ -339,6 +337,228 @@ def create_file_global(body: FileCreateWithProject, db: Session = Depends(get_db
     return _create_file_internal(db, project, body, template_id=body.template_id)
 
 
+def _batch_error(
+    index: int, item: FileBatchOperation, code: str, message: str
+) -> FileBatchItemResult:
+    return FileBatchItemResult(
+        index=index,
+        op=item.op,
+        status="error",
+        file_id=item.file_id,
+        project_id=item.project_id,
+        path=item.path,
+        error={"code": code, "message": message},
+    )
+
+
+@router.post("/batch", response_model=FilesBatchWriteResult)
+def batch_write_files(body: FilesBatchWriteRequest, db: Session = Depends(get_db)):
+    """Create/update many files in one transaction.
+
+    Items that fail validation are reported per index and skipped; the rest commit together.
+    A file may appear once per batch: repeats of a ``file_id``, or of a (project, path) already
+    written by an earlier item, fail with ``DUPLICATE_ITEM``. Search rows are written with
+    executemany, links are resolved once per project at the end, and each touched project gets
+    one coalesced ``files.batch_written`` event.
+    """
+    if len(body.items) > settings.files_batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "code": "BATCH_TOO_LARGE",
+                "message": f"At most {settings.files_batch_max_items} items per batch",
+            },
+        )
+    uow = UnitOfWork(db)
+    projects: dict[str, Project] = {}
+    results: list[FileBatchItemResult] = []
+    index_entries: list[tuple[str, str, str | None, str | None]] = []
+    link_sources: dict[str, list[tuple[File, str]]] = {}
+    renames: dict[str, dict[str, str]] = {}
+    relinks: list[tuple[str, str, str, str | None]] = []
+    touched: dict[str, list[dict[str, Any]]] = {}
+    seen_ids: set[str] = set()
+    seen_paths: set[tuple[str, str]] = set()
+
+    def project_for(project_id: str | None) -> Project | None:
+        if not project_id:
+            return None
+        if project_id not in projects:
+            project = db.get(Project, project_id)
+            if project is None:
+                return None
+            projects[project_id] = project
+        return projects[project_id]
+
+    for index, item in enumerate(body.items):
+        existing: File | None = None
+        if item.op == "update":
+            if item.file_id in seen_ids:
+                results.append(
+                    _batch_error(index, item, "DUPLICATE_ITEM", "File already in this batch")
+                )
+                continue
+            existing = db.get(File, item.file_id) if item.file_id else None
+            if existing is None:
+                results.append(_batch_error(index, item, "NOT_FOUND", "File"))
+                continue
+            project = project_for(existing.project_id)
+        else:
+            project = project_for(item.project_id)
+        if project is None:
+            results.append(_batch_error(index, item, "NOT_FOUND", "Project"))
+            continue
+        if any(seg in item.path for seg in ["..", "\\", ":"]):
+            results.append(_batch_error(index, item, "BAD_PATH", "Invalid path"))
+            continue
+        if (project.id, item.path) in seen_paths:
+            results.append(
+                _batch_error(index, item, "DUPLICATE_ITEM", "Path already written in this batch")
+            )
+            continue
+        try:
+            abs_path = safe_join(
+                os.path.join(settings.data_dir, "projects", project.slug), "files", item.path
+            )
+            content = _apply_template_to_payload(item.template_id, item.content_md)
+        except HTTPException as exc:
+            detail = exc.detail if isinstance(exc.detail, dict) else {}
+            results.append(
+                _batch_error(
+                    index, item, detail.get("code", "BAD_REQUEST"), detail.get("message", "")
+                )
+            )
+            continue
+        except ValueError:
+            results.append(_batch_error(index, item, "BAD_PATH", "Invalid path"))
+            continue
+
+        prepared = prepare_front_matter(content, item.front_matter, item.tags)
+        if prepared.tags:
+            ensure_tags(db, prepared.tags)
+        rendered = render_markdown(prepared.body or prepared.content)
+        if existing is None:
+            f = File(
+                project_id=project.id,
+                path=item.path,
+                title=item.title or os.path.basename(item.path) or "Untitled",
+                front_matter=prepared.front_matter,
+                content_md=prepared.content,
+                rendered_html=rendered,
+                tags=prepared.tags,
+            )
+            db.add(f)
+            db.flush()
+            apply_file_change(db, project.id, added=file_stats_entry(f), content=prepared.content)
+            apply_file_paths(db, project.id, added=f.path)
+            relinks.append((project.id, f.id, f.title, None))
+            status = "created"
+        else:
+            f = existing
+            stats_before = file_stats_entry(f)
+            old_title, old_path = f.title, f.path
+            f.path = item.path
+            f.title = item.title or f.title
+            f.front_matter = prepared.front_matter
+            f.content_md = prepared.content
+            f.rendered_html = rendered
+            f.tags = prepared.tags
+            db.add(f)
+            db.flush()
+            apply_file_change(
+                db,
+                f.project_id,
+                added=file_stats_entry(f),
+                removed=stats_before,
+                content=prepared.content,
+            )
+            apply_file_paths(db, f.project_id, removed=stats_before.path, added=f.path)
+            if f.title != old_title:
+                relinks.append((f.project_id, f.id, f.title, old_title))
+            if item.rewrite_links and old_title and f.title != old_title:
+                renames.setdefault(f.project_id, {})[old_title] = f.title
+            if old_path and old_path != f.path:
+                old_abs = safe_join(
+                    os.path.join(settings.data_dir, "projects", project.slug), "files", old_path
+                )
+                if old_abs != abs_path:
+                    uow.remove_file(old_abs)
+            status = "updated"
+
+        seen_ids.add(f.id)
+        seen_paths.add((project.id, f.path))
+        uow.write_file(abs_path, prepared.content)
+        index_entries.append(
+            (
+                f.id,
+                build_search_blob(f.title, prepared.body, prepared.front_matter),
+                f.title,
+                f.path,
+            )
+        )
+        link_sources.setdefault(project.id, []).append((f, prepared.body))
+        touched.setdefault(project.id, []).append(
+            {"file_id": f.id, "path": f.path, "title": f.title, "status": status}
+        )
+        results.append(
+            FileBatchItemResult(
+                index=index,
+                op=item.op,
+                status=status,
+                file_id=f.id,
+                project_id=project.id,
+                path=f.path,
+            )
+        )
+
+    index_files(db.connection(), index_entries)
+    # Links last, so items of this batch resolve against each other
+    for project_id, sources in link_sources.items():
+        upsert_links_bulk(db, project_id, sources)
+    for project_id, file_id, title, old_title in relinks:
+        relink_file(db, project_id, file_id, title, old_title=old_title)
+    # All titles renamed in this batch are rewritten together, one pass per referencing file
+    for project_id, project_renames in renames.items():
+        rewrite_wikilinks_many(db, project_id, project_renames, commit=False)
+    for project_id, items in touched.items():
+        uow.publish(
+            project_id,
+            "files.batch_written",
+            {
+                "items": items,
+                "created": sum(1 for entry in items if entry["status"] == "created"),
+                "updated": sum(1 for entry in items if entry["status"] == "updated"),
+            },
+        )
+    uow.commit()
+    return FilesBatchWriteResult(
+        results=results,
+        created=sum(1 for r in results if r.status == "created"),
+        updated=sum(1 for r in results if r.status == "updated"),
+        failed=sum(1 for r in results if r.status == "error"),
+    )
+
+
+@router.post("/listing-fields/rebuild")
+def rebuild_listing_fields() -> dict[str, Any]:
+    import redis as _redis
+    import rq as _rq
+
+    q = _rq.Queue("default", connection=_redis.from_url(settings.redis_url))
+    job = q.enqueue("worker.jobs.file_jobs.backfill_listing_fields", job_timeout=1800)
+    return {"job_id": job.id}
+
+
+@router.post("/links/relink")
+def relink_links(project_id: str | None = None) -> dict[str, Any]:
+    import redis as _redis
+    import rq as _rq
+
+    q = _rq.Queue("default", connection=_redis.from_url(settings.redis_url))
+    job = q.enqueue("worker.jobs.file_jobs.relink_dangling_links", project_id, job_timeout=600)
+    return {"job_id": job.id}
+
+
 @router.get("/recent", response_model=RecentFilesResponse)
 def list_recent_files(
     limit: int = Query(default=5, ge=1, le=50),
@@ -348,13 +568,16 @@ def list_recent_files(
     try:
         offset = int(cursor) if cursor else 0
     except ValueError as exc:
-        raise HTTPException(status_code=400, detail={"code": "BAD_CURSOR", "message": "Cursor must be integer"}) from exc
+        raise HTTPException(
+            status_code=400, detail={"code": "BAD_CURSOR", "message": "Cursor must be integer"}
+        ) from exc
 
     limit = max(1, min(limit, 50))
 
     rows = db.execute(
         select(File, Project)
         .join(Project, File.project_id == Project.id)
+        .options(*_listing_load_options(db))
         .order_by(File.updated_at.desc())
         .offset(offset)
         .limit(limit + 1)
@@ -363,20 +586,13 @@ def list_recent_files(
     items: list[RecentFileEntry] = []
     for file_obj, project in rows[:limit]:
         updated_at = file_obj.updated_at or dt.datetime.now(tz=dt.timezone.utc)
-        front_matter, body = extract_front_matter(file_obj.content_md or "")
-        description_value = None
-        if isinstance(front_matter, dict):
-            raw_description = front_matter.get("description")
-            if isinstance(raw_description, str):
-                description_value = raw_description.strip() or None
-        summary_text = description_value or summarize_markdown(body)
         items.append(
             RecentFileEntry(
                 id=file_obj.id,
                 title=file_obj.title,
                 path=file_obj.path,
                 updated_at=updated_at,
-                summary=summary_text,
+                summary=file_obj.listing_fields()["summary"],
                 project=RecentFileProject(
                     id=project.id,
                     name=project.name,
@@ -498,10 +714,19 @@ def get_file_raw(file_id: str, db: Session = Depends(get_db)):
     except Exception:
         raise HTTPException(status_code=404, detail={"code": "NOT_FOUND"})
 
-    if abs_path and os.path.isfile(abs_path):
+    # The row is authoritative while a committed save is still on its way to disk
+    if (
+        abs_path
+        and os.path.isfile(abs_path)
+        and not (f.content_md is not None and mirror_pending(abs_path))
+    ):
         mime_type, _ = mimetypes.guess_type(f.path)
-        resp = FileResponse(abs_path, media_type=mime_type or "application/octet-stream", filename=os.path.basename(f.path))
-        resp.headers["Content-Disposition"] = f"inline; filename=\"{os.path.basename(f.path)}\""
+        resp = FileResponse(
+            abs_path,
+            media_type=mime_type or "application/octet-stream",
+            filename=os.path.basename(f.path),
+        )
+        resp.headers["Content-Disposition"] = f'inline; filename="{os.path.basename(f.path)}"'
         return resp
 
     if f.content_md is not None:
@@ -517,9 +742,9 @@ def update_file(file_id: str, body: FileCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail={"code": "NOT_FOUND"})
     old_title = f.title
     old_path = f.path
-    old_front_matter = dict(f.front_matter or {})
     old_tags = set(f.tags or [])
-    old_signature = build_metadata_signature(old_front_matter)
+    old_signature = f.listing_fields()["metadata_signature"]
+    stats_before = file_stats_entry(f)
     f.path = body.path
     f.title = body.title or f.title
     prepared = prepare_front_matter(body.content_md, body.front_matter, body.tags)
@@ -529,39 +754,49 @@ def update_file(file_id: str, body: FileCreate, db: Session = Depends(get_db)):
     f.content_md = prepared.content
     f.rendered_html = render_markdown(prepared.body or prepared.content)
     f.tags = prepared.tags
-    db.add(f)
-    db.commit()
-    db.refresh(f)
-    # update disk
     project = db.get(Project, f.project_id)
     proj_dir = os.path.join(settings.data_dir, "projects", project.slug)
     abs_path = safe_join(proj_dir, "files", body.path)
-    os.makedirs(os.path.dirname(abs_path), exist_ok=True)
-    with open(abs_path, "w") as fh:
-        fh.write(prepared.content)
+
+    # One transaction for the row, stats, tree index, search index, links and events;
+    # disk mirror and Redis fan-out are queued until it commits
+    uow = UnitOfWork(db)
+    db.add(f)
+    db.flush()
+    apply_file_change(
+        db, f.project_id, added=file_stats_entry(f), removed=stats_before, content=prepared.content
+    )
+    apply_file_paths(db, f.project_id, removed=stats_before.path, added=f.path)
+    index_file(
+        db.connection(),
+        f.id,
+        build_search_blob(f.title, prepared.body, prepared.front_matter),
+        title=f.title,
+        path=f.path,
+    )
+    upsert_links(db, f.project_id, f, prepared.body, commit=False)
+    relink_file(db, f.project_id, f.id, f.title, old_title=old_title)
+    # rewrite links if title changed
+    if body.rewrite_links and old_title and f.title != old_title:
+        rewrite_wikilinks(db, f.project_id, old_title, f.title, commit=False)
+    uow.write_file(abs_path, prepared.content)
     # remove old on-disk file if path changed
     if old_path and old_path != body.path:
         try:
             old_abs = safe_join(proj_dir, "files", old_path)
-            if os.path.isfile(old_abs) and old_abs != abs_path:
-                os.remove(old_abs)
+            if old_abs != abs_path:
+                uow.remove_file(old_abs)
         except Exception:
             pass
-    # index
-    with engine.begin() as conn:
-        index_file(conn, f.id, _build_search_blob(f.title, prepared.body, prepared.front_matter), title=f.title, path=f.path)
-    # links
-    upsert_links(db, f.project_id, f, prepared.body)
-    # rewrite links if title changed
-    if body.rewrite_links and old_title and f.title != old_title:
-        rewrite_wikilinks(db, f.project_id, old_title, f.title)
     tag_lookup: dict[str, Tag] = {}
     if f.tags:
         slug_set = {slugify(tag) for tag in f.tags if isinstance(tag, str)}
         rows = db.scalars(select(Tag).where(Tag.slug.in_(slug_set))).all()
         tag_lookup = {row.slug: row for row in rows}
     serialized = _serialize_file(f, tag_lookup, project=project)
-    serialized_dict = serialized.model_dump() if hasattr(serialized, "model_dump") else serialized.dict()
+    serialized_dict = (
+        serialized.model_dump() if hasattr(serialized, "model_dump") else serialized.dict()
+    )
     metadata_fields_payload = serialized_dict.get("metadata_fields", [])
     metadata_signature = serialized_dict.get("metadata_signature")
     tags_payload = serialized_dict.get("tags", [])
@@ -579,41 +814,32 @@ def update_file(file_id: str, body: FileCreate, db: Session = Depends(get_db)):
         payload["old_path"] = old_path
     if old_signature != metadata_signature:
         payload["metadata_changed"] = True
-    try:
-        publish_event(f.project_id, "file.updated", payload)
-    except Exception:
-        pass
+    uow.publish(f.project_id, "file.updated", payload)
 
     new_tags = set(tags_payload)
     if new_tags != old_tags:
-        try:
-            publish_event(
-                f.project_id,
-                "file.tagged",
-                {
-                    "file_id": f.id,
-                    "tags": tags_payload,
-                    "added": sorted(new_tags - old_tags),
-                    "removed": sorted(old_tags - new_tags),
-                },
-            )
-        except Exception:
-            pass
+        uow.publish(
+            f.project_id,
+            "file.tagged",
+            {
+                "file_id": f.id,
+                "tags": tags_payload,
+                "added": sorted(new_tags - old_tags),
+                "removed": sorted(old_tags - new_tags),
+            },
+        )
 
     if old_title and f.title != old_title:
-        try:
-            publish_event(
-                f.project_id,
-                "file.renamed",
-                {
-                    "file_id": f.id,
-                    "from": old_title,
-                    "to": f.title,
-                },
-            )
-        except Exception:
-            pass
-
+        uow.publish(
+            f.project_id,
+            "file.renamed",
+            {
+                "file_id": f.id,
+                "from": old_title,
+                "to": f.title,
+            },
+        )
+    uow.commit()
     return serialized
 
 
@@ -624,14 +850,21 @@ def get_backlinks(file_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail={"code": "NOT_FOUND"})
     # Backlinks: direct matches by target_file_id OR unresolved titles matching this file's title
     from ..models import Link
-    src_ids = [
-        l.src_file_id
-        for l in db.query(Link).filter(
-            (Link.project_id == f.project_id)
-            & ((Link.target_file_id == f.id) | ((Link.target_file_id.is_(None)) & (Link.target_title == f.title)))
-        ).all()
-    ]
-    rows = db.query(File).filter(File.id.in_(src_ids)).all()
+
+    src_ids = select(Link.src_file_id).where(
+        (Link.project_id == f.project_id)
+        & (
+            (Link.target_file_id == f.id)
+            | ((Link.target_file_id.is_(None)) & (Link.target_title == f.title))
+        )
+    )
+    # FileRead carries both bodies; load them with the rows instead of one query per row
+    rows = (
+        db.query(File)
+        .options(undefer(File.content_md), undefer(File.rendered_html))
+        .filter(File.id.in_(src_ids))
+        .all()
+    )
     return rows
 
 
@@ -644,6 +877,153 @@ def get_outgoing_links(file_id: str, db: Session = Depends(get_db)):
     return [LinkInfo(**l) for l in links]
 
 
+@router.post("/batch/move", response_model=FilesBatchMoveResult)
+def batch_move(body: FilesBatchMoveRequest, db: Session = Depends(get_db)):
+    """Apply directory and file moves in one transaction.
+
+    Each item runs in a savepoint: one that fails is reported in ``failures`` and leaves no
+    rows behind, while the others still commit together. Directory moves go through the
+    set-based prefix engine (services.bulk_move), so their cost is a handful of statements
+    regardless of how many files they hold. Disk moves are queued behind the commit, and each
+    touched project gets one ``files.batch_moved`` event.
+    """
+    failures: list[str] = []
+    moved_files: list[FileMovePreview] = []
+    moved_dirs: list[DirectoryChange] = []
+    touched_projects: set[str] = set()
+    uow = UnitOfWork(db)
+
+    # Handle directory moves first
+    for i, d in enumerate(body.dirs or []):
+        try:
+            from_pid = d.get("from_project_id") or ""
+            to_pid = d.get("to_project_id") or from_pid
+            old_path = d.get("path") or ""
+            new_path = d.get("new_path") or ""
+            if not from_pid or not old_path or not new_path:
+                failures.append(f"dir[{i}]: missing fields")
+                continue
+            if any(seg in old_path for seg in ["..", "\\", ":"]) or any(
+                seg in new_path for seg in ["..", "\\", ":"]
+            ):
+                failures.append(f"dir[{i}]: bad path")
+                continue
+            from_proj = db.get(Project, from_pid)
+            to_proj = db.get(Project, to_pid)
+            if not from_proj or not to_proj:
+                failures.append(f"dir[{i}]: project not found")
+                continue
+            old_norm = normalize_dir_path(old_path)
+            new_norm = normalize_dir_path(new_path)
+            if from_pid == to_pid and is_within(new_norm, old_norm):
+                failures.append(f"dir[{i}]: cannot move a directory into itself")
+                continue
+
+            plan = plan_prefix_move(db, from_pid, old_norm, new_norm, to_pid)
+            previews = [
+                FileMovePreview(file_id=fid, old_path=old, new_path=new)
+                for fid, old, new in plan.file_moves
+            ]
+            if not body.dry_run:
+                from_dir = os.path.join(settings.data_dir, "projects", from_proj.slug)
+                to_dir = os.path.join(settings.data_dir, "projects", to_proj.slug)
+                old_abs = safe_join(from_dir, "files", old_norm)
+                new_abs = safe_join(to_dir, "files", new_norm)
+                with uow.savepoint():
+                    apply_prefix_move(db, plan)
+                    uow.move_dir(old_abs, new_abs)
+                touched_projects.update({from_pid, to_pid})
+            moved_dirs.append(DirectoryChange(old_path=old_norm, new_path=new_norm))
+            moved_files.extend(previews)
+        except Exception as e:
+            failures.append(f"dir[{i}]: {getattr(e, 'detail', str(e))}")
+
+    # Handle individual file moves
+    reindex: list[File] = []
+    for i, it in enumerate(body.files or []):
+        try:
+            fid = it.get("file_id")
+            new_path = it.get("new_path")
+            to_pid = it.get("to_project_id")
+            if not fid or not new_path:
+                failures.append(f"file[{i}]: missing fields")
+                continue
+            if any(seg in new_path for seg in ["..", "\\", ":"]):
+                failures.append(f"file[{i}]: bad path")
+                continue
+            fobj = db.get(File, fid)
+            if not fobj:
+                failures.append(f"file[{i}]: not found")
+                continue
+            dest_pid = to_pid or fobj.project_id
+            from_proj = db.get(Project, fobj.project_id)
+            to_proj = db.get(Project, dest_pid)
+            if not from_proj or not to_proj:
+                failures.append(f"file[{i}]: project not found")
+                continue
+            oldp = fobj.path
+            newp = "/".join([seg for seg in new_path.split("/") if seg])
+            preview = FileMovePreview(file_id=fobj.id, old_path=oldp, new_path=newp)
+            if body.dry_run:
+                moved_files.append(preview)
+                continue
+
+            base_from = os.path.join(settings.data_dir, "projects", from_proj.slug)
+            base_to = os.path.join(settings.data_dir, "projects", to_proj.slug)
+            old_abs = safe_join(base_from, "files", oldp)
+            new_abs = safe_join(base_to, "files", newp)
+            source_pid = fobj.project_id
+            with uow.savepoint():
+                uow.move_file(old_abs, new_abs, fobj.content_md)
+                stats_before = file_stats_entry(fobj)
+                fobj.project_id = dest_pid
+                fobj.path = newp
+                db.add(fobj)
+                db.flush()
+                apply_file_move(db, source_pid, stats_before, dest_pid, file_stats_entry(fobj))
+                move_file_path(db, source_pid, stats_before.path, dest_pid, fobj.path)
+                if dest_pid != source_pid:
+                    stage_invalidate(db, source_pid, dest_pid)
+            reindex.append(fobj)
+            touched_projects.update({source_pid, dest_pid})
+            moved_files.append(preview)
+        except Exception as e:
+            failures.append(f"file[{i}]: {getattr(e, 'detail', str(e))}")
+
+    if reindex:
+        index_files(
+            db.connection(),
+            [
+                (
+                    fobj.id,
+                    build_search_blob(
+                        fobj.title, strip_front_matter(fobj.content_md or ""), fobj.front_matter
+                    ),
+                    fobj.title,
+                    fobj.path,
+                )
+                for fobj in reindex
+            ],
+        )
+        sync_link_sources(db, [fobj.id for fobj in reindex])
+
+    if not body.dry_run:
+        for pid in sorted(touched_projects):
+            uow.publish(
+                pid, "files.batch_moved", {"files": len(moved_files), "dirs": len(moved_dirs)}
+            )
+        uow.commit()
+
+    return FilesBatchMoveResult(
+        applied=not body.dry_run,
+        moved_files=moved_files,
+        moved_dirs=moved_dirs,
+        failures=failures,
+        files_count=len(moved_files),
+        dirs_count=len(moved_dirs),
+    )
+
+
 @router.post("/{file_id}/move", response_model=MoveFileApplyResult | MoveFileDryRunResult)
 def move_file(file_id: str, body: MoveFileRequest, db: Session = Depends(get_db)):
     f = db.get(File, file_id)
@@ -664,13 +1044,11 @@ def move_file(file_id: str, body: MoveFileRequest, db: Session = Depends(get_db)
     if body.new_title and body.new_title != f.title:
         title_change = {"from": f.title, "to": body.new_title}
 
-    # Compute files to rewrite if title changes
+    # Files to rewrite if the title changes, found through the links table
     rewrite_files: list[File] = []
     rewrite_count = 0
     if title_change and body.update_links:
-        like = f"%[[{f.title}]]%"
-        rewrite_files = db.query(File).filter(File.project_id == f.project_id, File.content_md.like(like)).all()
-        rewrite_files = [x for x in rewrite_files if x.id != f.id]
+        rewrite_files = [x for x in referencing_files(db, f.project_id, [f.title]) if x.id != f.id]
         rewrite_count = len(rewrite_files)
 
     if body.dry_run:
@@ -684,58 +1062,45 @@ def move_file(file_id: str, body: MoveFileRequest, db: Session = Depends(get_db)
             applied=False,
         )
 
-    # Apply move/rename
+    # Apply move/rename in one transaction; the on-disk move runs after commit
+    uow = UnitOfWork(db)
+    stats_before = file_stats_entry(f)
     if body.new_title:
         f.title = body.new_title
     proj_dir = os.path.join(settings.data_dir, "projects", project.slug)
     old_abs = safe_join(proj_dir, "files", f.path)
     new_abs = safe_join(proj_dir, "files", new_path)
     if will_move:
-        os.makedirs(os.path.dirname(new_abs), exist_ok=True)
-        try:
-            if os.path.isfile(old_abs):
-                shutil.move(old_abs, new_abs)
-            else:
-                with open(new_abs, "w") as fh:
-                    fh.write(f.content_md)
-        except Exception:
-            with open(new_abs, "w") as fh:
-                fh.write(f.content_md)
+        uow.move_file(old_abs, new_abs, f.content_md)
     f.path = new_path
     f.rendered_html = render_markdown(f.content_md)
     db.add(f)
-    db.commit()
-    db.refresh(f)
-
-    with engine.begin() as conn:
-        index_file(conn, f.id, f"{f.title}\n{f.content_md}")
-    upsert_links(db, f.project_id, f, f.content_md)
+    db.flush()
+    apply_file_change(
+        db, f.project_id, added=file_stats_entry(f), removed=stats_before, content=f.content_md
+    )
+    apply_file_paths(db, f.project_id, removed=stats_before.path, added=f.path)
+    index_file(db.connection(), f.id, f"{f.title}\n{f.content_md}")
+    upsert_links(db, f.project_id, f, f.content_md, commit=False)
+    if title_change:
+        relink_file(db, f.project_id, f.id, f.title, old_title=title_change["from"])
 
     if title_change and body.update_links and rewrite_files:
-        old_t = title_change["from"]
-        new_t = title_change["to"]
-        for rf in rewrite_files:
-            rf.content_md = rf.content_md.replace(f"[[{old_t}]]", f"[[{new_t}]]")
-            rf.rendered_html = render_markdown(rf.content_md)
-            db.add(rf)
-            db.commit()
-            db.refresh(rf)
-            with engine.begin() as conn:
-                index_file(conn, rf.id, f"{rf.title}\n{rf.content_md}", title=rf.title, path=rf.path)
-            upsert_links(db, rf.project_id, rf, rf.content_md)
-
-    if will_move:
-        try:
-            if os.path.isfile(old_abs) and old_abs != new_abs:
-                os.remove(old_abs)
-        except Exception:
-            pass
+        rewrite_wikilinks_many(
+            db,
+            f.project_id,
+            {title_change["from"]: title_change["to"]},
+            commit=False,
+            sources=rewrite_files,
+        )
 
     # Emit event
-    try:
-        publish_event(f.project_id, "file.moved", {"file_id": f.id, "old_path": old_path_val, "new_path": new_path})
-    except Exception:
-        pass
+    uow.publish(
+        f.project_id,
+        "file.moved",
+        {"file_id": f.id, "old_path": old_path_val, "new_path": new_path},
+    )
+    uow.commit()
 
     return MoveFileApplyResult(
         will_move=will_move,
@@ -757,249 +1122,30 @@ def delete_file(file_id: str, db: Session = Depends(get_db)):
     project_id = f.project_id
     path = f.path
     title = f.title
-    # remove on-disk file if present
+    stats_before = file_stats_entry(f)
+    uow = UnitOfWork(db)
+    # remove on-disk file if present (after commit)
     try:
         project = db.get(Project, f.project_id)
         if project:
             proj_dir = os.path.join(settings.data_dir, "projects", project.slug)
-            abs_path = safe_join(proj_dir, "files", f.path)
-            if os.path.isfile(abs_path):
-                os.remove(abs_path)
+            uow.remove_file(safe_join(proj_dir, "files", f.path))
     except Exception:
         # best-effort removal; continue with DB deletion
         pass
+    drop_file_links(db, file_id)
     db.delete(f)
-    db.commit()
-    with engine.begin() as conn:
-        conn.execute(text("DELETE FROM search_index WHERE file_id = :fid"), {"fid": file_id})
-    try:
-        publish_event(
-            project_id,
-            "file.deleted",
-            {
-                "file_id": file_id,
-                "path": path,
-                "title": title,
-            },
-        )
-    except Exception:
-        pass
-    return
-
-
-@router.post("/batch/move", response_model=FilesBatchMoveResult)
-def batch_move(body: FilesBatchMoveRequest, db: Session = Depends(get_db)):
-    failures: list[str] = []
-    moved_files: list[FileMovePreview] = []
-    moved_dirs: list[DirectoryChange] = []
-
-    # Handle directory moves first
-    for i, d in enumerate(body.dirs or []):
-        try:
-            from_pid = d.get("from_project_id") or ""
-            to_pid = d.get("to_project_id") or from_pid
-            old_path = d.get("path") or ""
-            new_path = d.get("new_path") or ""
-            if not from_pid or not old_path or not new_path:
-                failures.append(f"dir[{i}]: missing fields")
-                continue
-            if any(seg in old_path for seg in ["..", "\\", ":"]) or any(seg in new_path for seg in ["..", "\\", ":"]):
-                failures.append(f"dir[{i}]: bad path")
-                continue
-            from_proj = db.get(Project, from_pid)
-            to_proj = db.get(Project, to_pid)
-            if not from_proj or not to_proj:
-                failures.append(f"dir[{i}]: project not found")
-                continue
-            old_norm = "/".join([seg for seg in old_path.split("/") if seg])
-            new_norm = "/".join([seg for seg in new_path.split("/") if seg])
-
-            # Collect affected files
-            files = db.scalars(select(File).where(File.project_id == from_pid)).all()
-            affected = [f for f in files if f.path == old_norm or f.path.startswith(old_norm + "/")]
-            previews: list[FileMovePreview] = []
-            for f in affected:
-                suffix = f.path[len(old_norm) :]
-                if suffix.startswith("/"):
-                    suffix = suffix[1:]
-                newp = new_norm if not suffix else f"{new_norm}/{suffix}"
-                previews.append(FileMovePreview(file_id=f.id, old_path=f.path, new_path=newp))
-
-            # Dry run mode
-            if body.dry_run:
-                moved_dirs.append(DirectoryChange(old_path=old_norm, new_path=new_norm))
-                moved_files.extend(previews)
-                continue
-
-            # Apply on-disk move if same project; else ensure folders and move file-by-file
-            if from_pid == to_pid:
-                from_dir = os.path.join(settings.data_dir, "projects", from_proj.slug)
-                old_abs = safe_join(from_dir, "files", old_norm)
-                new_abs = safe_join(from_dir, "files", new_norm)
-                try:
-                    if os.path.isdir(old_abs):
-                        os.makedirs(os.path.dirname(new_abs), exist_ok=True)
-                        shutil.move(old_abs, new_abs)
-                    else:
-                        os.makedirs(new_abs, exist_ok=True)
-                except Exception:
-                    os.makedirs(new_abs, exist_ok=True)
-            else:
-                from_dir = os.path.join(settings.data_dir, "projects", from_proj.slug)
-                to_dir = os.path.join(settings.data_dir, "projects", to_proj.slug)
-                for pv in previews:
-                    src = safe_join(from_dir, "files", pv.old_path)
-                    dst = safe_join(to_dir, "files", pv.new_path)
-                    os.makedirs(os.path.dirname(dst), exist_ok=True)
-                    try:
-                        if os.path.isfile(src):
-                            shutil.move(src, dst)
-                    except Exception:
-                        # fallback: write from DB content
-                        fobj = db.get(File, pv.file_id)
-                        if fobj:
-                            with open(dst, "w") as fh:
-                                fh.write(fobj.content_md)
-
-            # Update DB for directories (same-project only for persisted directories)
-            if from_pid == to_pid:
-                dirs = db.scalars(select(Directory).where(Directory.project_id == from_pid)).all()
-                for drow in dirs:
-                    if drow.path == old_norm or drow.path.startswith(old_norm + "/"):
-                        suffix = drow.path[len(old_norm) :]
-                        if suffix.startswith("/"):
-                            suffix = suffix[1:]
-                        drow.path = new_norm if not suffix else f"{new_norm}/{suffix}"
-                        drow.name = drow.path.split("/")[-1]
-                        db.add(drow)
-                db.commit()
-            else:
-                # Move directory records across projects: replicate structure under dest
-                dirs = db.scalars(select(Directory).where(Directory.project_id == from_pid)).all()
-                for drow in dirs:
-                    if drow.path == old_norm or drow.path.startswith(old_norm + "/"):
-                        suffix = drow.path[len(old_norm) :]
-                        if suffix.startswith("/"):
-                            suffix = suffix[1:]
-                        newp = new_norm if not suffix else f"{new_norm}/{suffix}"
-                        db.add(Directory(project_id=to_pid, path=newp, name=(newp.split("/")[-1])))
-                # Remove originals
-                db.query(Directory).filter(Directory.project_id == from_pid, Directory.path.like(old_norm + "%")).delete(synchronize_session=False)
-                db.commit()
-
-            # Update DB for files
-            for pv in previews:
-                fobj = db.get(File, pv.file_id)
-                if not fobj:
-                    continue
-                if from_pid != to_pid:
-                    fobj.project_id = to_pid
-                fobj.path = pv.new_path
-                db.add(fobj)
-                db.commit()
-                db.refresh(fobj)
-                # reindex
-                try:
-                    with engine.begin() as conn:
-                        index_file(conn, fobj.id, f"{fobj.title}\n{fobj.content_md}", title=fobj.title, path=fobj.path)
-                except Exception:
-                    pass
-
-            moved_dirs.append(DirectoryChange(old_path=old_norm, new_path=new_norm))
-            moved_files.extend(previews)
-        except Exception as e:
-            failures.append(f"dir[{i}]: {getattr(e, 'detail', str(e))}")
-
-    # Handle individual file moves
-    for i, it in enumerate(body.files or []):
-        try:
-            fid = it.get("file_id")
-            new_path = it.get("new_path")
-            to_pid = it.get("to_project_id")
-            if not fid or not new_path:
-                failures.append(f"file[{i}]: missing fields")
-                continue
-            if any(seg in new_path for seg in ["..", "\\", ":"]):
-                failures.append(f"file[{i}]: bad path")
-                continue
-            fobj = db.get(File, fid)
-            if not fobj:
-                failures.append(f"file[{i}]: not found")
-                continue
-            dest_pid = to_pid or fobj.project_id
-            from_proj = db.get(Project, fobj.project_id)
-            to_proj = db.get(Project, dest_pid)
-            if not from_proj or not to_proj:
-                failures.append(f"file[{i}]: project not found")
-                continue
-            oldp = fobj.path
-            newp = "/".join([seg for seg in new_path.split("/") if seg])
-            preview = FileMovePreview(file_id=fobj.id, old_path=oldp, new_path=newp)
-            if body.dry_run:
-                moved_files.append(preview)
-                continue
-
-            # Move on disk
-            if fobj.project_id == dest_pid:
-                base = os.path.join(settings.data_dir, "projects", from_proj.slug)
-                src = safe_join(base, "files", oldp)
-                dst = safe_join(base, "files", newp)
-            else:
-                base_from = os.path.join(settings.data_dir, "projects", from_proj.slug)
-                base_to = os.path.join(settings.data_dir, "projects", to_proj.slug)
-                src = safe_join(base_from, "files", oldp)
-                dst = safe_join(base_to, "files", newp)
-            os.makedirs(os.path.dirname(dst), exist_ok=True)
-            try:
-                if os.path.isfile(src):
-                    shutil.move(src, dst)
-                else:
-                    # write from DB content if file missing
-                    with open(dst, "w") as fh:
-                        fh.write(fobj.content_md)
-            except Exception:
-                with open(dst, "w") as fh:
-                    fh.write(fobj.content_md)
-
-            # Update DB
-            if fobj.project_id != dest_pid:
-                fobj.project_id = dest_pid
-            fobj.path = newp
-            db.add(fobj)
-            db.commit()
-            db.refresh(fobj)
-            # reindex
-            try:
-                with engine.begin() as conn:
-                    index_file(conn, fobj.id, f"{fobj.title}\n{fobj.content_md}", title=fobj.title, path=fobj.path)
-            except Exception:
-                pass
-
-            moved_files.append(preview)
-        except Exception as e:
-            failures.append(f"file[{i}]: {getattr(e, 'detail', str(e))}")
-
-    # Publish a single batch event
-    total_dirs = len(moved_dirs)
-    total_files = len(moved_files)
-    if total_dirs or total_files:
-        # If mixed projects, project_id in payload is ambiguous; emit for each encountered project for visibility
-        project_ids: set[str] = set()
-        for mv in moved_files:
-            fobj = db.get(File, mv.file_id)
-            if fobj:
-                project_ids.add(fobj.project_id)
-        for pid in project_ids or {""}:
-            try:
-                publish_event(pid, "files.batch_moved", {"files": total_files, "dirs": total_dirs})
-            except Exception:
-                pass
-
-    return FilesBatchMoveResult(
-        applied=not body.dry_run,
-        moved_files=moved_files,
-        moved_dirs=moved_dirs,
-        failures=failures,
-        files_count=len(moved_files),
-        dirs_count=len(moved_dirs),
+    apply_file_change(db, project_id, removed=stats_before)
+    apply_file_paths(db, project_id, removed=path)
+    remove_from_index(db.connection(), file_id)
+    uow.publish(
+        project_id,
+        "file.deleted",
+        {
+            "file_id": file_id,
+            "path": path,
+            "title": title,
+        },
     )
+    uow.commit()
+    return
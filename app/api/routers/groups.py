@@ -1,22 +1,23 @@
 from __future__ import annotations
 
-from typing import List
 import re
+from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from ..db import SessionLocal
+from ..db import SessionLocal, engine
 from ..models import Project, ProjectGroup, ProjectGroupMembership
 from ..schemas import (
+    GroupAssignRequest,
     ProjectGroupCreate,
     ProjectGroupRead,
     ProjectGroupUpdate,
     ProjectGroupWithProjects,
-    GroupAssignRequest,
     ProjectRead,
 )
+from ..search import index_group_projects, index_project
 from ..settings import settings
 
 
@@ -107,6 +108,9 @@ def update_group(group_id: str, body: ProjectGroupUpdate, db: Session = Depends(
     db.add(g)
     db.commit()
     db.refresh(g)
+    if body.name is not None:
+        with engine.begin() as conn:
+            index_group_projects(conn, g.id)
     return g
 
 
@@ -116,9 +120,21 @@ def delete_group(group_id: str, db: Session = Depends(get_db)):
     if not g:
         return
     # Delete memberships in this group
-    db.query(ProjectGroupMembership).filter(ProjectGroupMembership.group_id == group_id).delete(synchronize_session=False)
+    member_ids = list(
+        db.scalars(
+            select(ProjectGroupMembership.project_id).where(
+                ProjectGroupMembership.group_id == group_id
+            )
+        ).all()
+    )
+    db.query(ProjectGroupMembership).filter(ProjectGroupMembership.group_id == group_id).delete(
+        synchronize_session=False
+    )
     db.delete(g)
     db.commit()
+    with engine.begin() as conn:
+        for pid in member_ids:
+            index_project(conn, pid)
     return
 
 
@@ -126,18 +142,26 @@ def delete_group(group_id: str, db: Session = Depends(get_db)):
 def assign_to_group(group_id: str, body: GroupAssignRequest, db: Session = Depends(get_db)):
     g = db.get(ProjectGroup, group_id)
     if not g:
-        raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "Group not found"})
+        raise HTTPException(
+            status_code=404, detail={"code": "NOT_FOUND", "message": "Group not found"}
+        )
     p = db.get(Project, body.project_id)
     if not p:
-        raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "Project not found"})
+        raise HTTPException(
+            status_code=404, detail={"code": "NOT_FOUND", "message": "Project not found"}
+        )
     # Remove existing membership for project (unique constraint ensures single group)
-    existing = db.scalar(select(ProjectGroupMembership).where(ProjectGroupMembership.project_id == p.id))
+    existing = db.scalar(
+        select(ProjectGroupMembership).where(ProjectGroupMembership.project_id == p.id)
+    )
     if existing:
         db.delete(existing)
         db.flush()
     # Determine position
     mems = db.scalars(
-        select(ProjectGroupMembership).where(ProjectGroupMembership.group_id == group_id).order_by(ProjectGroupMembership.sort_order)
+        select(ProjectGroupMembership)
+        .where(ProjectGroupMembership.group_id == group_id)
+        .order_by(ProjectGroupMembership.sort_order)
     ).all()
     if body.position is None or body.position < 0 or body.position > len(mems):
         position = len(mems)
@@ -152,14 +176,20 @@ def assign_to_group(group_id: str, body: GroupAssignRequest, db: Session = Depen
     newm = ProjectGroupMembership(project_id=p.id, group_id=g.id, sort_order=position)
     db.add(newm)
     db.commit()
+    with engine.begin() as conn:
+        index_project(conn, p.id)
     return
 
 
 @router.delete("/assign/{project_id}", status_code=204)
 def unassign_project(project_id: str, db: Session = Depends(get_db)):
-    m = db.scalar(select(ProjectGroupMembership).where(ProjectGroupMembership.project_id == project_id))
+    m = db.scalar(
+        select(ProjectGroupMembership).where(ProjectGroupMembership.project_id == project_id)
+    )
     if not m:
         return
     db.delete(m)
     db.commit()
+    with engine.begin() as conn:
+        index_project(conn, project_id)
     return
@@ -13,12 +13,13 @@ from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 
-from ..db import SessionLocal
+from ..app_logging import get_logger
+from ..db import SessionLocal, engine
 from ..models import Project
-from ..schemas import ProjectExportRequest, JobEnqueueResponse
+from ..schemas import JobEnqueueResponse, ProjectExportRequest
+from ..search import index_project
+from ..services.unit_of_work import flush_post_commit
 from ..settings import settings
-from ..app_logging import get_logger
-
 
 router = APIRouter(prefix="/projects", tags=["import_export"])
 logger = get_logger(component="import_export.api")
@@ -59,6 +60,8 @@ async def import_project(
         db.refresh(p)
         pid = p.id
         created_project = True
+        with engine.begin() as conn:
+            index_project(conn, pid)
         # Ensure folders
         proj_dir = os.path.join(settings.data_dir, "projects", p.slug)
         os.makedirs(os.path.join(proj_dir, "files"), exist_ok=True)
@@ -158,6 +161,8 @@ def export_project(project_id: str, body: ProjectExportRequest, db: Session = De
     if not p:
         raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "Project"})
     q = _rq()
+    # both exports read the files mirror; let queued writes land first
+    flush_post_commit()
     if body.mode == "json":
         job = q.enqueue(
             "worker.jobs.import_export_jobs.export_json",
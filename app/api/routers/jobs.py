@@ -8,7 +8,6 @@ from fastapi import APIRouter, HTTPException
 
 from ..settings import settings
 
-
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
 
@@ -30,6 +29,8 @@ def get_job(job_id: str) -> dict[str, Any]:
         "started_at": job.started_at.isoformat() if job.started_at else None,
         "ended_at": job.ended_at.isoformat() if job.ended_at else None,
     }
+    if job.meta.get("progress"):
+        data["progress"] = job.meta["progress"]
     if job.is_finished and job.result is not None:
         data["result"] = job.result
     if job.is_failed and job.exc_info:
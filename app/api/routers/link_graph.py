@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..db import SessionLocal
+from ..models import File, Project
+from ..schemas import LinkGraphEdge, LinkGraphNeighborhood, LinkGraphNode, LinkGraphNodeList
+from ..services.link_graph import get_graph, invalidate_graph
+
+router = APIRouter(prefix="/projects", tags=["links"])
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _require_project(db: Session, project_id: str) -> None:
+    if not db.get(Project, project_id):
+        raise HTTPException(
+            status_code=404, detail={"code": "NOT_FOUND", "message": "Project not found"}
+        )
+
+
+# Ids per IN list, well below SQLite's bound variable limit (999 on older builds)
+_META_CHUNK = 500
+
+
+def _file_meta(db: Session, file_ids: list[str]) -> dict[str, tuple[str, str]]:
+    meta: dict[str, tuple[str, str]] = {}
+    for start in range(0, len(file_ids), _META_CHUNK):
+        chunk = file_ids[start : start + _META_CHUNK]
+        rows = db.execute(select(File.id, File.title, File.path).where(File.id.in_(chunk))).all()
+        meta.update((fid, (title, path)) for fid, title, path in rows)
+    return meta
+
+
+@router.get("/{project_id}/graph/neighborhood", response_model=LinkGraphNeighborhood)
+def graph_neighborhood(
+    project_id: str,
+    file_id: str,
+    depth: int = Query(1, ge=1, le=5),
+    direction: Literal["out", "in", "both"] = "both",
+    limit: int = Query(200, ge=1, le=2000),
+    db: Session = Depends(get_db),
+):
+    """Files within ``depth`` wikilink hops of ``file_id``, with the links between them."""
+    _require_project(db, project_id)
+    graph = get_graph(db, project_id)
+    if file_id not in graph.index:
+        # Created by another process since the graph was built, or not in this project at all
+        if (
+            db.scalar(select(File.id).where(File.id == file_id, File.project_id == project_id))
+            is None
+        ):
+            raise HTTPException(
+                status_code=404, detail={"code": "NOT_FOUND", "message": "File not found"}
+            )
+        invalidate_graph(project_id)
+        graph = get_graph(db, project_id)
+    hops, edges, truncated = graph.neighborhood(file_id, depth, direction, limit)
+    meta = _file_meta(db, list(hops))
+    nodes = [
+        LinkGraphNode(file_id=fid, title=meta[fid][0], path=meta[fid][1], distance=distance)
+        for fid, distance in sorted(
+            hops.items(), key=lambda item: (item[1], meta.get(item[0], ("", ""))[1])
+        )
+        if fid in meta
+    ]
+    return LinkGraphNeighborhood(
+        file_id=file_id,
+        depth=depth,
+        direction=direction,
+        nodes=nodes,
+        edges=[
+            LinkGraphEdge(src_file_id=src, target_file_id=dst)
+            for src, dst in edges
+            if src in meta and dst in meta
+        ],
+        truncated=truncated,
+    )
+
+
+@router.get("/{project_id}/graph/orphans", response_model=LinkGraphNodeList)
+def graph_orphans(
+    project_id: str,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+):
+    """Files that neither link to nor are linked from another file in the project."""
+    _require_project(db, project_id)
+    orphan_ids = get_graph(db, project_id).orphans()
+    meta = _file_meta(db, orphan_ids)
+    ordered = sorted((fid for fid in orphan_ids if fid in meta), key=lambda fid: meta[fid][1])
+    items = [
+        LinkGraphNode(file_id=fid, title=meta[fid][0], path=meta[fid][1], in_degree=0)
+        for fid in ordered[offset : offset + limit]
+    ]
+    return LinkGraphNodeList(items=items, total=len(ordered))
+
+
+@router.get("/{project_id}/graph/most-linked", response_model=LinkGraphNodeList)
+def graph_most_linked(
+    project_id: str,
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+):
+    """Files ranked by how many other files link to them."""
+    _require_project(db, project_id)
+    ranked = get_graph(db, project_id).most_linked(limit)
+    meta = _file_meta(db, [fid for fid, _ in ranked])
+    items = [
+        LinkGraphNode(file_id=fid, title=meta[fid][0], path=meta[fid][1], in_degree=count)
+        for fid, count in ranked
+        if fid in meta
+    ]
+    return LinkGraphNodeList(items=items, total=len(items))
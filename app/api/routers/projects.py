@@ -1,55 +1,81 @@
 from __future__ import annotations
 
+import base64
+import datetime as dt
+import hashlib
 import json
-import os
 import mimetypes
-import hashlib
-import datetime as dt
+import os
+import shutil
 from email.utils import format_datetime
-from threading import Lock
 from typing import Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.responses import FileResponse
-from sqlalchemy import select, text
-from sqlalchemy.orm import Session
+from sqlalchemy import func, or_, select, text, true, tuple_
+from sqlalchemy.orm import Session, undefer
 
 from ..db import SessionLocal, engine
-from ..models import Project, File, ArtifactRepo, Bundle, User, Tag, Directory, Event, ProjectGroup, ProjectGroupMembership
+from ..git_ops import GitError, head_sha, repo_history
+from ..models import (
+    Activity,
+    ArtifactRepo,
+    Bundle,
+    Directory,
+    File,
+    Project,
+    ProjectGroup,
+    ProjectGroupMembership,
+    ProjectStats,
+    ProjectTreeDir,
+    Tag,
+    User,
+    project_tags_table,
+)
 from ..schemas import (
-    ProjectCreate,
-    ProjectUpdate,
-    ProjectRead,
-    ProjectCardRead,
+    DirectoryListItem,
+    FileRead,
+    ProjectActivityEntry,
+    ProjectActivityResponse,
+    ProjectCardHighlight,
     ProjectCardLanguageStat,
     ProjectCardOwner,
+    ProjectCardRead,
     ProjectCardTag,
-    ProjectCardHighlight,
+    ProjectCreate,
+    ProjectGroupRead,
     ProjectListResponse,
-    FileRead,
-    ProjectModalSummary,
     ProjectModalQuickStat,
-    ProjectTreeResponse,
+    ProjectModalSummary,
+    ProjectRead,
     ProjectTreeNode,
+    ProjectTreeResponse,
+    ProjectUpdate,
     TagSummary,
-    ProjectActivityResponse,
-    ProjectActivityEntry,
-    ProjectGroupRead,
-    DirectoryListItem,
 )
-from ..settings import settings
-from ..utils import slugify, safe_join
-import shutil
-from ..services.tagging import get_project_tag_details, set_project_tags
-from ..services.frontmatter import (
-    build_tag_details,
-    extract_front_matter,
-    summarize_markdown,
-    build_metadata_fields,
-    build_metadata_signature,
+from ..search import index_project, match_file_paths, remove_from_index, remove_project_from_index
+from ..services.activity import (
+    activity_sources,
+    decode_activity_cursor,
+    encode_activity_cursor,
+    ingest_commits,
+    latest_activity,
+    list_activity,
+    resolve_type_filter,
 )
-from ..git_ops import repo_history, GitError
-
+from ..services.frontmatter import build_tag_details
+from ..services.modal_cache import (
+    ModalCacheEntry,
+    get_modal_entry,
+    invalidate_modal_entry,
+    store_modal_entry,
+)
+from ..services.project_stats import infer_language as _infer_language
+from ..services.project_stats import load_project_stats, sparkline_from_stats
+from ..services.tagging import get_project_tag_details, set_project_tags
+from ..services.tree_index import count_tree_dirs, ensure_tree_index, list_tree_dirs
+from ..settings import settings
+from ..utils import safe_join, slugify
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
@@ -62,35 +88,6 @@ def get_db():
         db.close()
 
 
-_MODAL_CACHE: Dict[str, Tuple[str, ProjectModalSummary, dt.datetime | None]] = {}
-_MODAL_CACHE_LOCK = Lock()
-
-_LANGUAGE_MAP = {
-    "md": "Markdown",
-    "markdown": "Markdown",
-    "py": "Python",
-    "ts": "TypeScript",
-    "tsx": "TypeScript",
-    "js": "JavaScript",
-    "jsx": "JavaScript",
-    "json": "JSON",
-    "yaml": "YAML",
-    "yml": "YAML",
-    "sh": "Shell",
-    "css": "CSS",
-    "scss": "CSS",
-    "html": "HTML",
-    "sql": "SQL",
-    "txt": "Text",
-    "rs": "Rust",
-    "go": "Go",
-    "java": "Java",
-    "kt": "Kotlin",
-    "swift": "Swift",
-    "c": "C",
-    "cpp": "C++",
-}
-
 _TEXT_EXTENSIONS = {
     "md",
     "markdown",
@@ -180,6 +177,8 @@ def _apply_project_update(project: Project, body: ProjectUpdate, db: Session) ->
     db.add(project)
     db.commit()
     db.refresh(project)
+    with engine.begin() as conn:
+        index_project(conn, project.id)
 
     group_map = _get_project_groups(db, [project.id])
     return _serialize_project_read(project, group_map.get(project.id))
@@ -201,9 +200,13 @@ def _http_datetime(value: dt.datetime | None) -> str | None:
     return format_datetime(dt_value, usegmt=True)
 
 
+def _modal_etag(signature: str) -> str:
+    return hashlib.md5(signature.encode("utf-8")).hexdigest()
+
+
 def _apply_cache_headers(response: Response, signature: str, last_modified: dt.datetime | None) -> None:
     if signature:
-        response.headers["ETag"] = hashlib.md5(signature.encode("utf-8")).hexdigest()
+        response.headers["ETag"] = _modal_etag(signature)
     lm = _http_datetime(last_modified)
     if lm:
         response.headers["Last-Modified"] = lm
@@ -223,13 +226,6 @@ def _parent_path(path: str) -> str | None:
     return "/".join(parts[:-1])
 
 
-def _infer_language(path: str) -> str:
-    ext = path.rsplit(".", 1)[-1].lower() if "." in path else ""
-    if ext in _LANGUAGE_MAP:
-        return _LANGUAGE_MAP[ext]
-    return ext.upper() if ext else "Other"
-
-
 def _build_highlight(files: List[File]) -> ProjectCardHighlight | None:
     if not files:
         return None
@@ -240,23 +236,6 @@ def _build_highlight(files: List[File]) -> ProjectCardHighlight | None:
     return ProjectCardHighlight(title=target.title, snippet=snippet or None, path=target.path)
 
 
-def _build_sparkline(files: List[File], now: dt.datetime) -> list[int]:
-    if not files:
-        return []
-    today = now.date()
-    buckets = [0] * 7
-    for f in files:
-        if not f.updated_at:
-            continue
-        updated = _utc(f.updated_at)
-        if not updated:
-            continue
-        delta = (today - updated.date()).days
-        if 0 <= delta < 7:
-            buckets[6 - delta] += 1
-    return buckets
-
-
 def _resolve_owners(db: Session) -> list[ProjectCardOwner]:
     user_row = db.get(User, "local")
     if user_row:
@@ -264,24 +243,6 @@ def _resolve_owners(db: Session) -> list[ProjectCardOwner]:
     return [ProjectCardOwner(id="local", name="Local User", avatar_url=None)]
 
 
-def _collect_directory_paths(db: Session, project_id: str, files: List[File]) -> set[str]:
-    paths: set[str] = set()
-    for f in files:
-        parts = [seg for seg in f.path.split("/") if seg]
-        for i in range(1, len(parts)):
-            paths.add("/".join(parts[:i]))
-    if int(settings.dirs_persist or 0) == 1:
-        try:
-            dir_rows = db.scalars(select(Directory).where(Directory.project_id == project_id)).all()
-            for d in dir_rows:
-                if d.path:
-                    paths.add(_normalize_path(d.path))
-        except Exception:
-            # Directory table might not be migrated yet; ignore for modal fallback
-            pass
-    return paths
-
-
 def _fetch_latest_commit(project: Project) -> dict | None:
     proj_dir = os.path.join(settings.data_dir, "projects", project.slug)
     art_dir = os.path.join(proj_dir, "artifacts")
@@ -300,16 +261,72 @@ def _fetch_latest_commit(project: Project) -> dict | None:
     return commit
 
 
-def _gather_modal_summary(db: Session, project: Project) -> Tuple[ProjectModalSummary, dt.datetime | None, str]:
-    files: List[File] = (
-        db.scalars(select(File).where(File.project_id == project.id)).all()
-    )
+def _modal_signature(db: Session, project: Project) -> str:
+    """Cheap fingerprint of everything the modal summary reads: one aggregate query plus git HEAD.
+
+    File and directory paths are folded in as a digest (read from the project/path indexes), since
+    moves keep counts and updated_at but change the tree and the README the modal shows.
+    """
+    row = db.execute(
+        text(
+            """
+            SELECT
+              (SELECT COUNT(*) || ':' || COALESCE(MAX(updated_at), '')
+                 FROM files WHERE project_id = :pid),
+              (SELECT COUNT(*) || ':' || COALESCE(MAX(updated_at), '')
+                 FROM directories WHERE project_id = :pid),
+              (SELECT GROUP_CONCAT(path, char(10))
+                 FROM (SELECT path FROM files WHERE project_id = :pid ORDER BY path)),
+              (SELECT GROUP_CONCAT(path, char(10))
+                 FROM (SELECT path FROM directories WHERE project_id = :pid ORDER BY path)),
+              (SELECT GROUP_CONCAT(t.id || '=' || t.label || '/' || COALESCE(t.color, ''), ',')
+                 FROM project_tags pt JOIN tags t ON t.id = pt.tag_id WHERE pt.project_id = :pid),
+              (SELECT GROUP_CONCAT(g.id || '=' || g.name || '/' || COALESCE(g.color, ''), ',')
+                 FROM project_group_memberships m JOIN project_groups g ON g.id = m.group_id
+                 WHERE m.project_id = :pid)
+            """
+        ),
+        {"pid": project.id},
+    ).one()
+    file_counts, dir_counts, file_paths, dir_paths, tags, groups = row
+    paths = hashlib.md5(f"{file_paths or ''}\0{dir_paths or ''}".encode("utf-8")).hexdigest()
+    art_dir = os.path.join(settings.data_dir, "projects", project.slug, "artifacts")
+    parts = [
+        project.id,
+        _utc(project.updated_at).isoformat() if project.updated_at else "",
+        str(bool(project.is_starred)),
+        *[value or "" for value in (file_counts, dir_counts, tags, groups)],
+        paths,
+        head_sha(art_dir) or "",
+    ]
+    return "|".join(parts)
+
 
-    files.sort(key=lambda f: (_utc(f.updated_at) or dt.datetime.min.replace(tzinfo=dt.timezone.utc)), reverse=True)
-    files.sort(key=lambda f: (f.updated_at or dt.datetime.min.replace(tzinfo=dt.timezone.utc)), reverse=True)
-    directory_paths = _collect_directory_paths(db, project.id, files)
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {value.strip().removeprefix("W/").strip('"') for value in if_none_match.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+def _gather_modal_summary(
+    db: Session, project: Project
+) -> Tuple[ProjectModalSummary, dt.datetime | None]:
+    files: List[File] = db.scalars(select(File).where(File.project_id == project.id)).all()
+
+    files.sort(
+        key=lambda f: (_utc(f.updated_at) or dt.datetime.min.replace(tzinfo=dt.timezone.utc)),
+        reverse=True,
+    )
+    files.sort(
+        key=lambda f: (f.updated_at or dt.datetime.min.replace(tzinfo=dt.timezone.utc)),
+        reverse=True,
+    )
+    ensure_tree_index(db, project.id)
     file_count = len(files)
-    directory_count = len(directory_paths)
+    directory_count = count_tree_dirs(
+        db, project.id, include_persisted=int(settings.dirs_persist or 0) == 1
+    )
 
     lang_counts: Dict[str, int] = {}
     readme_path: Optional[str] = None
@@ -343,7 +360,11 @@ def _gather_modal_summary(db: Session, project: Project) -> Tuple[ProjectModalSu
     latest_commit = _fetch_latest_commit(project)
     commit_ts = _utc(latest_commit.get("date")) if latest_commit else None
     if latest_commit:
-        message = (latest_commit.get("message") or "").strip().splitlines()[0] if latest_commit.get("message") else "Commit"
+        message = (
+            (latest_commit.get("message") or "").strip().splitlines()[0]
+            if latest_commit.get("message")
+            else "Commit"
+        )
         short_sha = (latest_commit.get("sha") or "")[:7]
         display = message[:80] + ("…" if len(message) > 80 else "")
         quick_stats.append(
@@ -387,7 +408,9 @@ def _gather_modal_summary(db: Session, project: Project) -> Tuple[ProjectModalSu
         _utc(latest_file.updated_at) if latest_file and latest_file.updated_at else None,
         commit_ts,
     ]
-    last_modified = max([val for val in last_modified_candidates if val], default=_utc(project.updated_at))
+    last_modified = max(
+        [val for val in last_modified_candidates if val], default=_utc(project.updated_at)
+    )
 
     summary = ProjectModalSummary(
         id=project.id,
@@ -408,17 +431,7 @@ def _gather_modal_summary(db: Session, project: Project) -> Tuple[ProjectModalSu
         groups=group_reads,
     )
 
-    signature_parts = [
-        project.id,
-        summary.updated_at.isoformat() if summary.updated_at else "",
-        str(summary.is_starred),
-        str(file_count),
-        str(directory_count),
-        commit_ts.isoformat() if commit_ts else "",
-        _utc(latest_file.updated_at).isoformat() if latest_file and latest_file.updated_at else "",
-    ]
-    signature = "|".join(signature_parts)
-    return summary, last_modified, signature
+    return summary, last_modified
 
 
 def _compute_tree_nodes(
@@ -430,9 +443,32 @@ def _compute_tree_nodes(
 ) -> Tuple[list[ProjectTreeNode], dt.datetime | None, str]:
     normalized_path = _normalize_path(path)
     query_value = (query or "").strip().lower()
-
-    files: List[File] = (
-        db.scalars(select(File).where(File.project_id == project.id)).all()
+    include_persisted = int(settings.dirs_persist or 0) == 1
+
+    # Directory rows and files are read one level at a time via the directory index
+    ensure_tree_index(db, project.id)
+    if query_value:
+        # Substring filter goes through the trigram path index;
+        # only matching rows are loaded in full
+        dir_rows = list_tree_dirs(
+            db, project.id, contains=query_value, include_persisted=include_persisted
+        )
+        with engine.connect() as conn:
+            match_ids = [
+                row["file_id"] for row in match_file_paths(conn, query_value, project_id=project.id)
+            ]
+        files: List[File] = (
+            db.scalars(select(File).where(File.id.in_(match_ids))).all() if match_ids else []
+        )
+    else:
+        dir_rows = list_tree_dirs(
+            db, project.id, parent_path=normalized_path, include_persisted=include_persisted
+        )
+        files = db.scalars(
+            select(File).where(File.project_id == project.id, File.dir_path == normalized_path)
+        ).all()
+    latest_updated = db.scalar(
+        select(func.max(File.updated_at)).where(File.project_id == project.id)
     )
 
     tag_slugs: set[str] = set()
@@ -449,66 +485,36 @@ def _compute_tree_nodes(
         tag_rows = db.scalars(select(Tag).where(Tag.slug.in_(tag_slugs))).all()
         tag_lookup = {tag.slug: tag for tag in tag_rows}
 
-    directory_paths = _collect_directory_paths(db, project.id, files)
-
-    latest_file = files[0] if files else None
-    latest_file_updated = _utc(latest_file.updated_at) if latest_file and latest_file.updated_at else None
-
-    children_counts: Dict[str, int] = {}
-
-    def _increment_parent(parent: str | None) -> None:
-        key = parent or ""
-        children_counts[key] = children_counts.get(key, 0) + 1
-
-    for dir_path in directory_paths:
-        parent = _parent_path(dir_path)
-        _increment_parent(parent)
-
-    for f in files:
-        parent = _parent_path(f.path)
-        _increment_parent(parent)
-
-    if "" not in children_counts:
-        children_counts[""] = children_counts.get("", 0)
+    latest_file_updated = _utc(latest_updated) if latest_updated else None
 
     nodes: list[ProjectTreeNode] = []
-    target_parent_key = normalized_path or ""
 
     # Directories first
-    for dir_path in sorted(directory_paths):
-        parent = _parent_path(dir_path)
-        parent_key = parent or ""
-        if query_value:
-            if query_value not in dir_path.lower():
-                continue
-        elif parent_key != target_parent_key:
+    for drow, children_count in dir_rows:
+        # Without include_dirs, persisted directories that hold nothing are hidden
+        if not include_dirs and not query_value and children_count == 0:
             continue
-        parts = [seg for seg in dir_path.split("/") if seg]
-        depth = len(parts)
         node = ProjectTreeNode(
             type="dir",
-            name=parts[-1] if parts else dir_path,
-            path=dir_path,
-            depth=depth,
-            parent_path=parent,
-            has_children=children_counts.get(dir_path, 0) > 0,
-            children_count=children_counts.get(dir_path, 0),
+            name=drow.name or drow.path,
+            path=drow.path,
+            depth=drow.depth,
+            parent_path=drow.parent_path or None,
+            has_children=children_count > 0,
+            children_count=children_count,
         )
         nodes.append(node)
 
     for f in files:
-        haystack = f"{f.path.lower()} {f.title.lower() if f.title else ''}"
-        parent = _parent_path(f.path)
-        parent_key = parent or ""
         if query_value:
+            haystack = f"{f.path.lower()} {f.title.lower() if f.title else ''}"
             if query_value not in haystack:
                 continue
-        elif parent_key != target_parent_key:
-            continue
+        parent = _parent_path(f.path)
         parts = [seg for seg in f.path.split("/") if seg]
         depth = len(parts)
-        ext = (f.path.rsplit(".", 1)[-1].lower() if "." in f.path else "")
-        size_bytes = len((f.content_md or "").encode("utf-8"))
+        ext = f.path.rsplit(".", 1)[-1].lower() if "." in f.path else ""
+        size_bytes = f.size_bytes or 0
         preview_eligible = (ext in _TEXT_EXTENSIONS) and size_bytes <= _MAX_PREVIEW_BYTES
         badges: list[str] = []
         if parts and parts[-1].lower() in _README_BASENAMES:
@@ -558,21 +564,19 @@ def _compute_tree_nodes(
         )
         nodes.append(node)
 
-    # If include_dirs is False, remove directories which have no backing files unless they were derived from file parents
-    if not include_dirs and not query_value:
-        nodes = [n for n in nodes if n.type == "file" or children_counts.get(n.path, 0) > 0]
-
     nodes.sort(key=lambda n: (0 if n.type == "dir" else 1, n.path.lower()))
 
     last_modified_candidates = [
         _utc(project.updated_at),
         latest_file_updated,
     ]
-    last_modified = max([val for val in last_modified_candidates if val], default=_utc(project.updated_at))
+    last_modified = max(
+        [val for val in last_modified_candidates if val], default=_utc(project.updated_at)
+    )
 
     signature_parts = [
         project.id,
-        target_parent_key,
+        normalized_path,
         query_value,
         str(len(nodes)),
         last_modified.isoformat() if last_modified else "",
@@ -581,135 +585,13 @@ def _compute_tree_nodes(
     return nodes, last_modified, signature
 
 
-def _format_event_message(event_type: str) -> str:
-    mapping = {
-        "bundle.started": "Bundle export started",
-        "bundle.completed": "Bundle export completed",
-        "bundle.failed": "Bundle export failed",
-        "bundle.branch_pushed": "Bundle branch pushed",
-        "bundle.pr_opened": "Bundle PR opened",
-        "commit.started": "Commit started",
-        "commit.completed": "Commit completed",
-        "commit.failed": "Commit failed",
-    }
-    if event_type in mapping:
-        return mapping[event_type]
-    return event_type.replace(".", " ").title()
-
-
-def _compute_activity_entries(
-    db: Session,
-    project: Project,
-    type_filter: set[str],
-    limit: int,
-) -> Tuple[list[ProjectActivityEntry], list[str], dt.datetime | None, str]:
-    entries: list[ProjectActivityEntry] = []
-    sources: set[str] = set()
-
-    include_commits = not type_filter or "commit" in type_filter
-    include_files = not type_filter or "file_change" in type_filter or "file" in type_filter
-    include_events = not type_filter or "job" in type_filter or "event" in type_filter
-
-    if include_commits:
-        commits: list[dict] = []
-        proj_dir = os.path.join(settings.data_dir, "projects", project.slug)
-        art_dir = os.path.join(proj_dir, "artifacts")
-        if os.path.isdir(os.path.join(art_dir, ".git")):
-            try:
-                commits = repo_history(art_dir, limit=max(20, limit * 2))
-            except GitError:
-                commits = []
-        for commit in commits:
-            timestamp = _utc(commit.get("date")) or dt.datetime.now(tz=dt.timezone.utc)
-            message = (commit.get("message") or "").strip().splitlines()[0] if commit.get("message") else "Commit"
-            short_sha = (commit.get("sha") or "")[:7]
-            entries.append(
-                ProjectActivityEntry(
-                    id=f"commit:{commit.get('sha')}",
-                    type="commit",
-                    message=message,
-                    timestamp=timestamp,
-                    actor=commit.get("author"),
-                    context={
-                        "sha": commit.get("sha"),
-                        "short_sha": short_sha,
-                        "message": commit.get("message"),
-                    },
-                )
-            )
-        if commits:
-            sources.add("commits")
-
-    if include_files:
-        file_rows: List[File] = (
-            db.scalars(
-                select(File)
-                .where(File.project_id == project.id)
-                .order_by(File.updated_at.desc())
-                .limit(max(40, limit * 3))
-            ).all()
-        )
-        for f in file_rows:
-            if not f.updated_at:
-                continue
-            timestamp = _utc(f.updated_at) or dt.datetime.now(tz=dt.timezone.utc)
-            entries.append(
-                ProjectActivityEntry(
-                    id=f"file:{f.id}:{timestamp.isoformat()}",
-                    type="file_change",
-                    message=f"{f.title or f.path} updated",
-                    timestamp=timestamp,
-                    actor=None,
-                    context={"file_id": f.id, "path": f.path},
-                )
-            )
-        if file_rows:
-            sources.add("files")
-
-    if include_events:
-        event_rows: List[Event] = (
-            db.scalars(
-                select(Event)
-                .where(Event.project_id == project.id)
-                .order_by(Event.created_at.desc())
-                .limit(max(40, limit * 3))
-            ).all()
-        )
-        for ev in event_rows:
-            timestamp = _utc(ev.created_at) or dt.datetime.now(tz=dt.timezone.utc)
-            entry_type = "job" if ev.type.startswith("bundle.") else "event"
-            sources.add("jobs" if entry_type == "job" else "events")
-            entries.append(
-                ProjectActivityEntry(
-                    id=f"event:{ev.id}",
-                    type=entry_type,
-                    message=_format_event_message(ev.type),
-                    timestamp=timestamp,
-                    actor=None,
-                    context={"type": ev.type, "payload": ev.payload},
-                )
-            )
-
-    entries.sort(key=lambda e: e.timestamp or dt.datetime.min.replace(tzinfo=dt.timezone.utc), reverse=True)
-
-    last_modified = entries[0].timestamp if entries else _utc(project.updated_at)
-
-    type_key = ",".join(sorted(type_filter)) if type_filter else "all"
-    signature_parts = [
-        project.id,
-        type_key,
-        last_modified.isoformat() if last_modified else "",
-        str(len(entries)),
-    ]
-    signature = "|".join(signature_parts)
-    return entries, sorted(sources), last_modified, signature
-
-
 def _apply_project_template(db: Session, project: Project, template_id: str | None) -> None:
-    if not template_id or template_id == 'blank':
+    if not template_id or template_id == "blank":
         return
     db.rollback()
-    raise HTTPException(status_code=400, detail={"code": "UNKNOWN_TEMPLATE", "message": "Template not supported"})
+    raise HTTPException(
+        status_code=400, detail={"code": "UNKNOWN_TEMPLATE", "message": "Template not supported"}
+    )
 
 
 @router.post("", response_model=ProjectRead, status_code=201)
@@ -718,7 +600,9 @@ def create_project(body: ProjectCreate, db: Session = Depends(get_db)):
     # Uniqueness checks
     exists = db.scalar(select(Project).where(Project.slug == slug))
     if exists:
-        raise HTTPException(status_code=409, detail={"code": "DUPLICATE", "message": "Project exists"})
+        raise HTTPException(
+            status_code=409, detail={"code": "DUPLICATE", "message": "Project exists"}
+        )
     p = Project(name=body.name, slug=slug, description=body.description or "", status=body.status)
     db.add(p)
     db.flush()
@@ -726,6 +610,8 @@ def create_project(body: ProjectCreate, db: Session = Depends(get_db)):
     set_project_tags(db, p, body.tags)
     db.commit()
     db.refresh(p)
+    with engine.begin() as conn:
+        index_project(conn, p.id)
     # Create on-disk layout
     proj_dir = os.path.join(settings.data_dir, "projects", p.slug)
     os.makedirs(os.path.join(proj_dir, "files"), exist_ok=True)
@@ -743,6 +629,71 @@ def create_project(body: ProjectCreate, db: Session = Depends(get_db)):
     return p
 
 
+_PROJECT_CURSOR_PREFIX = "p1."
+
+
+def _encode_project_cursor(sort_value: str, project_id: str) -> str:
+    raw = json.dumps([sort_value, project_id], separators=(",", ":"))
+    return _PROJECT_CURSOR_PREFIX + base64.urlsafe_b64encode(raw.encode("utf-8")).decode(
+        "ascii"
+    ).rstrip("=")
+
+
+def _decode_project_cursor(cursor: str) -> tuple[str, str]:
+    token = cursor[len(_PROJECT_CURSOR_PREFIX) :]
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        sort_value, project_id = json.loads(raw)
+        return str(sort_value), str(project_id)
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(
+            status_code=400, detail={"code": "BAD_CURSOR", "message": "Invalid cursor"}
+        ) from exc
+
+
+# sort param -> (key, descending); keys map to the ix_projects_archived_* indexes
+_PROJECT_SORTS = {
+    "-updated": ("updated", True),
+    "updated": ("updated", False),
+    "+updated": ("updated", False),
+    "-created": ("created", True),
+    "created": ("created", False),
+    "+created": ("created", False),
+    "name": ("name", False),
+    "+name": ("name", False),
+    "-name": ("name", True),
+}
+
+
+def _project_sort_column(key: str):
+    if key == "created":
+        return Project.created_at
+    if key == "name":
+        return func.lower(Project.name)
+    return Project.updated_at
+
+
+def _project_sort_value(value) -> str:
+    """Cursor form of a sort column value as SQL returned it.
+
+    The name key must not be lowered in Python: SQLite's lower() only folds ASCII.
+    """
+    if isinstance(value, dt.datetime):
+        return value.isoformat()
+    return value or ""
+
+
+def _parse_sort_value(key: str, value: str):
+    if key == "name":
+        return value
+    try:
+        return dt.datetime.fromisoformat(value)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=400, detail={"code": "BAD_CURSOR", "message": "Invalid cursor"}
+        ) from exc
+
+
 @router.get("", response_model=ProjectListResponse)
 def list_projects(
     view: str | None = Query(default="all"),
@@ -757,42 +708,21 @@ def list_projects(
     sort: str | None = "-updated",
     limit: int = 20,
     cursor: str | None = None,
+    include_total: bool = False,
     db: Session = Depends(get_db),
 ):
-    try:
-        offset = int(cursor) if cursor else 0
-    except ValueError as exc:  # pragma: no cover - defensive
-        raise HTTPException(status_code=400, detail={"code": "BAD_CURSOR", "message": "Cursor must be integer"}) from exc
-
     limit = max(1, min(limit, 50))
     normalized_view = (view or "all").lower()
     status_filters = {value.strip().lower() for value in status_multi if value}
     if status:
-        for part in (status.split(",") if status else []):
+        for part in status.split(",") if status else []:
             cleaned = part.strip().lower()
             if cleaned:
                 status_filters.add(cleaned)
-    normalized_status = next(iter(status_filters)) if len(status_filters) == 1 else ""
-
-    rows: list[Project] = db.scalars(select(Project)).all()
 
-    # Filter by archive/star view state
-    filtered: list[Project] = []
     now = dt.datetime.now(tz=dt.timezone.utc)
     recent_cutoff = now - dt.timedelta(days=30)
 
-    def matches_view(project: Project) -> bool:
-        if normalized_view == "archived":
-            return bool(project.is_archived)
-        archived_block = project.is_archived and normalized_view not in {"archived"}
-        if archived_block:
-            return False
-        if normalized_view == "starred":
-            return bool(project.is_starred)
-        if normalized_view in {"recent", "recently_updated"}:
-            return project.updated_at and project.updated_at >= recent_cutoff
-        return True
-
     # Parse updated_after/before (ISO8601)
     def parse_dt(value: str | None) -> dt.datetime | None:
         if not value:
@@ -800,115 +730,146 @@ def list_projects(
         try:
             return dt.datetime.fromisoformat(value)
         except ValueError:
-            raise HTTPException(status_code=400, detail={"code": "BAD_DATETIME", "message": "Invalid datetime"})
+            raise HTTPException(
+                status_code=400, detail={"code": "BAD_DATETIME", "message": "Invalid datetime"}
+            )
 
     after_dt = parse_dt(updated_after)
     before_dt = parse_dt(updated_before)
 
-    for project in rows:
-        if not matches_view(project):
-            continue
-        if tags:
-            requested = {slugify(t) for t in tags}
-            project_tag_slugs = {t.slug for t in project.tag_entities}
-            project_tag_labels = {slugify(t.label) for t in project.tag_entities}
-            if not requested.issubset(project_tag_slugs.union(project_tag_labels)):
-                continue
-        if after_dt and project.updated_at and project.updated_at < after_dt:
-            continue
-        if before_dt and project.updated_at and project.updated_at > before_dt:
-            continue
-        if status_filters:
-            project_status = (project.status or "").strip().lower()
-            if project_status not in status_filters:
-                continue
-            continue
-        filtered.append(project)
-
-    if owner:
-        # Single-user instance: only accept owner == "me"/"local"/"default"
-        normalized_owner = owner.lower()
-        if normalized_owner not in {"me", "local", "default"}:
-            filtered = []
+    # Archive/star view state
+    conditions = [Project.is_archived == (normalized_view == "archived")]
+    if normalized_view == "starred":
+        conditions.append(Project.is_starred == True)  # noqa: E712
+    elif normalized_view in {"recent", "recently_updated"}:
+        conditions.append(Project.updated_at >= recent_cutoff)
+
+    for requested in {slugify(t) for t in tags if t}:
+        conditions.append(
+            select(project_tags_table.c.project_id)
+            .join(Tag, Tag.id == project_tags_table.c.tag_id)
+            .where(
+                project_tags_table.c.project_id == Project.id,
+                or_(Tag.slug == requested, func.lower(Tag.label) == requested),
+            )
+            .exists()
+        )
+    if after_dt:
+        conditions.append(Project.updated_at >= after_dt)
+    if before_dt:
+        conditions.append(Project.updated_at <= before_dt)
+    if status_filters:
+        conditions.append(func.lower(func.trim(Project.status)).in_(status_filters))
 
-    base_project_ids = [p.id for p in filtered]
-    preliminary_group_map = _get_project_groups(db, base_project_ids) if base_project_ids else {}
     group_filter_set = {value for value in group if value}
     if group_filter_set:
-        filtered = [p for p in filtered if any(g.id in group_filter_set for g in preliminary_group_map.get(p.id, []))]
-        project_ids = [p.id for p in filtered]
-        group_map = _get_project_groups(db, project_ids) if project_ids else {}
-    else:
-        project_ids = base_project_ids
-        group_map = preliminary_group_map
-
-    files_by_project: Dict[str, list[File]] = {pid: [] for pid in project_ids}
-    if project_ids:
-        file_rows = db.scalars(select(File).where(File.project_id.in_(project_ids))).all()
-        for f in file_rows:
-            files_by_project.setdefault(f.project_id, []).append(f)
-
-    # Build derived metrics for each project
-    derived: Dict[str, dict] = {}
-    for project in filtered:
-        pfiles = files_by_project.get(project.id, [])
-        lang_counts: Dict[str, int] = {}
-        for f in pfiles:
-            lang = _infer_language(f.path)
-            lang_counts[lang] = lang_counts.get(lang, 0) + 1
-        lang_stats = [ProjectCardLanguageStat(language=k, count=v) for k, v in sorted(lang_counts.items(), key=lambda item: (-item[1], item[0]))]
-        derived[project.id] = {
-            "file_count": len(pfiles),
-            "language_mix": lang_stats,
-            "highlight": _build_highlight(pfiles),
-            "sparkline": _build_sparkline(pfiles, now),
-            "languages": set(lang_counts.keys()),
-        }
+        conditions.append(
+            select(ProjectGroupMembership.project_id)
+            .where(
+                ProjectGroupMembership.project_id == Project.id,
+                ProjectGroupMembership.group_id.in_(group_filter_set),
+            )
+            .exists()
+        )
 
     if language:
+        # Language mix lives in project_stats; build rows for projects that have none yet
+        missing = db.scalars(
+            select(Project.id).where(
+                ~select(ProjectStats.project_id)
+                .where(ProjectStats.project_id == Project.id)
+                .exists()
+            )
+        ).all()
+        if missing:
+            load_project_stats(db, list(missing))
         lang_targets = {lang.lower() for lang in language}
-        filtered = [
-            p
-            for p in filtered
-            if derived.get(p.id, {}).get("languages")
-            and any(lang.lower() in lang_targets for lang in derived[p.id]["languages"])
-        ]
+        langs = func.json_each(ProjectStats.language_counts).table_valued("key").alias("langs")
+        conditions.append(
+            select(ProjectStats.project_id)
+            .select_from(ProjectStats)
+            .join(langs, true())
+            .where(ProjectStats.project_id == Project.id, func.lower(langs.c.key).in_(lang_targets))
+            .exists()
+        )
 
-    # Sorting
-    normalized_sort = (sort or "-updated").lower()
+    # Single-user instance: only accept owner == "me"/"local"/"default"
+    owner_matches = not owner or owner.lower() in {"me", "local", "default"}
 
-    if normalized_sort in {"-updated", "updated", "+updated"}:
-        key_fn = lambda project: project.updated_at or dt.datetime.min.replace(tzinfo=dt.timezone.utc)
-        reverse = normalized_sort.startswith("-")
-    elif normalized_sort in {"-created", "created", "+created"}:
-        key_fn = lambda project: project.created_at or dt.datetime.min.replace(tzinfo=dt.timezone.utc)
-        reverse = normalized_sort.startswith("-")
-    elif normalized_sort in {"name", "+name"}:
-        key_fn = lambda project: project.name.lower()
-        reverse = False
-    elif normalized_sort == "-name":
-        key_fn = lambda project: project.name.lower()
-        reverse = True
+    normalized_sort = (sort or "-updated").lower()
+    sort_key, descending = _PROJECT_SORTS.get(normalized_sort, ("updated", True))
+    sort_column = _project_sort_column(sort_key)
+
+    page_conditions = list(conditions)
+    if cursor and cursor.startswith(_PROJECT_CURSOR_PREFIX):
+        after_value, after_id = _decode_project_cursor(cursor)
+        boundary = tuple_(sort_column, Project.id)
+        after_key = tuple_(_parse_sort_value(sort_key, after_value), after_id)
+        page_conditions.append(boundary < after_key if descending else boundary > after_key)
+        offset = 0
     else:
-        key_fn = lambda project: project.updated_at or dt.datetime.min.replace(tzinfo=dt.timezone.utc)
-        reverse = True
+        # Legacy numeric offset cursors keep working for clients mid-pagination
+        try:
+            offset = int(cursor) if cursor else 0
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=400, detail={"code": "BAD_CURSOR", "message": "Invalid cursor"}
+            ) from exc
+
+    ordering = (
+        [sort_column.desc(), Project.id.desc()]
+        if descending
+        else [sort_column.asc(), Project.id.asc()]
+    )
+    page_rows = []
+    if owner_matches:
+        # The sort value comes back with the row so the cursor matches the ORDER BY exactly
+        page_rows = db.execute(
+            select(Project, sort_column)
+            .where(*page_conditions)
+            .order_by(*ordering)
+            .offset(offset)
+            .limit(limit + 1)
+        ).all()
+    has_more = len(page_rows) > limit
+    page_rows = page_rows[:limit]
+    page_items: list[Project] = [row[0] for row in page_rows]
+    next_cursor = (
+        _encode_project_cursor(_project_sort_value(page_rows[-1][1]), page_items[-1].id)
+        if has_more
+        else None
+    )
 
-    filtered.sort(key=key_fn, reverse=reverse)
+    total = None
+    if include_total:
+        total = db.scalar(select(func.count(Project.id)).where(*conditions)) if owner_matches else 0
 
-    total = len(filtered)
-    page_items = filtered[offset : offset + limit]
-    next_cursor = str(offset + limit) if offset + limit < total else None
+    project_ids = [p.id for p in page_items]
+    group_map = _get_project_groups(db, project_ids) if project_ids else {}
+    stats_map = load_project_stats(db, project_ids)
 
     # Owners — single local user fallback
     owners = _resolve_owners(db)
 
-    project_tag_map = get_project_tag_details(db, [p.id for p in filtered])
+    project_tag_map = get_project_tag_details(db, project_ids)
 
     cards: list[ProjectCardRead] = []
     for project in page_items:
-        lang_stats = derived.get(project.id, {}).get("language_mix", [])
-        highlight = derived.get(project.id, {}).get("highlight")
-        sparkline = derived.get(project.id, {}).get("sparkline", [])
+        # Card metrics come from the incrementally maintained project_stats rows
+        stats = stats_map.get(project.id)
+        lang_counts: Dict[str, int] = dict(stats.language_counts or {}) if stats else {}
+        lang_stats = [
+            ProjectCardLanguageStat(language=k, count=v)
+            for k, v in sorted(lang_counts.items(), key=lambda item: (-item[1], item[0]))
+        ]
+        highlight = None
+        if stats and stats.highlight_file_id:
+            highlight = ProjectCardHighlight(
+                title=stats.highlight_title,
+                snippet=stats.highlight_snippet,
+                path=stats.highlight_path,
+            )
+        sparkline = sparkline_from_stats(stats, now)
 
         tags_details = []
         for tag in project_tag_map.get(project.id, []):
@@ -936,7 +897,7 @@ def list_projects(
             is_archived=bool(project.is_archived),
             created_at=project.created_at,
             updated_at=project.updated_at,
-            file_count=derived.get(project.id, {}).get("file_count", 0),
+            file_count=stats.file_count if stats else 0,
             language_mix=lang_stats,
             owners=owners,
             highlight=highlight,
@@ -964,37 +925,59 @@ def list_projects(
     )
 
 
+@router.post("/stats/rebuild")
+def rebuild_stats(project_id: str | None = None) -> dict:
+    import redis as _redis
+    import rq as _rq
+
+    q = _rq.Queue("default", connection=_redis.from_url(settings.redis_url))
+    job = q.enqueue("worker.jobs.stats_jobs.rebuild_project_stats", project_id, job_timeout=600)
+    return {"job_id": job.id}
+
+
 @router.get("/{project_id}", response_model=ProjectRead)
 def get_project(project_id: str, db: Session = Depends(get_db)):
     p = db.get(Project, project_id)
     if not p:
-        raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "Project not found"})
+        raise HTTPException(
+            status_code=404, detail={"code": "NOT_FOUND", "message": "Project not found"}
+        )
     group_map = _get_project_groups(db, [p.id])
     return _serialize_project_read(p, group_map.get(p.id))
 
 
 @router.get("/{project_id}/modal", response_model=ProjectModalSummary)
-def get_project_modal(project_id: str, response: Response, db: Session = Depends(get_db)):
+def get_project_modal(
+    project_id: str, request: Request, response: Response, db: Session = Depends(get_db)
+):
     if int(settings.project_modal or 0) != 1:
-        raise HTTPException(status_code=404, detail={"code": "NOT_ENABLED", "message": "Project modal disabled"})
+        raise HTTPException(
+            status_code=404, detail={"code": "NOT_ENABLED", "message": "Project modal disabled"}
+        )
     project = db.get(Project, project_id)
     if not project:
-        raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "Project not found"})
-
-    cached_entry = None
-    with _MODAL_CACHE_LOCK:
-        cached_entry = _MODAL_CACHE.get(project_id)
+        raise HTTPException(
+            status_code=404, detail={"code": "NOT_FOUND", "message": "Project not found"}
+        )
 
-    summary, last_modified, signature = _gather_modal_summary(db, project)
-    if cached_entry and cached_entry[0] == signature:
-        summary = cached_entry[1]
-        last_modified = cached_entry[2]
-    else:
-        with _MODAL_CACHE_LOCK:
-            _MODAL_CACHE[project_id] = (signature, summary, last_modified)
+    # Validate against the cheap signature before touching files or git history
+    signature = _modal_signature(db, project)
+    if _etag_matches(request.headers.get("if-none-match"), _modal_etag(signature)):
+        return Response(status_code=304, headers={"ETag": _modal_etag(signature)})
+
+    entry = get_modal_entry(project_id, signature)
+    if entry is None:
+        summary, last_modified = _gather_modal_summary(db, project)
+        entry = ModalCacheEntry(
+            signature=signature,
+            summary=summary.model_dump(mode="json"),
+            last_modified=last_modified.isoformat() if last_modified else None,
+        )
+        store_modal_entry(project_id, entry)
 
+    last_modified = dt.datetime.fromisoformat(entry.last_modified) if entry.last_modified else None
     _apply_cache_headers(response, signature, last_modified)
-    return summary
+    return entry.summary
 
 
 @router.put("/{project_id}", response_model=ProjectRead)
@@ -1074,14 +1057,16 @@ def delete_project(project_id: str, db: Session = Depends(get_db)):
         return
     # Delete related rows first to avoid FK constraint errors
     # Files (and search index)
-    file_ids = [f.id for f in db.scalars(select(File).where(File.project_id == project_id)).all()]
+    file_ids = list(db.scalars(select(File.id).where(File.project_id == project_id)).all())
     for fid in file_ids:
         with engine.begin() as conn:
-            conn.execute(text("DELETE FROM search_index WHERE file_id = :fid"), {"fid": fid})
+            remove_from_index(conn, fid)
     db.query(File).filter(File.project_id == project_id).delete(synchronize_session=False)
 
     # Artifact repos
-    db.query(ArtifactRepo).filter(ArtifactRepo.project_id == project_id).delete(synchronize_session=False)
+    db.query(ArtifactRepo).filter(ArtifactRepo.project_id == project_id).delete(
+        synchronize_session=False
+    )
 
     # Bundles (if any are persisted in future)
     try:
@@ -1097,9 +1082,20 @@ def delete_project(project_id: str, db: Session = Depends(get_db)):
     except FileNotFoundError:
         pass
 
+    db.query(ProjectStats).filter(ProjectStats.project_id == project_id).delete(
+        synchronize_session=False
+    )
+    db.query(ProjectTreeDir).filter(ProjectTreeDir.project_id == project_id).delete(
+        synchronize_session=False
+    )
+    db.query(Activity).filter(Activity.project_id == project_id).delete(synchronize_session=False)
+
     # Finally delete the project itself
     db.delete(p)
     db.commit()
+    with engine.begin() as conn:
+        remove_project_from_index(conn, project_id)
+    invalidate_modal_entry(project_id)
     return
 
 
@@ -1115,17 +1111,24 @@ def get_project_tree(
     db: Session = Depends(get_db),
 ):
     if int(settings.project_modal or 0) != 1:
-        raise HTTPException(status_code=404, detail={"code": "NOT_ENABLED", "message": "Project modal disabled"})
+        raise HTTPException(
+            status_code=404, detail={"code": "NOT_ENABLED", "message": "Project modal disabled"}
+        )
     project = db.get(Project, project_id)
     if not project:
-        raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "Project not found"})
+        raise HTTPException(
+            status_code=404, detail={"code": "NOT_FOUND", "message": "Project not found"}
+        )
 
     try:
         offset = int(cursor) if cursor else 0
         if offset < 0:
             raise ValueError
     except ValueError as exc:
-        raise HTTPException(status_code=400, detail={"code": "BAD_CURSOR", "message": "Cursor must be non-negative integer"}) from exc
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "BAD_CURSOR", "message": "Cursor must be non-negative integer"},
+        ) from exc
 
     include_flag = bool(int(include_dirs or 0))
 
@@ -1149,27 +1152,53 @@ def get_project_activity(
     db: Session = Depends(get_db),
 ):
     if int(settings.project_modal or 0) != 1:
-        raise HTTPException(status_code=404, detail={"code": "NOT_ENABLED", "message": "Project modal disabled"})
+        raise HTTPException(
+            status_code=404, detail={"code": "NOT_ENABLED", "message": "Project modal disabled"}
+        )
     project = db.get(Project, project_id)
     if not project:
-        raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "Project not found"})
+        raise HTTPException(
+            status_code=404, detail={"code": "NOT_FOUND", "message": "Project not found"}
+        )
 
-    try:
-        offset = int(cursor) if cursor else 0
-        if offset < 0:
-            raise ValueError
-    except ValueError as exc:
-        raise HTTPException(status_code=400, detail={"code": "BAD_CURSOR", "message": "Cursor must be non-negative integer"}) from exc
+    after = None
+    if cursor:
+        after = decode_activity_cursor(cursor)
+        if after is None:
+            raise HTTPException(
+                status_code=400, detail={"code": "BAD_CURSOR", "message": "Invalid cursor"}
+            )
 
     type_filter = {t.strip().lower() for t in types if t.strip()}
-    entries, sources, last_modified, signature = _compute_activity_entries(db, project, type_filter, limit)
+    stored_types = resolve_type_filter(type_filter)
+    if type_filter and not stored_types:
+        return ProjectActivityResponse(
+            items=[], next_cursor=None, sources=activity_sources(db, project.id)
+        )
 
-    total = len(entries)
-    items = entries[offset : offset + limit]
-    next_cursor = str(offset + limit) if offset + limit < total else None
+    # Commits are appended lazily; a no-op (no git spawn) while HEAD is already logged
+    ingest_commits(db, project)
+    rows, has_more = list_activity(db, project.id, stored_types, limit, after=after)
+    items = [
+        ProjectActivityEntry(
+            id=row.ref or f"activity:{row.id}",
+            type=row.type,
+            message=row.message,
+            timestamp=_utc(row.timestamp),
+            actor=row.actor,
+            context=row.context or {},
+        )
+        for row in rows
+    ]
+    next_cursor = encode_activity_cursor(rows[-1]) if has_more and rows else None
 
-    payload = ProjectActivityResponse(items=items, next_cursor=next_cursor, sources=sources)
-    _apply_cache_headers(response, signature, last_modified)
+    latest_id, latest_ts = latest_activity(db, project.id)
+    type_key = ",".join(sorted(type_filter)) if type_filter else "all"
+    signature = "|".join([project.id, type_key, cursor or "", str(latest_id or 0), str(limit)])
+    payload = ProjectActivityResponse(
+        items=items, next_cursor=next_cursor, sources=activity_sources(db, project.id)
+    )
+    _apply_cache_headers(response, signature, _utc(latest_ts) or _utc(project.updated_at))
     return payload
 
 
@@ -1179,7 +1208,11 @@ def list_project_files(project_id: str, db: Session = Depends(get_db)):
         p = db.get(Project, project_id)
         if not p:
             raise HTTPException(status_code=404, detail={"code": "NOT_FOUND"})
-        files = p.files
+        files = db.scalars(
+            select(File)
+            .where(File.project_id == p.id)
+            .options(undefer(File.content_md), undefer(File.rendered_html))
+        ).all()
         tag_slugs: set[str] = set()
         for f in files:
             for label in f.tags or []:
@@ -1195,20 +1228,12 @@ def list_project_files(project_id: str, db: Session = Depends(get_db)):
         for f in files:
             front_matter = f.front_matter or {}
             tags = list(f.tags or [])
-            description_value = front_matter.get('description') if isinstance(front_matter.get('description'), str) else None
-            if description_value:
-                description_value = description_value.strip() or None
-            icon_hint = front_matter.get('icon') if isinstance(front_matter.get('icon'), str) else None
-            if not icon_hint and f.path and '.' in f.path:
-                icon_hint = f.path.rsplit('.', 1)[-1].lower()
-            _, body = extract_front_matter(f.content_md or '')
-            summary_text = summarize_markdown(body)
-            if description_value and len(description_value) > 180:
-                summary_value = description_value[:179].rstrip() + '…'
-            else:
-                summary_value = description_value or summary_text
-            metadata_fields = build_metadata_fields(front_matter)
-            metadata_signature = build_metadata_signature(front_matter)
+            listing = f.listing_fields()
+            icon_hint = (
+                front_matter.get("icon") if isinstance(front_matter.get("icon"), str) else None
+            )
+            if not icon_hint and f.path and "." in f.path:
+                icon_hint = f.path.rsplit(".", 1)[-1].lower()
             payload.append(
                 FileRead(
                     id=f.id,
@@ -1219,59 +1244,68 @@ def list_project_files(project_id: str, db: Session = Depends(get_db)):
                     rendered_html=f.rendered_html,
                     tags=tags,
                     front_matter=front_matter,
-                    description=description_value,
-                    links=list(front_matter.get('links') or []),
+                    description=listing["description"],
+                    links=list(front_matter.get("links") or []),
                     icon_hint=icon_hint,
                     tag_details=build_tag_details(tags, tag_lookup),
-                    summary=summary_value,
+                    summary=listing["summary"],
                     updated_at=f.updated_at,
-                    metadata_fields=metadata_fields,
-                    metadata_signature=metadata_signature,
+                    metadata_fields=listing["metadata_fields"],
+                    metadata_signature=listing["metadata_signature"],
                 )
             )
 
         return payload
     except Exception as e:
         import traceback
+
         print("[ERROR] Exception in list_project_files:", e)
         traceback.print_exc()
         raise HTTPException(status_code=500, detail={"code": "INTERNAL_ERROR", "message": str(e)})
 
 
 @router.get("/{project_id}/files/raw")
-def get_project_file_asset(project_id: str, path: str = Query(..., description="File path within the project"), db: Session = Depends(get_db)):
+def get_project_file_asset(
+    project_id: str,
+    path: str = Query(..., description="File path within the project"),
+    db: Session = Depends(get_db),
+):
     project = db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail={"code": "NOT_FOUND"})
 
     segments: list[str] = []
-    for seg in path.split('/'):
-        if not seg or seg == '.':
+    for seg in path.split("/"):
+        if not seg or seg == ".":
             continue
-        if seg == '..':
+        if seg == "..":
             if segments:
                 segments.pop()
             continue
         segments.append(seg)
-    normalized = '/'.join(segments)
-    project_base = os.path.join(settings.data_dir, 'projects', project.slug)
+    normalized = "/".join(segments)
+    project_base = os.path.join(settings.data_dir, "projects", project.slug)
 
     try:
-        abs_path = safe_join(project_base, 'files', normalized)
+        abs_path = safe_join(project_base, "files", normalized)
     except Exception:
         raise HTTPException(status_code=404, detail={"code": "NOT_FOUND"})
 
     if abs_path and os.path.isfile(abs_path):
         mime_type, _ = mimetypes.guess_type(abs_path)
-        resp = FileResponse(abs_path, media_type=mime_type or 'application/octet-stream', filename=os.path.basename(abs_path))
-        resp.headers["Content-Disposition"] = f"inline; filename=\"{os.path.basename(abs_path)}\""
+        resp = FileResponse(
+            abs_path,
+            media_type=mime_type or "application/octet-stream",
+            filename=os.path.basename(abs_path),
+        )
+        resp.headers["Content-Disposition"] = f'inline; filename="{os.path.basename(abs_path)}"'
         return resp
 
     file_row = db.scalar(select(File).where(File.project_id == project_id, File.path == normalized))
     if file_row and file_row.content_md is not None:
-        media_type = 'text/plain; charset=utf-8'
-        if file_row.path.lower().endswith(('.md', '.markdown', '.html')):
-            media_type = 'text/html; charset=utf-8'
+        media_type = "text/plain; charset=utf-8"
+        if file_row.path.lower().endswith((".md", ".markdown", ".html")):
+            media_type = "text/html; charset=utf-8"
         return Response(content=file_row.content_md, media_type=media_type)
 
     raise HTTPException(status_code=404, detail={"code": "NOT_FOUND"})
@@ -1287,7 +1321,9 @@ def get_project_files_tree(
     p = db.get(Project, project_id)
     if not p:
         raise HTTPException(status_code=404, detail={"code": "NOT_FOUND"})
-    include_empty = 1 if int(include_empty_dirs or 0) == 1 and int(settings.dirs_persist or 0) == 1 else 0
+    include_empty = (
+        1 if int(include_empty_dirs or 0) == 1 and int(settings.dirs_persist or 0) == 1 else 0
+    )
     # Build tree from file paths and (optionally) persisted empty directories
     files = db.scalars(select(File).where(File.project_id == project_id)).all()
     root: dict = {"name": "", "path": "", "type": "dir", "children": {}}
@@ -1303,18 +1339,26 @@ def get_project_files_tree(
                 # file node
                 if "children" not in cur:
                     cur["children"] = {}
-                cur["children"].setdefault(seg, {
-                    "name": seg,
-                    "path": "/".join(acc),
-                    "type": "file",
-                    "file_id": f.id,
-                    "title": f.title,
-                })
+                cur["children"].setdefault(
+                    seg,
+                    {
+                        "name": seg,
+                        "path": "/".join(acc),
+                        "type": "file",
+                        "file_id": f.id,
+                        "title": f.title,
+                    },
+                )
             else:
                 if "children" not in cur:
                     cur["children"] = {}
                 if seg not in cur["children"]:
-                    cur["children"][seg] = {"name": seg, "path": "/".join(acc), "type": "dir", "children": {}}
+                    cur["children"][seg] = {
+                        "name": seg,
+                        "path": "/".join(acc),
+                        "type": "dir",
+                        "children": {},
+                    }
                 cur = cur["children"][seg]
 
     # Optionally include persisted empty directories
@@ -1332,7 +1376,12 @@ def get_project_files_tree(
                     if "children" not in cur:
                         cur["children"] = {}
                     if seg not in cur["children"]:
-                        cur["children"][seg] = {"name": seg, "path": "/".join(acc), "type": "dir", "children": {}}
+                        cur["children"][seg] = {
+                            "name": seg,
+                            "path": "/".join(acc),
+                            "type": "dir",
+                            "children": {},
+                        }
                     cur = cur["children"][seg]
     except Exception:
         # If Directory table missing, ignore
@@ -1357,6 +1406,7 @@ def get_project_files_tree(
 
     # Depth limiting: depth=1 returns only top-level items
     if depth and isinstance(depth, int) and depth > 0:
+
         def prune(nodes: list[dict], current_depth: int) -> list[dict]:
             out: list[dict] = []
             for n in nodes:
@@ -1400,10 +1450,7 @@ def list_project_directories(project_id: str, db: Session = Depends(get_db)):
                 existing_updated = entry.get("updated_at")
                 if updated_at and (
                     existing_updated is None
-                    or (
-                        isinstance(existing_updated, dt.datetime)
-                        and updated_at > existing_updated
-                    )
+                    or (isinstance(existing_updated, dt.datetime) and updated_at > existing_updated)
                 ):
                     entry["updated_at"] = updated_at
             else:
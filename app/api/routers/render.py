@@ -2,13 +2,12 @@ from __future__ import annotations
 
 from fastapi import APIRouter
 from pydantic import BaseModel
-from markdown_it import MarkdownIt
 
+from ..services.render import render_cache_stats
+from ..services.render import render_markdown as _render_markdown
 
 router = APIRouter(prefix="/render", tags=["render"])
 
-md = MarkdownIt("commonmark").enable("table").enable("strikethrough")
-
 
 class RenderRequest(BaseModel):
     md: str
@@ -16,6 +15,11 @@ class RenderRequest(BaseModel):
 
 @router.post("/markdown")
 def render_markdown(body: RenderRequest):
-    html = md.render(body.md)
+    html = _render_markdown(body.md)
     return {"html": html}
 
+
+@router.get("/stats")
+def render_stats():
+    return render_cache_stats()
+
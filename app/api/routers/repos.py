@@ -1,31 +1,47 @@
 from __future__ import annotations
 
 import os
-from typing import List
 import time
+from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
+from ..app_logging import get_logger
 from ..db import SessionLocal
-from ..models import Project, Repo
-from ..schemas import RepoCreate, RepoOut, RepoStatus, Branch, CommitEntry
-from ..settings import settings
+from ..events_pub import publish_event
 from ..git_ops import (
-    ensure_repo,
     GitError,
-    repo_status as _repo_status,
-    repo_history as _repo_history,
-    list_branches as _list_branches,
-    create_branch as _create_branch,
+    ensure_repo,
+)
+from ..git_ops import (
     checkout_branch as _checkout_branch,
+)
+from ..git_ops import (
+    create_branch as _create_branch,
+)
+from ..git_ops import (
+    current_branch as _current_branch,
+)
+from ..git_ops import (
+    is_dirty as _is_dirty,
+)
+from ..git_ops import (
+    list_branches as _list_branches,
+)
+from ..git_ops import (
     pull as _pull,
+)
+from ..git_ops import (
     push as _push,
-    is_dirty as _is_dirty,
 )
-from ..events_pub import publish_event
-from ..app_logging import get_logger
-
+from ..git_ops import (
+    repo_history as _repo_history,
+)
+from ..models import Project, Repo
+from ..schemas import Branch, CommitEntry, RepoCreate, RepoOut, RepoStatus
+from ..services.repo_sync import enqueue_fetch, repo_path, sync_target
+from ..settings import settings
 
 logger = get_logger(component="repos.api")
 
@@ -53,9 +69,9 @@ def _repo_fs_path(db: Session, r: Repo) -> str:
         p = db.get(Project, r.project_id)
         if not p:
             raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "Project"})
-        return os.path.join(settings.data_dir, "projects", p.slug, "repos", r.id)
+        return repo_path(p, r)
     else:
-        return os.path.join(settings.data_dir, "repos", r.id)
+        return repo_path(None, r)
 
 
 def _log_repo(action: str, repo: Repo | None, start: float, level: str = "info", **extra: object) -> None:
@@ -139,25 +155,43 @@ def delete_repo(repo_id: str, db: Session = Depends(get_db)):
 
 
 @router.get("/{repo_id}/status", response_model=RepoStatus, dependencies=[Depends(require_git_enabled)])
-def repo_status(repo_id: str, db: Session = Depends(get_db)):
+def repo_status(repo_id: str, refresh: int = 0, db: Session = Depends(get_db)):
+    # ahead/behind come from the worker's periodic fetch; dirty and branch are local reads.
+    # ?refresh=1 queues an immediate fetch instead of fetching inside the request.
     r = db.get(Repo, repo_id)
     if not r:
         raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "Repo"})
     fs_path = _repo_fs_path(db, r)
     start = time.perf_counter()
+    if refresh:
+        enqueue_fetch("repo", r.id)
     try:
-        st = _repo_status(fs_path, r.default_branch)
         dirty = _is_dirty(fs_path)
-        if r.project_id:
-            publish_event(project_id=r.project_id, event_type="repo.status", payload={"repo_id": r.id, **st, "dirty": dirty})
-        _log_repo("repo.status", r, start, ahead=st.get("ahead", 0), behind=st.get("behind", 0), dirty=dirty)
-        return RepoStatus(branch=st.get("branch"), ahead=st.get("ahead", 0), behind=st.get("behind", 0), dirty=dirty)
     except GitError as e:
         _log_repo("repo.status.error", r, start, level="warning", error_code=e.code)
         raise HTTPException(status_code=400, detail={"code": e.code, "message": e.message})
+    _log_repo(
+        "repo.status",
+        r,
+        start,
+        ahead=r.ahead or 0,
+        behind=r.behind or 0,
+        dirty=dirty,
+        refresh=bool(refresh),
+    )
+    return RepoStatus(
+        branch=_current_branch(fs_path) or r.default_branch,
+        ahead=r.ahead or 0,
+        behind=r.behind or 0,
+        dirty=dirty,
+        last_fetched=r.last_fetched_at,
+        fetch_error=r.fetch_error,
+    )
 
 
-@router.get("/{repo_id}/branches", response_model=List[Branch], dependencies=[Depends(require_git_enabled)])
+@router.get(
+    "/{repo_id}/branches", response_model=List[Branch], dependencies=[Depends(require_git_enabled)]
+)
 def repo_branches(repo_id: str, db: Session = Depends(get_db)):
     r = db.get(Repo, repo_id)
     if not r:
@@ -170,7 +204,9 @@ def repo_branches(repo_id: str, db: Session = Depends(get_db)):
 def repo_create_branch(repo_id: str, body: dict, db: Session = Depends(get_db)):
     name = body.get("name") if isinstance(body, dict) else None
     if not name:
-        raise HTTPException(status_code=400, detail={"code": "BAD_REQUEST", "message": "Missing branch name"})
+        raise HTTPException(
+            status_code=400, detail={"code": "BAD_REQUEST", "message": "Missing branch name"}
+        )
     r = db.get(Repo, repo_id)
     if not r:
         raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "Repo"})
@@ -179,7 +215,11 @@ def repo_create_branch(repo_id: str, body: dict, db: Session = Depends(get_db)):
     try:
         _create_branch(fs_path, name, checkout=True)
         if r.project_id:
-            publish_event(project_id=r.project_id, event_type="repo.branch_created", payload={"repo_id": r.id, "name": name})
+            publish_event(
+                project_id=r.project_id,
+                event_type="repo.branch_created",
+                payload={"repo_id": r.id, "name": name},
+            )
         _log_repo("repo.branch_create", r, start, branch=name)
         return {"status": "ok"}
     except GitError as e:
@@ -191,7 +231,9 @@ def repo_create_branch(repo_id: str, body: dict, db: Session = Depends(get_db)):
 def repo_checkout(repo_id: str, body: dict, db: Session = Depends(get_db)):
     name = body.get("name") if isinstance(body, dict) else None
     if not name:
-        raise HTTPException(status_code=400, detail={"code": "BAD_REQUEST", "message": "Missing branch name"})
+        raise HTTPException(
+            status_code=400, detail={"code": "BAD_REQUEST", "message": "Missing branch name"}
+        )
     r = db.get(Repo, repo_id)
     if not r:
         raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": "Repo"})
@@ -200,7 +242,11 @@ def repo_checkout(repo_id: str, body: dict, db: Session = Depends(get_db)):
     try:
         _checkout_branch(fs_path, name)
         if r.project_id:
-            publish_event(project_id=r.project_id, event_type="repo.checkout", payload={"repo_id": r.id, "name": name})
+            publish_event(
+                project_id=r.project_id,
+                event_type="repo.checkout",
+                payload={"repo_id": r.id, "name": name},
+            )
         _log_repo("repo.checkout", r, start, branch=name)
         return {"status": "ok"}
     except GitError as e:
@@ -217,8 +263,11 @@ def repo_pull(repo_id: str, db: Session = Depends(get_db)):
     start = time.perf_counter()
     try:
         res = _pull(fs_path)
+        sync_target(db, r, fetch=False)
         if r.project_id:
-            publish_event(project_id=r.project_id, event_type="repo.pull", payload={"repo_id": r.id, **res})
+            publish_event(
+                project_id=r.project_id, event_type="repo.pull", payload={"repo_id": r.id, **res}
+            )
         _log_repo("repo.pull", r, start)
         return res
     except GitError as e:
@@ -235,8 +284,11 @@ def repo_push(repo_id: str, db: Session = Depends(get_db)):
     start = time.perf_counter()
     try:
         res = _push(fs_path)
+        sync_target(db, r, fetch=False)
         if r.project_id:
-            publish_event(project_id=r.project_id, event_type="repo.push", payload={"repo_id": r.id, **res})
+            publish_event(
+                project_id=r.project_id, event_type="repo.push", payload={"repo_id": r.id, **res}
+            )
         _log_repo("repo.push", r, start)
         return res
     except GitError as e:
@@ -244,7 +296,11 @@ def repo_push(repo_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail={"code": e.code, "message": e.message})
 
 
-@router.get("/{repo_id}/history", response_model=List[CommitEntry], dependencies=[Depends(require_git_enabled)])
+@router.get(
+    "/{repo_id}/history",
+    response_model=List[CommitEntry],
+    dependencies=[Depends(require_git_enabled)],
+)
 def repo_history(repo_id: str, limit: int = 20, db: Session = Depends(get_db)):
     r = db.get(Repo, repo_id)
     if not r:
@@ -10,11 +10,10 @@ from ..app_logging import get_logger
 from ..db import SessionLocal, engine
 from ..models import SavedSearch
 from ..schemas import SavedSearchCreate, SavedSearchRead
-from ..search import SearchQuery, get_search_service
+from ..search import SearchQuery, get_search_service, match_file_paths
 from ..services.tagging import get_tag_usage
 from ..settings import settings
 
-
 router = APIRouter(prefix="/search", tags=["search"])
 log = get_logger(component="search")
 
@@ -140,6 +139,30 @@ def search(  # noqa: PLR0913 — endpoint parameters
     return payload
 
 
+@router.get("/suggest")
+def suggest(q: str = "", limit: int = 8, project_slug: str | None = None) -> dict[str, Any]:
+    service = get_search_service(engine)
+    return {"items": service.suggest(q, limit=limit, project_slug=project_slug)}
+
+
+@router.get("/paths")
+def suggest_paths(q: str = "", project_id: str | None = None, limit: int = 20) -> dict[str, Any]:
+    limit = max(1, min(limit, 50))
+    with engine.connect() as conn:
+        matches = match_file_paths(conn, q, project_id=project_id, limit=limit)
+    return {
+        "items": [
+            {
+                "file_id": m["file_id"],
+                "project_id": m["project_id"],
+                "path": m["path"],
+                "title": m["title"],
+            }
+            for m in matches
+        ]
+    }
+
+
 @router.get("/saved", response_model=list[SavedSearchRead])
 def list_saved_searches(db: Session = Depends(_get_db)):
     rows = db.query(SavedSearch).order_by(SavedSearch.created_at.desc()).all()
@@ -148,7 +171,9 @@ def list_saved_searches(db: Session = Depends(_get_db)):
 
 @router.post("/saved", response_model=SavedSearchRead, status_code=201)
 def create_saved_search(body: SavedSearchCreate, db: Session = Depends(_get_db)):
-    s = SavedSearch(name=body.name, owner="default", query=body.query or "", filters=body.filters or {})
+    s = SavedSearch(
+        name=body.name, owner="default", query=body.query or "", filters=body.filters or {}
+    )
     db.add(s)
     db.commit()
     db.refresh(s)
@@ -182,3 +207,13 @@ def rebuild_index() -> dict[str, Any]:
     q = _rq.Queue("default", connection=_redis.from_url(settings.redis_url))
     job = q.enqueue("worker.jobs.search_jobs.reindex_all", job_timeout=600)
     return {"job_id": job.id}
+
+
+@router.post("/index/projects/rebuild")
+def rebuild_project_index() -> dict[str, Any]:
+    import redis as _redis
+    import rq as _rq
+
+    q = _rq.Queue("default", connection=_redis.from_url(settings.redis_url))
+    job = q.enqueue("worker.jobs.search_jobs.reindex_projects", job_timeout=600)
+    return {"job_id": job.id}
@@ -9,12 +9,12 @@ import redis
 from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 
-from ..db import SessionLocal
-from ..models import Project, ShareLink, File
+from ..app_logging import get_logger
+from ..db import SessionLocal, engine
+from ..models import File, Project, ShareLink
 from ..schemas import ShareLinkCreate, ShareLinkRead
+from ..search import match_file_paths
 from ..settings import settings
-from ..app_logging import get_logger
-
 
 router = APIRouter(tags=["sharing"])
 logger = get_logger(component="sharing.api")
@@ -152,10 +152,20 @@ def public_files(request: Request, token: str, path: str | None = None, db: Sess
     if not _rate_limit_ok(ip, token):
         raise HTTPException(status_code=429, detail={"code": "RATE_LIMIT"})
     sl = _get_share(db, token)
-    q = db.query(File).filter(File.project_id == sl.project_id)
     if path:
-        q = q.filter(File.path.like(path.rstrip("/") + "%"))
-    rows = q.with_entities(File.id, File.title, File.path).all()
+        # Prefix lookup through the trigram path index instead of an unindexed LIKE over files
+        with engine.connect() as conn:
+            matches = match_file_paths(
+                conn, path.rstrip("/"), project_id=sl.project_id, prefix=True
+            )
+        rows = [(m["file_id"], m["title"], m["path"]) for m in matches]
+    else:
+        rows = (
+            db.query(File)
+            .filter(File.project_id == sl.project_id)
+            .with_entities(File.id, File.title, File.path)
+            .all()
+        )
     logger.info(
         "share.public.files",
         share_id=sl.id,
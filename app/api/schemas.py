@@ -95,7 +95,7 @@ class ProjectCardRead(BaseModel):
 class ProjectListResponse(BaseModel):
     projects: list[ProjectCardRead]
     next_cursor: str | None = None
-    total: int = 0
+    total: int | None = None
     limit: int = 0
     view: str = "all"
     filters: dict[str, Any] = Field(default_factory=dict)
@@ -224,6 +224,7 @@ class ArtifactsStatus(BaseModel):
     ahead: int
     behind: int
     last_sync: dt.datetime | None
+    last_fetched: dt.datetime | None = None
 
 
 class CommitEntry(BaseModel):
@@ -240,6 +241,33 @@ class LinkInfo(BaseModel):
     resolved: bool
 
 
+class LinkGraphNode(BaseModel):
+    file_id: str
+    title: str
+    path: str
+    distance: int | None = None
+    in_degree: int | None = None
+
+
+class LinkGraphEdge(BaseModel):
+    src_file_id: str
+    target_file_id: str
+
+
+class LinkGraphNeighborhood(BaseModel):
+    file_id: str
+    depth: int
+    direction: Literal["out", "in", "both"]
+    nodes: list[LinkGraphNode] = Field(default_factory=list)
+    edges: list[LinkGraphEdge] = Field(default_factory=list)
+    truncated: bool = False
+
+
+class LinkGraphNodeList(BaseModel):
+    items: list[LinkGraphNode] = Field(default_factory=list)
+    total: int = 0
+
+
 class MoveFileRequest(BaseModel):
     new_path: str | None = None
     new_title: str | None = None
@@ -473,6 +501,8 @@ class RepoStatus(BaseModel):
     ahead: int
     behind: int
     dirty: bool
+    last_fetched: dt.datetime | None = None
+    fetch_error: str | None = None
 
 
 class Branch(BaseModel):
@@ -560,6 +590,40 @@ class FilesBatchMoveResult(BaseModel):
     dirs_count: int = 0
 
 
+class FileBatchOperation(BaseModel):
+    op: Literal["create", "update"] = "create"
+    project_id: str | None = None  # required for create
+    file_id: str | None = None  # required for update
+    path: str
+    content_md: str
+    title: str | None = None
+    tags: list[str] | None = None
+    front_matter: dict[str, Any] | None = None
+    template_id: str | None = None
+    rewrite_links: bool = True
+
+
+class FilesBatchWriteRequest(BaseModel):
+    items: list[FileBatchOperation] = Field(default_factory=list)
+
+
+class FileBatchItemResult(BaseModel):
+    index: int
+    op: str
+    status: Literal["created", "updated", "error"]
+    file_id: str | None = None
+    project_id: str | None = None
+    path: str | None = None
+    error: dict[str, str] | None = None
+
+
+class FilesBatchWriteResult(BaseModel):
+    results: list[FileBatchItemResult] = Field(default_factory=list)
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+
+
 # Phase 4 — Import/Export
 class ProjectExportSelection(BaseModel):
     file_ids: list[str] = Field(default_factory=list)
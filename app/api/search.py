@@ -1,18 +1,181 @@
 from __future__ import annotations
 
+import base64
 import datetime as dt
-from collections import Counter
+import json
+import re
+import time
+from collections import Counter, OrderedDict
 from dataclasses import dataclass
-from typing import Any, Iterable, Literal
+from threading import Lock
+from typing import Any, Callable, Iterable, Literal, Sequence
 
-from sqlalchemy import TextClause, func, text
+from sqlalchemy import TextClause, bindparam, func, text
 from sqlalchemy.engine import Connection, Engine
 
+from .services.frontmatter import strip_front_matter
 from .utils import slugify
 
+SEARCH_INDEX_TABLE = "search_index"
+SEARCH_INDEX_SHADOW_TABLE = "search_index_shadow"
+# One-row counter behind the suggest/facet cache keys (see bump_search_index_generation)
+SEARCH_STATE_TABLE = "search_index_state"
+SEARCH_INDEX_COLUMNS = (
+    "file_id",
+    "project_id",
+    "project_slug",
+    "project_name",
+    "title",
+    "body",
+    "path",
+    "tags",
+    "language",
+    "updated_at",
+    "is_archived",
+    "project_status",
+)
 
-def _fts_columns(conn: Connection) -> list[str]:
-    rows = conn.exec_driver_sql("PRAGMA table_info('search_index')").fetchall()
+
+def create_search_index(conn: Connection, table: str = SEARCH_INDEX_TABLE) -> None:
+    conn.exec_driver_sql(
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(
+            file_id UNINDEXED,
+            project_id UNINDEXED,
+            project_slug UNINDEXED,
+            project_name UNINDEXED,
+            title,
+            body,
+            path,
+            tags,
+            language,
+            updated_at UNINDEXED,
+            is_archived UNINDEXED,
+            project_status UNINDEXED
+        );
+        """
+    )
+
+
+SUGGEST_INDEX_TABLE = "file_suggest_index"
+
+
+def create_suggest_index(conn: Connection) -> None:
+    # Narrow title/path/tags index with prefix b-trees for palette typeahead
+    conn.exec_driver_sql(
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {SUGGEST_INDEX_TABLE} USING fts5(
+            file_id UNINDEXED,
+            project_slug UNINDEXED,
+            is_archived UNINDEXED,
+            title,
+            path,
+            tags,
+            prefix='2 3 4'
+        );
+        """
+    )
+
+
+def rebuild_suggest_index(conn: Connection) -> None:
+    conn.exec_driver_sql(f"DELETE FROM {SUGGEST_INDEX_TABLE}")
+    conn.exec_driver_sql(
+        f"""
+        INSERT INTO {SUGGEST_INDEX_TABLE} (file_id, project_slug, is_archived, title, path, tags)
+        SELECT file_id, project_slug, is_archived, title, path, tags FROM {SEARCH_INDEX_TABLE}
+        """
+    )
+
+
+PATH_INDEX_TABLE = "file_path_index"
+
+
+def create_path_index(conn: Connection) -> None:
+    # Trigram tokens make substring matches on paths/titles index lookups (needs SQLite 3.34+)
+    conn.exec_driver_sql(
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {PATH_INDEX_TABLE} USING fts5(
+            file_id UNINDEXED,
+            project_id UNINDEXED,
+            path,
+            title,
+            tokenize='trigram'
+        );
+        """
+    )
+
+
+def rebuild_path_index(conn: Connection) -> None:
+    conn.exec_driver_sql(f"DELETE FROM {PATH_INDEX_TABLE}")
+    conn.exec_driver_sql(
+        f"""
+        INSERT INTO {PATH_INDEX_TABLE} (file_id, project_id, path, title)
+        SELECT file_id, project_id, path, title FROM {SEARCH_INDEX_TABLE}
+        """
+    )
+
+
+def match_file_paths(
+    conn: Connection,
+    needle: str,
+    project_id: str | None = None,
+    prefix: bool = False,
+    limit: int | None = None,
+) -> list[dict[str, Any]]:
+    """Files whose path (or title) contains ``needle``.
+
+    ``prefix=True`` matches path prefixes only.
+    """
+    cleaned = needle.strip()
+    if not cleaned:
+        return []
+    params: dict[str, Any] = {}
+    clauses: list[str] = []
+    if prefix:
+        params["pattern"] = f"{cleaned}%"
+        clauses.append("path LIKE :pattern")
+    elif len(cleaned) >= 3:
+        params["match"] = '"' + cleaned.replace('"', '""') + '"'
+        clauses.append("file_path_index MATCH :match")
+    else:
+        # Trigrams need three characters; shorter needles scan the narrow path table instead
+        params["pattern"] = f"%{cleaned}%"
+        clauses.append("(path LIKE :pattern OR title LIKE :pattern)")
+    if project_id:
+        params["project_id"] = project_id
+        clauses.append("project_id = :project_id")
+    sql = (
+        "SELECT file_id, project_id, path, title FROM file_path_index "
+        f"WHERE {' AND '.join(clauses)} ORDER BY path ASC"
+    )
+    if limit is not None:
+        params["limit"] = limit
+        sql += " LIMIT :limit"
+    rows = conn.execute(text(sql), params).mappings().all()
+    return [dict(row) for row in rows]
+
+
+def build_search_blob(title: str, body: str, front_matter: dict[str, Any] | None) -> str:
+    fm_parts: list[str] = []
+    for value in (front_matter or {}).values():
+        if isinstance(value, (str, int, float)):
+            fm_parts.append(str(value))
+        elif isinstance(value, (list, tuple, set)):
+            for item in value:
+                if isinstance(item, (str, int, float)):
+                    fm_parts.append(str(item))
+                elif isinstance(item, dict):
+                    fm_parts.extend(
+                        str(v) for v in item.values() if isinstance(v, (str, int, float))
+                    )
+        elif isinstance(value, dict):
+            fm_parts.extend(str(v) for v in value.values() if isinstance(v, (str, int, float)))
+    fm_text = "\n".join(fm_parts)
+    return "\n".join(filter(None, [title, fm_text, body]))
+
+
+def _fts_columns(conn: Connection, table: str = SEARCH_INDEX_TABLE) -> list[str]:
+    rows = conn.exec_driver_sql(f"PRAGMA table_info('{table}')").fetchall()
     return [r[1] for r in rows]
 
 
@@ -71,12 +234,7 @@ def _fetch_file_metadata(conn: Connection, file_id: str) -> dict[str, Any] | Non
     row = conn.execute(sql, {"fid": file_id}).mappings().first()
     if not row:
         return None
-    tags_text = row.get("tag_slugs") or ""
-    unique_slugs = []
-    for token in tags_text.split(","):
-        slug = token.strip()
-        if slug and slug not in unique_slugs:
-            unique_slugs.append(slug)
+    unique_slugs = _split_tag_slugs(row.get("tag_slugs"))
     return {
         "file_id": row.get("file_id"),
         "path": row.get("path") or "",
@@ -91,19 +249,31 @@ def _fetch_file_metadata(conn: Connection, file_id: str) -> dict[str, Any] | Non
     }
 
 
-def index_file(conn: Connection, file_id: str, content_text: str, title: str | None = None, path: str | None = None) -> None:
-    cols = _fts_columns(conn)
-    conn.execute(text("DELETE FROM search_index WHERE file_id = :fid"), {"fid": file_id})
-    metadata = _fetch_file_metadata(conn, file_id)
-    if metadata is None:
-        return
+def _split_tag_slugs(raw: str | None) -> list[str]:
+    unique_slugs: list[str] = []
+    for token in (raw or "").split(","):
+        slug = token.strip()
+        if slug and slug not in unique_slugs:
+            unique_slugs.append(slug)
+    return unique_slugs
+
+
+def _build_index_row(
+    file_id: str,
+    metadata: dict[str, Any],
+    content_text: str,
+    title: str | None = None,
+    path: str | None = None,
+) -> dict[str, Any]:
     resolved_title = title or metadata.get("title") or ""
     resolved_path = path or metadata.get("path") or ""
     language = _detect_language(resolved_path)
     tags_blob = " " + " ".join(metadata.get("tags", [])) + " " if metadata.get("tags") else ""
     updated_at = metadata.get("updated_at")
-    updated_iso = updated_at.isoformat() if isinstance(updated_at, dt.datetime) else (updated_at or "")
-    row = {
+    updated_iso = (
+        updated_at.isoformat() if isinstance(updated_at, dt.datetime) else (updated_at or "")
+    )
+    return {
         "fid": file_id,
         "project_id": metadata.get("project_id"),
         "project_slug": metadata.get("project_slug"),
@@ -117,46 +287,386 @@ def index_file(conn: Connection, file_id: str, content_text: str, title: str | N
         "is_archived": "1" if metadata.get("is_archived") else "0",
         "project_status": metadata.get("project_status"),
     }
+
+
+def _insert_sql(table: str = SEARCH_INDEX_TABLE) -> TextClause:
+    return text(
+        f"""
+        INSERT INTO {table} (
+            file_id,
+            project_id,
+            project_slug,
+            project_name,
+            title,
+            body,
+            path,
+            tags,
+            language,
+            updated_at,
+            is_archived,
+            project_status
+        ) VALUES (
+            :fid,
+            :project_id,
+            :project_slug,
+            :project_name,
+            :title,
+            :body,
+            :path,
+            :tags,
+            :language,
+            :updated_at,
+            :is_archived,
+            :project_status
+        )
+        """
+    )
+
+
+def index_file(
+    conn: Connection,
+    file_id: str,
+    content_text: str,
+    title: str | None = None,
+    path: str | None = None,
+) -> None:
+    cols = _fts_columns(conn)
+    conn.execute(text("DELETE FROM search_index WHERE file_id = :fid"), {"fid": file_id})
+    conn.execute(text("DELETE FROM file_suggest_index WHERE file_id = :fid"), {"fid": file_id})
+    conn.execute(text("DELETE FROM file_path_index WHERE file_id = :fid"), {"fid": file_id})
+    metadata = _fetch_file_metadata(conn, file_id)
+    if metadata is None:
+        bump_search_index_generation(conn)
+        return
+    row = _build_index_row(file_id, metadata, content_text, title=title, path=path)
     if {"body", "title", "project_id"}.issubset(cols):
+        conn.execute(_insert_sql(), row)
         conn.execute(
             text(
                 """
-                INSERT INTO search_index (
-                    file_id,
-                    project_id,
-                    project_slug,
-                    project_name,
-                    title,
-                    body,
-                    path,
-                    tags,
-                    language,
-                    updated_at,
-                    is_archived,
-                    project_status
-                ) VALUES (
-                    :fid,
-                    :project_id,
-                    :project_slug,
-                    :project_name,
-                    :title,
-                    :body,
-                    :path,
-                    :tags,
-                    :language,
-                    :updated_at,
-                    :is_archived,
-                    :project_status
-                )
+                INSERT INTO file_suggest_index
+                    (file_id, project_slug, is_archived, title, path, tags)
+                VALUES (:fid, :project_slug, :is_archived, :title, :path, :tags)
                 """
             ),
             row,
         )
+        conn.execute(
+            text(
+                "INSERT INTO file_path_index (file_id, project_id, path, title) "
+                "VALUES (:fid, :project_id, :path, :title)"
+            ),
+            row,
+        )
     else:
         conn.execute(
             text("INSERT INTO search_index (file_id, content_text) VALUES (:fid, :ct)"),
             {"fid": file_id, "ct": content_text},
         )
+    bump_search_index_generation(conn)
+
+
+def index_files(
+    conn: Connection, entries: Sequence[tuple[str, str, str | None, str | None]]
+) -> int:
+    """Bulk form of index_file for ``(file_id, content_text, title, path)`` entries.
+
+    Metadata is read with one query per table and the index tables are written with
+    executemany, so a batch of N files costs a constant number of statements.
+    """
+    if not entries:
+        return 0
+    file_ids = [entry[0] for entry in entries]
+    params = [{"fid": fid} for fid in file_ids]
+    for table in (SEARCH_INDEX_TABLE, "file_suggest_index", "file_path_index"):
+        conn.execute(text(f"DELETE FROM {table} WHERE file_id = :fid"), params)
+    file_rows = {
+        row["id"]: row
+        for row in conn.execute(
+            text(
+                "SELECT id, project_id, title, path, updated_at FROM files WHERE id IN :ids"
+            ).bindparams(bindparam("ids", expanding=True)),
+            {"ids": file_ids},
+        ).mappings()
+    }
+    projects = _fetch_project_index_metadata(
+        conn, {row["project_id"] for row in file_rows.values()}
+    )
+    rows: list[dict[str, Any]] = []
+    for file_id, content_text, title, path in entries:
+        file_row = file_rows.get(file_id)
+        project_meta = projects.get(file_row["project_id"]) if file_row else None
+        if project_meta is None:
+            continue
+        metadata = dict(
+            project_meta,
+            title=file_row["title"] or "",
+            path=file_row["path"] or "",
+            updated_at=file_row["updated_at"],
+        )
+        rows.append(_build_index_row(file_id, metadata, content_text, title=title, path=path))
+    if rows:
+        if {"body", "title", "project_id"}.issubset(_fts_columns(conn)):
+            conn.execute(_insert_sql(), rows)
+            conn.execute(
+                text(
+                    """
+                    INSERT INTO file_suggest_index
+                        (file_id, project_slug, is_archived, title, path, tags)
+                    VALUES (:fid, :project_slug, :is_archived, :title, :path, :tags)
+                    """
+                ),
+                rows,
+            )
+            conn.execute(
+                text(
+                    "INSERT INTO file_path_index (file_id, project_id, path, title) "
+                    "VALUES (:fid, :project_id, :path, :title)"
+                ),
+                rows,
+            )
+        else:
+            conn.execute(
+                text("INSERT INTO search_index (file_id, content_text) VALUES (:fid, :body)"),
+                rows,
+            )
+    bump_search_index_generation(conn)
+    return len(rows)
+
+
+def reindex_moved_prefix(conn: Connection, project_id: str, prefix: str) -> None:
+    """Point index rows of the files at or under ``prefix`` in ``project_id`` at their new place.
+
+    Paths are copied from ``files`` and project columns from ``project_id`` with one UPDATE per
+    index table; bodies are left as indexed, so a bulk move never re-reads file content.
+    """
+    project = _fetch_project_index_metadata(conn, [project_id]).get(project_id)
+    if project is None or not {"body", "title", "project_id"}.issubset(_fts_columns(conn)):
+        return
+    params = {
+        "pid": project_id,
+        "prefix": prefix,
+        "lo": prefix + "/",
+        # "0" sorts right after "/", so [prefix/, prefix0) is exactly the subtree
+        "hi": prefix + "0",
+        "language": _detect_language(prefix),
+        "project_slug": project["project_slug"],
+        "project_name": project["project_name"],
+        "tags": " " + " ".join(project["tags"]) + " " if project["tags"] else "",
+        "is_archived": "1" if project["is_archived"] else "0",
+        "project_status": project["project_status"],
+    }
+    moved = (
+        "SELECT id FROM files"
+        " WHERE project_id = :pid AND (path = :prefix OR (path >= :lo AND path < :hi))"
+    )
+    conn.execute(
+        text(
+            f"""
+            UPDATE {SEARCH_INDEX_TABLE} SET
+                path = (SELECT f.path FROM files f WHERE f.id = {SEARCH_INDEX_TABLE}.file_id),
+                -- Only a file moved as the prefix itself can change extension
+                language = CASE
+                    WHEN file_id IN (SELECT id FROM files WHERE project_id = :pid AND path = :prefix)
+                    THEN :language ELSE language END,
+                project_id = :pid,
+                project_slug = :project_slug,
+                project_name = :project_name,
+                tags = :tags,
+                is_archived = :is_archived,
+                project_status = :project_status
+            WHERE file_id IN ({moved})
+            """
+        ),
+        params,
+    )
+    conn.execute(
+        text(
+            f"""
+            UPDATE {SUGGEST_INDEX_TABLE} SET
+                path = (SELECT f.path FROM files f WHERE f.id = {SUGGEST_INDEX_TABLE}.file_id),
+                project_slug = :project_slug,
+                is_archived = :is_archived
+            WHERE file_id IN ({moved})
+            """
+        ),
+        params,
+    )
+    conn.execute(
+        text(
+            f"""
+            UPDATE {PATH_INDEX_TABLE} SET
+                path = (SELECT f.path FROM files f WHERE f.id = {PATH_INDEX_TABLE}.file_id),
+                project_id = :pid
+            WHERE file_id IN ({moved})
+            """
+        ),
+        params,
+    )
+    bump_search_index_generation(conn)
+
+
+ProgressCallback = Callable[[dict[str, Any]], None]
+
+_BULK_FILE_COLUMNS_SQL = (
+    "SELECT id, project_id, title, path, front_matter, content_md, updated_at FROM files"
+)
+
+
+def _fetch_project_index_metadata(
+    conn: Connection, project_ids: Iterable[str] | None = None
+) -> dict[str, dict[str, Any]]:
+    where = "WHERE p.id IN :ids" if project_ids is not None else ""
+    sql = text(
+        f"""
+        SELECT p.id as project_id,
+               p.slug as project_slug,
+               p.name as project_name,
+               p.is_archived as is_archived,
+               p.status as project_status,
+               GROUP_CONCAT(DISTINCT t.slug) as tag_slugs
+        FROM projects p
+        LEFT JOIN project_tags pt ON pt.project_id = p.id
+        LEFT JOIN tags t ON t.id = pt.tag_id
+        {where}
+        GROUP BY p.id
+        """
+    )
+    if project_ids is not None:
+        ids = list(project_ids)
+        if not ids:
+            return {}
+        rows = conn.execute(
+            sql.bindparams(bindparam("ids", expanding=True)), {"ids": ids}
+        ).mappings()
+    else:
+        rows = conn.execute(sql).mappings()
+    out: dict[str, dict[str, Any]] = {}
+    for row in rows:
+        out[row["project_id"]] = {
+            "project_id": row.get("project_id"),
+            "project_slug": row.get("project_slug") or "",
+            "project_name": row.get("project_name") or "",
+            "is_archived": bool(row.get("is_archived")),
+            "project_status": row.get("project_status") or "",
+            "tags": _split_tag_slugs(row.get("tag_slugs")),
+        }
+    return out
+
+
+def _bulk_index_rows(
+    file_rows: Iterable[Any], projects: dict[str, dict[str, Any]]
+) -> list[dict[str, Any]]:
+    out: list[dict[str, Any]] = []
+    for file_id, project_id, title, path, front_matter_raw, content_md, updated_at in file_rows:
+        project_meta = projects.get(project_id)
+        if project_meta is None:
+            continue
+        try:
+            front_matter = json.loads(front_matter_raw) if front_matter_raw else {}
+        except (TypeError, ValueError):
+            front_matter = {}
+        if not isinstance(front_matter, dict):
+            front_matter = {}
+        metadata = dict(project_meta, title=title or "", path=path or "", updated_at=updated_at)
+        blob = build_search_blob(title or "", strip_front_matter(content_md or ""), front_matter)
+        out.append(_build_index_row(file_id, metadata, blob))
+    return out
+
+
+def _swap_search_index(conn: Connection) -> None:
+    # DROP + RENAME inside one IMMEDIATE transaction: readers see the old index or the new one,
+    # never neither.
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+    try:
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {SEARCH_INDEX_TABLE}")
+        conn.exec_driver_sql(
+            f"ALTER TABLE {SEARCH_INDEX_SHADOW_TABLE} RENAME TO {SEARCH_INDEX_TABLE}"
+        )
+        bump_search_index_generation(conn)
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def rebuild_search_index(
+    engine: Engine,
+    batch_size: int = 500,
+    progress: ProgressCallback | None = None,
+) -> dict[str, Any]:
+    """Rebuild ``search_index`` into a shadow FTS table and swap it in atomically.
+
+    Files are read in keyset pages of ``batch_size`` and each page is written to the shadow
+    table with one ``executemany`` in its own short transaction, so file saves only wait for
+    one page at a time. Project/tag metadata is prefetched in one join. Search keeps serving
+    the previous index until the swap, and files written during the build are re-indexed
+    right after it.
+    """
+    batch_size = max(1, int(batch_size))
+    started = time.perf_counter()
+    # files.updated_at is stored as naive UTC text; compare in the same format.
+    since = dt.datetime.now(tz=dt.timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
+    insert_shadow = _insert_sql(SEARCH_INDEX_SHADOW_TABLE)
+    page_sql = text(f"{_BULK_FILE_COLUMNS_SQL} WHERE id > :after ORDER BY id LIMIT :limit")
+    stats: dict[str, Any] = {"phase": "indexing", "rows": 0, "total": 0, "rows_per_sec": 0.0}
+
+    def _report(phase: str) -> None:
+        elapsed = max(time.perf_counter() - started, 1e-6)
+        stats["phase"] = phase
+        stats["elapsed_ms"] = int(elapsed * 1000)
+        stats["rows_per_sec"] = round(stats["rows"] / elapsed, 1)
+        if progress is not None:
+            progress(dict(stats))
+
+    with engine.begin() as conn:
+        stats["total"] = int(conn.execute(text("SELECT COUNT(*) FROM files")).scalar() or 0)
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {SEARCH_INDEX_SHADOW_TABLE}")
+        create_search_index(conn, SEARCH_INDEX_SHADOW_TABLE)
+        projects = _fetch_project_index_metadata(conn)
+    _report("indexing")
+
+    after = ""
+    while True:
+        with engine.begin() as conn:
+            page = conn.execute(page_sql, {"after": after, "limit": batch_size}).all()
+            if not page:
+                break
+            rows = _bulk_index_rows(page, projects)
+            if rows:
+                conn.execute(insert_shadow, rows)
+        after = page[-1][0]
+        stats["rows"] += len(rows)
+        _report("indexing")
+
+    _report("swapping")
+    with engine.connect() as conn:
+        _swap_search_index(conn)
+
+    with engine.begin() as conn:
+        projects = _fetch_project_index_metadata(conn)
+        changed = conn.execute(
+            text(f"{_BULK_FILE_COLUMNS_SQL} WHERE updated_at >= :since"), {"since": since}
+        ).all()
+        catch_up = _bulk_index_rows(changed, projects)
+        for row in catch_up:
+            conn.execute(text("DELETE FROM search_index WHERE file_id = :fid"), {"fid": row["fid"]})
+        if catch_up:
+            conn.execute(_insert_sql(), catch_up)
+        conn.execute(text("DELETE FROM search_index WHERE file_id NOT IN (SELECT id FROM files)"))
+        rebuild_suggest_index(conn)
+        rebuild_path_index(conn)
+        bump_search_index_generation(conn)
+    stats["catch_up"] = len(catch_up)
+    _report("done")
+    return {
+        "status": "ok",
+        "rows": stats["rows"],
+        "total": stats["total"],
+        "catch_up": stats["catch_up"],
+        "rows_per_sec": stats["rows_per_sec"],
+        "duration_ms": stats["elapsed_ms"],
+    }
 
 
 @dataclass
@@ -195,10 +705,306 @@ class SearchResponse:
     next_cursor: str | None
 
 
+PROJECT_SEARCH_INDEX_TABLE = "project_search_index"
+PROJECT_SEARCH_INDEX_COLUMNS = ("project_id", "name", "description", "tags", "groups")
+
+_PROJECT_INDEX_SOURCE_SQL = """
+    SELECT p.id as project_id,
+           p.name as name,
+           coalesce(p.description, '') as description,
+           coalesce((SELECT GROUP_CONCAT(t.label, ' ')
+                     FROM project_tags pt JOIN tags t ON t.id = pt.tag_id
+                     WHERE pt.project_id = p.id), '') as tags,
+           coalesce((SELECT GROUP_CONCAT(g.name, ' ')
+                     FROM project_group_memberships m JOIN project_groups g ON g.id = m.group_id
+                     WHERE m.project_id = p.id), '') as groups
+    FROM projects p
+"""
+
+
+def create_project_search_index(conn: Connection) -> None:
+    conn.exec_driver_sql(
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {PROJECT_SEARCH_INDEX_TABLE} USING fts5(
+            project_id UNINDEXED,
+            name,
+            description,
+            tags,
+            groups,
+            prefix='2 3'
+        );
+        """
+    )
+
+
+def index_project(conn: Connection, project_id: str) -> None:
+    conn.execute(
+        text("DELETE FROM project_search_index WHERE project_id = :pid"), {"pid": project_id}
+    )
+    conn.execute(
+        text(
+            f"""
+            INSERT INTO project_search_index (project_id, name, description, tags, groups)
+            {_PROJECT_INDEX_SOURCE_SQL}
+            WHERE p.id = :pid
+            """
+        ),
+        {"pid": project_id},
+    )
+
+
+def index_group_projects(conn: Connection, group_id: str) -> None:
+    rows = conn.execute(
+        text("SELECT project_id FROM project_group_memberships WHERE group_id = :gid"),
+        {"gid": group_id},
+    ).all()
+    for row in rows:
+        index_project(conn, row[0])
+
+
+def remove_project_from_index(conn: Connection, project_id: str) -> None:
+    conn.execute(
+        text("DELETE FROM project_search_index WHERE project_id = :pid"), {"pid": project_id}
+    )
+
+
+def rebuild_project_search_index(engine: Engine) -> dict[str, Any]:
+    started = time.perf_counter()
+    # Projects are few; one transaction keeps readers on the old rows until commit
+    with engine.begin() as conn:
+        create_project_search_index(conn)
+        conn.execute(text("DELETE FROM project_search_index"))
+        conn.execute(
+            text(
+                f"""
+                INSERT INTO project_search_index (project_id, name, description, tags, groups)
+                {_PROJECT_INDEX_SOURCE_SQL}
+                """
+            )
+        )
+        rows = int(conn.execute(text("SELECT COUNT(*) FROM project_search_index")).scalar() or 0)
+    return {
+        "status": "ok",
+        "rows": rows,
+        "duration_ms": int((time.perf_counter() - started) * 1000),
+    }
+
+
+def _project_match_expression(raw: str) -> str:
+    # Palette queries are typed incrementally; quote each token and prefix-match it
+    tokens = re.findall(r"\w+", raw.lower())
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def bump_search_index_generation(conn: Connection) -> None:
+    """Invalidate cached suggest/facet results.
+
+    Runs in the transaction that writes the index, so the new generation becomes visible
+    together with the rows it describes, to this process and to every other one.
+    """
+    conn.exec_driver_sql(
+        f"UPDATE {SEARCH_STATE_TABLE} SET generation = generation + 1 WHERE id = 1"
+    )
+
+
+def search_index_generation(conn: Connection) -> int:
+    # Read before the cached query runs: a result is never stored under a newer generation
+    # than its data
+    generation = conn.exec_driver_sql(
+        f"SELECT generation FROM {SEARCH_STATE_TABLE} WHERE id = 1"
+    ).scalar()
+    return int(generation or 0)
+
+
+def remove_from_index(conn: Connection, file_id: str) -> None:
+    conn.execute(text("DELETE FROM search_index WHERE file_id = :fid"), {"fid": file_id})
+    conn.execute(text("DELETE FROM file_suggest_index WHERE file_id = :fid"), {"fid": file_id})
+    conn.execute(text("DELETE FROM file_path_index WHERE file_id = :fid"), {"fid": file_id})
+    bump_search_index_generation(conn)
+
+
+_SUGGEST_CACHE: "OrderedDict[tuple[Any, ...], list[dict[str, Any]]]" = OrderedDict()
+_SUGGEST_CACHE_LOCK = Lock()
+_SUGGEST_CACHE_MAX = 512
+
+
+def _suggest_match_expression(raw: str) -> str:
+    # Single characters are not covered by prefix='2 3 4' and would scan the whole token list
+    tokens = [token for token in re.findall(r"\w+", raw.lower()) if len(token) >= 2]
+    if not tokens:
+        return ""
+    # Every token is a prefix; only the last one is still being typed, but prefix-matching
+    # all of them is cheap here
+    return "{title path tags} : " + " ".join(f'"{token}"*' for token in tokens)
+
+
+_FACET_CACHE: dict[tuple[Any, ...], dict[str, list[dict[str, Any]]]] = {}
+_FACET_CACHE_LOCK = Lock()
+_FACET_CACHE_MAX = 256
+
+
+def _aggregate_file_facets(
+    conn: Connection, where_clause: str, params: dict[str, Any]
+) -> dict[str, list[tuple]]:
+    """Exact facet counts over the full match set, without ranking or snippets."""
+    matched = (
+        "SELECT rowid, project_id, project_slug, project_name, tags, language, project_status"
+        f" FROM search_index WHERE {where_clause}"
+    )
+    languages = conn.execute(
+        text(
+            f"""
+            SELECT lower(language) as language, COUNT(*) as count
+            FROM ({matched})
+            WHERE language IS NOT NULL AND language != ''
+            GROUP BY lower(language)
+            ORDER BY count DESC, language ASC
+            """
+        ),
+        params,
+    ).all()
+    projects = conn.execute(
+        text(
+            f"""
+            SELECT project_id, project_slug, project_name, COUNT(*) as count
+            FROM ({matched})
+            GROUP BY project_id
+            ORDER BY count DESC, project_name ASC
+            """
+        ),
+        params,
+    ).all()
+    statuses = conn.execute(
+        text(
+            f"""
+            SELECT project_status, COUNT(*) as count
+            FROM ({matched})
+            WHERE project_status IS NOT NULL AND project_status != ''
+            GROUP BY project_status
+            ORDER BY count DESC, project_status ASC
+            """
+        ),
+        params,
+    ).all()
+    # Index rows carry tags as " slug slug "; split them with a recursive CTE so each tag
+    # counts once per file
+    tags = conn.execute(
+        text(
+            f"""
+            WITH RECURSIVE matched AS ({matched}),
+            split(rid, slug, rest) AS (
+                SELECT rowid, '', trim(coalesce(tags, '')) || ' ' FROM matched
+                UNION ALL
+                SELECT rid, substr(rest, 1, instr(rest, ' ') - 1),
+                       ltrim(substr(rest, instr(rest, ' ') + 1))
+                FROM split WHERE rest != ''
+            )
+            SELECT slug, COUNT(DISTINCT rid) as count
+            FROM split
+            WHERE slug != ''
+            GROUP BY slug
+            ORDER BY count DESC, slug ASC
+            """
+        ),
+        params,
+    ).all()
+    return {
+        "tags": [(row[0], row[1]) for row in tags],
+        "languages": [(row[0], row[1]) for row in languages],
+        "projects": [(row[0], row[1], row[2], row[3]) for row in projects],
+        "statuses": [(row[0], row[1]) for row in statuses],
+    }
+
+
+def _facet_cache_key(query: SearchQuery) -> tuple[Any, ...]:
+    return (
+        query.q.strip(),
+        query.scope,
+        tuple(sorted(slugify(t) for t in (query.tags or []))),
+        (query.language or "").lower(),
+        query.updated_after,
+        query.updated_before,
+        query.project_id,
+        query.project_slug,
+    )
+
+
+_KEYSET_PREFIX = "k1."
+
+
+@dataclass(frozen=True)
+class KeysetCursor:
+    score: float
+    updated_at: str
+    rowid: int
+
+
+def encode_keyset_cursor(cursor: KeysetCursor) -> str:
+    raw = json.dumps([cursor.score, cursor.updated_at, cursor.rowid], separators=(",", ":"))
+    return _KEYSET_PREFIX + base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip(
+        "="
+    )
+
+
+def decode_keyset_cursor(cursor: str | None) -> KeysetCursor | None:
+    if not cursor or not cursor.startswith(_KEYSET_PREFIX):
+        return None
+    token = cursor[len(_KEYSET_PREFIX) :]
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        score, updated_at, rowid = json.loads(raw)
+        return KeysetCursor(score=float(score), updated_at=str(updated_at or ""), rowid=int(rowid))
+    except (ValueError, TypeError):
+        return None
+
+
 class SearchService:
     def __init__(self, engine: Engine):
         self.engine = engine
 
+    def suggest(
+        self, prefix: str, limit: int = 8, project_slug: str | None = None
+    ) -> list[dict[str, Any]]:
+        """Typeahead over titles, paths and tags: ids/titles only, newest first, no ranking."""
+        match = _suggest_match_expression(prefix)
+        if not match:
+            return []
+        limit = max(1, min(limit, 20))
+        with self.engine.connect() as conn:
+            key = (match, project_slug, limit, search_index_generation(conn))
+            with _SUGGEST_CACHE_LOCK:
+                cached = _SUGGEST_CACHE.get(key)
+                if cached is not None:
+                    _SUGGEST_CACHE.move_to_end(key)
+                    return cached
+            params: dict[str, Any] = {"match": match, "limit": limit}
+            clauses = ["file_suggest_index MATCH :match", "is_archived = '0'"]
+            if project_slug:
+                params["project_slug"] = project_slug
+                clauses.append("project_slug = :project_slug")
+            # rowid order lets FTS5 stop after `limit` hits instead of scoring the whole match set
+            rows = conn.execute(
+                text(
+                    f"""
+                    SELECT file_id, title, path, project_slug
+                    FROM file_suggest_index
+                    WHERE {" AND ".join(clauses)}
+                    ORDER BY rowid DESC
+                    LIMIT :limit
+                    """
+                ),
+                params,
+            ).all()
+        items = [
+            {"id": row[0], "title": row[1] or row[2] or "Untitled", "project_slug": row[3]}
+            for row in rows
+        ]
+        with _SUGGEST_CACHE_LOCK:
+            _SUGGEST_CACHE[key] = items
+            if len(_SUGGEST_CACHE) > _SUGGEST_CACHE_MAX:
+                _SUGGEST_CACHE.popitem(last=False)
+        return items
+
     def _parse_cursor(self, cursor: str | None) -> int:
         if not cursor:
             return 0
@@ -208,24 +1014,27 @@ class SearchService:
             return 0
 
     def search(self, query: SearchQuery) -> SearchResponse:
-        offset = self._parse_cursor(query.cursor)
+        keyset = decode_keyset_cursor(query.cursor)
+        offset = 0 if keyset else self._parse_cursor(query.cursor)
         limit = max(1, min(query.limit, 50))
         if query.scope == "projects":
             projects, has_more, next_offset = self._search_projects(query, limit, offset)
-            return SearchResponse(results=projects, next_cursor=str(next_offset) if has_more else None)
+            return SearchResponse(
+                results=projects, next_cursor=str(next_offset) if has_more else None
+            )
         if query.scope == "files":
-            files, has_more, next_offset = self._search_files(query, limit, offset)
-            return SearchResponse(results=files, next_cursor=str(next_offset) if has_more else None)
+            files, _, next_cursor = self._search_files(query, limit, offset, after=keyset)
+            return SearchResponse(results=files, next_cursor=next_cursor)
 
         project_slice = min(max(limit // 3, 1), 5)
         projects, _, _ = self._search_projects(query, project_slice, 0)
-        files, has_more, next_offset = self._search_files(query, limit, offset)
+        files, _, next_cursor = self._search_files(query, limit, offset, after=keyset)
         combined = (projects + files)[:limit]
-        return SearchResponse(results=combined, next_cursor=str(next_offset) if has_more else None)
+        return SearchResponse(results=combined, next_cursor=next_cursor)
 
-    def _search_files(self, query: SearchQuery, limit: int, offset: int) -> tuple[list[SearchResult], bool, int | None]:
+    def _file_filters(self, query: SearchQuery) -> tuple[list[str], dict[str, Any]]:
         expressions: list[str] = []
-        params: dict[str, Any] = {"limit": limit, "offset": offset}
+        params: dict[str, Any] = {}
         cleaned = query.q.strip()
         if cleaned:
             expressions.append("search_index MATCH :match")
@@ -260,10 +1069,39 @@ class SearchService:
         if query.project_slug:
             params["project_slug_filter"] = query.project_slug
             expressions.append("project_slug = :project_slug_filter")
+        return expressions, params
+
+    def _search_files(
+        self,
+        query: SearchQuery,
+        limit: int,
+        offset: int = 0,
+        after: KeysetCursor | None = None,
+    ) -> tuple[list[SearchResult], bool, str | None]:
+        expressions, params = self._file_filters(query)
+        params.update({"limit": limit + 1, "offset": 0 if after else offset})
+        cleaned = query.q.strip()
+
+        if after:
+            # Seek past the last row of the previous page instead of re-ranking skipped rows
+            params.update(
+                {
+                    "after_score": after.score,
+                    "after_updated": after.updated_at,
+                    "after_rowid": after.rowid,
+                }
+            )
+            expressions.append(
+                "(bm25(search_index) > :after_score"
+                " OR (bm25(search_index) = :after_score AND updated_at < :after_updated)"
+                " OR (bm25(search_index) = :after_score AND updated_at = :after_updated"
+                " AND rowid > :after_rowid))"
+            )
 
         where_clause = " AND ".join(expressions) if expressions else "1=1"
         sql = f"""
             SELECT
+                rowid,
                 file_id,
                 project_id,
                 project_slug,
@@ -273,16 +1111,18 @@ class SearchService:
                 tags,
                 language,
                 updated_at,
-                bm25(search_index) as score,
-                snippet(search_index, 5, '[', ']', '…', 8) as excerpt
+                bm25(search_index) as score
             FROM search_index
             WHERE {where_clause}
-            ORDER BY score ASC, updated_at DESC
+            ORDER BY score ASC, updated_at DESC, rowid ASC
             LIMIT :limit OFFSET :offset
         """
 
         with self.engine.connect() as conn:
             rows = conn.execute(text(sql), params).mappings().all()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            excerpts = self._fetch_excerpts(conn, cleaned, [row["rowid"] for row in rows])
 
         results: list[SearchResult] = []
         for row in rows:
@@ -298,24 +1138,53 @@ class SearchService:
                     "name": row.get("project_name"),
                 },
                 tags=tags,
-                excerpt=row.get("excerpt"),
+                excerpt=excerpts.get(row["rowid"]),
                 updated_at=row.get("updated_at"),
                 score=float(row.get("score") or 0.0),
                 language=row.get("language"),
             )
             results.append(result)
 
-        has_more = len(results) == limit
-        next_offset = offset + limit if has_more else None
-        return results, has_more, next_offset
+        next_cursor = None
+        if has_more and rows:
+            last = rows[-1]
+            next_cursor = encode_keyset_cursor(
+                KeysetCursor(
+                    score=float(last["score"] or 0.0),
+                    updated_at=last["updated_at"] or "",
+                    rowid=int(last["rowid"]),
+                )
+            )
+        return results, has_more, next_cursor
 
-    def _search_projects(self, query: SearchQuery, limit: int, offset: int) -> tuple[list[SearchResult], bool, int | None]:
+    def _fetch_excerpts(
+        self, conn: Connection, match: str, rowids: list[int]
+    ) -> dict[int, str | None]:
+        # snippet() only for the rows on this page, not for every ranked row
+        if not rowids:
+            return {}
+        params: dict[str, Any] = {f"rid{i}": rid for i, rid in enumerate(rowids)}
+        placeholders = ",".join(f":rid{i}" for i in range(len(rowids)))
+        clauses = [f"rowid IN ({placeholders})"]
+        if match:
+            params["match"] = match
+            clauses.append("search_index MATCH :match")
+        sql = f"""
+            SELECT rowid, snippet(search_index, 5, '[', ']', '…', 8) as excerpt
+            FROM search_index
+            WHERE {" AND ".join(clauses)}
+        """
+        rows = conn.execute(text(sql), params).all()
+        return {row[0]: row[1] for row in rows}
+
+    def _search_projects(
+        self, query: SearchQuery, limit: int, offset: int
+    ) -> tuple[list[SearchResult], bool, int | None]:
         params: dict[str, Any] = {"limit": limit, "offset": offset}
         clauses: list[str] = ["p.is_archived = 0"]
-        cleaned = query.q.strip().lower()
-        if cleaned:
-            params["pattern"] = f"%{cleaned}%"
-            clauses.append("(lower(p.name) LIKE :pattern OR lower(p.description) LIKE :pattern)")
+        match = _project_match_expression(query.q)
+        if match:
+            params["match"] = match
 
         if query.tags:
             for idx, label in enumerate(query.tags):
@@ -344,7 +1213,21 @@ class SearchService:
             params["p_project_slug"] = query.project_slug
             clauses.append("p.slug = :p_project_slug")
 
-        where_clause = " AND ".join(clauses) if clauses else "1=1"
+        if match:
+            # Weights follow column order: project_id, name, description, tags, groups
+            clauses.append("project_search_index MATCH :match")
+            source = (
+                "project_search_index JOIN projects p ON p.id = project_search_index.project_id"
+            )
+            score_column = "bm25(project_search_index, 0.0, 10.0, 1.0, 5.0, 3.0)"
+            order_by = "score ASC, p.updated_at DESC"
+        else:
+            source = "projects p"
+            score_column = "0.0"
+            order_by = "p.updated_at DESC"
+        where_clause = " AND ".join(clauses)
+        # Tags come from a correlated subquery so the outer query needs no GROUP BY
+        # (bm25() cannot be evaluated inside an aggregate query)
         sql = f"""
             SELECT
                 p.id,
@@ -352,13 +1235,15 @@ class SearchService:
                 p.slug,
                 p.description,
                 p.updated_at,
-                GROUP_CONCAT(DISTINCT t.slug) as tag_slugs
-            FROM projects p
-            LEFT JOIN project_tags pt ON pt.project_id = p.id
-            LEFT JOIN tags t ON t.id = pt.tag_id
+                (
+                    SELECT GROUP_CONCAT(DISTINCT t.slug)
+                    FROM project_tags pt JOIN tags t ON t.id = pt.tag_id
+                    WHERE pt.project_id = p.id
+                ) as tag_slugs,
+                {score_column} as score
+            FROM {source}
             WHERE {where_clause}
-            GROUP BY p.id
-            ORDER BY p.updated_at DESC
+            ORDER BY {order_by}
             LIMIT :limit OFFSET :offset
         """
 
@@ -370,7 +1255,9 @@ class SearchService:
             raw_tags = row.get("tag_slugs") or ""
             tags = [slug for slug in raw_tags.split(",") if slug]
             description = row.get("description") or ""
-            excerpt = description[:200] + ("…" if len(description) > 200 else "") if description else None
+            excerpt = (
+                description[:200] + ("…" if len(description) > 200 else "") if description else None
+            )
             results.append(
                 SearchResult(
                     type="project",
@@ -384,8 +1271,10 @@ class SearchService:
                     },
                     tags=tags,
                     excerpt=excerpt,
-                    updated_at=row.get("updated_at").isoformat() if isinstance(row.get("updated_at"), dt.datetime) else row.get("updated_at"),
-                    score=0.0,
+                    updated_at=row.get("updated_at").isoformat()
+                    if isinstance(row.get("updated_at"), dt.datetime)
+                    else row.get("updated_at"),
+                    score=float(row.get("score") or 0.0),
                     language=None,
                 )
             )
@@ -419,22 +1308,38 @@ class SearchService:
                 "languages": [],
             }
 
-        files, _, _ = self._search_files(facet_query, limit=200, offset=0)
-        tag_counts: Counter[str] = Counter()
-        language_counts: Counter[str] = Counter()
-        for res in files:
-            for tag in res.tags:
-                tag_counts[tag] += 1
-            if res.language:
-                language_counts[res.language] += 1
+        return self._file_facets(facet_query)
+
+    def _file_facets(self, query: SearchQuery) -> dict[str, list[dict[str, Any]]]:
+        expressions, params = self._file_filters(query)
+        with self.engine.connect() as conn:
+            key = (_facet_cache_key(query), search_index_generation(conn))
+            with _FACET_CACHE_LOCK:
+                cached = _FACET_CACHE.get(key)
+            if cached is not None:
+                return cached
+            counts = _aggregate_file_facets(conn, " AND ".join(expressions), params)
 
-        return {
+        tag_counts: Counter[str] = Counter(dict(counts["tags"]))
+        facets = {
             "tags": self._hydrate_tag_facets(tag_counts),
             "languages": [
-                {"label": lang, "slug": lang, "count": count}
-                for lang, count in sorted(language_counts.items(), key=lambda item: (-item[1], item[0]))
+                {"label": lang, "slug": lang, "count": count} for lang, count in counts["languages"]
+            ],
+            "projects": [
+                {"id": pid, "label": name or slug, "slug": slug, "count": count}
+                for pid, slug, name, count in counts["projects"]
+            ],
+            "statuses": [
+                {"label": status, "slug": status, "count": count}
+                for status, count in counts["statuses"]
             ],
         }
+        with _FACET_CACHE_LOCK:
+            if len(_FACET_CACHE) >= _FACET_CACHE_MAX:
+                _FACET_CACHE.pop(next(iter(_FACET_CACHE)))
+            _FACET_CACHE[key] = facets
+        return facets
 
     def _hydrate_tag_facets(self, tag_counts: Counter[str]) -> list[dict[str, Any]]:
         if not tag_counts:
@@ -6,13 +6,12 @@ from sqlalchemy import select
 
 from .db import SessionLocal, engine, init_db
 from .migrations import run_upgrade_head
-from .models import Project, File
-from .search import index_file
+from .models import File, Project
+from .search import index_file, index_project
 from .services.tagging import set_project_tags
 from .settings import settings
 from .utils import safe_join
 
-
 DEMO_NAME = "demo-idea-stream"
 
 
@@ -34,6 +33,8 @@ def ensure_seed() -> None:
         set_project_tags(db, p, ["demo"])
         db.commit()
         db.refresh(p)
+        with engine.begin() as conn:
+            index_project(conn, p.id)
 
         files = [
             (
@@ -45,16 +46,7 @@ def ensure_seed() -> None:
                 "# Trimmed PRD\n\nThis is a demo PRD excerpt.",
             ),
         ]
-        # lightweight renderer
-        try:
-            from markdown_it import MarkdownIt
-
-            md = MarkdownIt("commonmark").enable("table").enable("strikethrough")
-            def render(md_text: str) -> str:
-                return md.render(md_text)
-        except Exception:
-            def render(md_text: str) -> str:
-                return md_text
+        from .services.render import render_markdown as render
 
         for path, content in files:
             f = File(
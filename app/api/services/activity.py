@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import base64
+import datetime as dt
+import json
+import os
+from typing import Any, Iterable
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from ..git_ops import GitError, head_sha, history_page, repo_history
+from ..models import Activity, Event, Project
+from ..settings import settings
+
+ACTIVITY_TYPES = ("commit", "file_change", "job", "event")
+# Request-side type filters -> stored activity types
+TYPE_FILTERS = {
+    "commit": ("commit",),
+    "file_change": ("file_change",),
+    "file": ("file_change",),
+    "job": ("job", "event"),
+    "event": ("job", "event"),
+}
+_SOURCE_NAMES = {"commit": "commits", "file_change": "files", "job": "jobs", "event": "events"}
+_FILE_CHANGE_EVENTS = {
+    "file.created": "created",
+    "file.updated": "updated",
+    "file.moved": "moved",
+    "file.deleted": "deleted",
+}
+_FILE_BATCH_EVENT = "files.batch_written"
+_EVENT_MESSAGES = {
+    "bundle.started": "Bundle export started",
+    "bundle.completed": "Bundle export completed",
+    "bundle.failed": "Bundle export failed",
+    "bundle.branch_pushed": "Bundle branch pushed",
+    "bundle.pr_opened": "Bundle PR opened",
+    "commit.started": "Commit started",
+    "commit.completed": "Commit completed",
+    "commit.failed": "Commit failed",
+}
+_CURSOR_PREFIX = "a1."
+_COMMIT_INGEST_LIMIT = 200
+
+
+def activity_type_for_event(event_type: str) -> str:
+    if event_type.startswith("bundle."):
+        return "job"
+    if event_type in _FILE_CHANGE_EVENTS or event_type == _FILE_BATCH_EVENT:
+        return "file_change"
+    return "event"
+
+
+def event_message(event_type: str, payload: dict[str, Any] | None = None) -> str:
+    if event_type in _FILE_CHANGE_EVENTS:
+        data = payload or {}
+        label = data.get("title") or data.get("path") or data.get("new_path") or "File"
+        return f"{label} {_FILE_CHANGE_EVENTS[event_type]}"
+    if event_type == _FILE_BATCH_EVENT:
+        data = payload or {}
+        return f"{data.get('created', 0)} files created, {data.get('updated', 0)} updated"
+    if event_type in _EVENT_MESSAGES:
+        return _EVENT_MESSAGES[event_type]
+    return event_type.replace(".", " ").title()
+
+
+def record_event_activity(db: Session, event: Event) -> Activity:
+    """Mirror a persisted event into the activity log (same session, caller commits)."""
+    entry = Activity(
+        project_id=event.project_id,
+        type=activity_type_for_event(event.type),
+        timestamp=event.created_at,
+        message=event_message(event.type, event.payload),
+        ref=f"event:{event.id}",
+        context={"type": event.type, "payload": event.payload},
+    )
+    db.add(entry)
+    return entry
+
+
+def ingest_commits(db: Session, project: Project) -> int:
+    """Append commits of the project's artifacts repo not logged yet; returns commits scanned.
+
+    HEAD is resolved from .git directly; git is only spawned when HEAD is not already logged.
+    History is then walked back a page at a time until a logged commit (or the root), so pushes
+    of more than one page leave no gap.
+    """
+    art_dir = os.path.join(settings.data_dir, "projects", project.slug, "artifacts")
+    head = head_sha(art_dir)
+    if not head:
+        return 0
+    logged = db.scalar(
+        select(Activity.id).where(
+            Activity.project_id == project.id, Activity.ref == f"commit:{head}"
+        )
+    )
+    if logged is not None:
+        return 0
+    scanned = 0
+    try:
+        page = repo_history(art_dir, limit=_COMMIT_INGEST_LIMIT)
+        while page:
+            scanned += len(page)
+            refs = [f"commit:{commit.get('sha') or ''}" for commit in page]
+            known = set(
+                db.scalars(
+                    select(Activity.ref).where(
+                        Activity.project_id == project.id, Activity.ref.in_(refs)
+                    )
+                )
+            )
+            rows = []
+            for commit, ref in zip(page, refs):
+                if ref in known:
+                    break
+                rows.append(_commit_row(project, commit))
+            if rows:
+                stmt = insert(Activity).on_conflict_do_nothing(index_elements=["project_id", "ref"])
+                db.execute(stmt, rows)
+            if len(rows) < len(page) or len(page) < _COMMIT_INGEST_LIMIT:
+                break
+            page = history_page(art_dir, head, _COMMIT_INGEST_LIMIT, skip=scanned)
+    except GitError:
+        db.rollback()
+        return 0
+    db.commit()
+    return scanned
+
+
+def _commit_row(project: Project, commit: dict) -> dict[str, Any]:
+    sha = commit.get("sha") or ""
+    raw_message = commit.get("message") or ""
+    timestamp = commit.get("date") or dt.datetime.now(tz=dt.timezone.utc)
+    return {
+        "project_id": project.id,
+        "type": "commit",
+        "timestamp": timestamp.astimezone(dt.timezone.utc) if timestamp.tzinfo else timestamp,
+        "message": raw_message.strip().splitlines()[0] if raw_message.strip() else "Commit",
+        "actor": commit.get("author"),
+        "ref": f"commit:{sha}",
+        "context": {"sha": sha, "short_sha": sha[:7], "message": raw_message},
+    }
+
+
+def encode_activity_cursor(entry: Activity) -> str:
+    stamp = entry.timestamp.isoformat() if entry.timestamp else ""
+    raw = json.dumps([stamp, entry.id], separators=(",", ":"))
+    return _CURSOR_PREFIX + base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip(
+        "="
+    )
+
+
+def decode_activity_cursor(cursor: str) -> tuple[dt.datetime, int] | None:
+    if not cursor.startswith(_CURSOR_PREFIX):
+        return None
+    token = cursor[len(_CURSOR_PREFIX) :]
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        stamp, entry_id = json.loads(raw)
+        return dt.datetime.fromisoformat(stamp), int(entry_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def resolve_type_filter(types: Iterable[str]) -> set[str]:
+    resolved: set[str] = set()
+    for value in types:
+        resolved.update(TYPE_FILTERS.get(value, ()))
+    return resolved
+
+
+def list_activity(
+    db: Session,
+    project_id: str,
+    types: set[str],
+    limit: int,
+    after: tuple[dt.datetime, int] | None = None,
+) -> tuple[list[Activity], bool]:
+    """Newest-first page of activity.
+
+    ``after`` is the (timestamp, id) of the previous page's last row.
+    """
+    stmt = select(Activity).where(Activity.project_id == project_id)
+    if types:
+        stmt = stmt.where(Activity.type.in_(sorted(types)))
+    if after is not None:
+        stmt = stmt.where(tuple_(Activity.timestamp, Activity.id) < tuple_(after[0], after[1]))
+    rows = db.scalars(
+        stmt.order_by(Activity.timestamp.desc(), Activity.id.desc()).limit(limit + 1)
+    ).all()
+    return list(rows[:limit]), len(rows) > limit
+
+
+def activity_sources(db: Session, project_id: str) -> list[str]:
+    types = db.scalars(
+        select(Activity.type).where(Activity.project_id == project_id).distinct()
+    ).all()
+    return sorted(_SOURCE_NAMES.get(t, t) for t in types)
+
+
+def latest_activity(db: Session, project_id: str) -> tuple[int | None, dt.datetime | None]:
+    row = db.execute(
+        select(func.max(Activity.id), func.max(Activity.timestamp)).where(
+            Activity.project_id == project_id
+        )
+    ).one()
+    return row[0], row[1]
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from sqlalchemy import and_, case, delete, func, literal, or_, select, update
+from sqlalchemy.orm import Session
+
+from ..links import sync_link_sources
+from ..models import Directory, File, Project, now_utc, parent_dir
+from ..search import reindex_moved_prefix
+from .link_graph import stage_invalidate
+from .project_stats import rebuild_project_stats
+from .tree_index import rebuild_tree_index
+
+
+def normalize_dir_path(path: str | None) -> str:
+    return "/".join(seg for seg in (path or "").split("/") if seg)
+
+
+def is_within(path: str, prefix: str) -> bool:
+    return path == prefix or path.startswith(prefix + "/")
+
+
+def under_prefix(column, prefix: str):
+    """``column`` equals ``prefix`` or lies below it.
+
+    A binary range rather than LIKE: case-sensitive like the paths themselves, and it can
+    use the (project_id, path) indexes.
+    """
+    return or_(column == prefix, and_(column >= prefix + "/", column < prefix + "0"))
+
+
+def _rebase(column, old_prefix: str, new_prefix: str):
+    # new || substr(path, len(old) + 1): "old" -> "new", "old/x" -> "new/x"
+    return literal(new_prefix) + func.substr(column, len(old_prefix) + 1)
+
+
+@dataclass
+class PrefixMovePlan:
+    from_project_id: str
+    to_project_id: str
+    old_prefix: str
+    new_prefix: str
+    # (old_path, new_path) per persisted directory and (file_id, old_path, new_path) per file
+    dir_moves: list[tuple[str, str]] = field(default_factory=list)
+    file_moves: list[tuple[str, str, str]] = field(default_factory=list)
+
+
+def plan_prefix_move(
+    db: Session,
+    from_project_id: str,
+    old_prefix: str,
+    new_prefix: str,
+    to_project_id: str | None = None,
+) -> PrefixMovePlan:
+    """What moving ``old_prefix`` to ``new_prefix`` touches; reads ids and paths only."""
+    plan = PrefixMovePlan(from_project_id, to_project_id or from_project_id, old_prefix, new_prefix)
+    new_of = lambda path: new_prefix + path[len(old_prefix) :]  # noqa: E731
+    dir_rows = db.execute(
+        select(Directory.path)
+        .where(Directory.project_id == from_project_id, under_prefix(Directory.path, old_prefix))
+        .order_by(Directory.path)
+    ).all()
+    plan.dir_moves = [(path, new_of(path)) for (path,) in dir_rows]
+    file_rows = db.execute(
+        select(File.id, File.path)
+        .where(File.project_id == from_project_id, under_prefix(File.path, old_prefix))
+        .order_by(File.path)
+    ).all()
+    plan.file_moves = [(file_id, path, new_of(path)) for file_id, path in file_rows]
+    return plan
+
+
+def apply_prefix_move(db: Session, plan: PrefixMovePlan) -> None:
+    """Move every file and directory row under the plan's prefix with set-based statements.
+
+    Files, directories, link sources and the search index are each rewritten with one UPDATE
+    (``path = :new || substr(path, :n)``), then the tree index and card stats of the touched
+    projects are recomputed once. Files keep ``updated_at`` (a move is not a content edit) while
+    the touched projects get a new one, so their modal signature and ETag change with the tree.
+    Runs in the caller's transaction; the caller commits and moves the disk mirror (see
+    UnitOfWork.move_dir). The new prefix must not lie inside the old one.
+    """
+    old, new = plan.old_prefix, plan.new_prefix
+    src, dst = plan.from_project_id, plan.to_project_id
+    db.flush()
+    db.execute(
+        update(File)
+        .where(File.project_id == src, under_prefix(File.path, old))
+        .values(
+            project_id=dst,
+            path=_rebase(File.path, old, new),
+            dir_path=case(
+                (File.path == old, parent_dir(new)), else_=_rebase(File.dir_path, old, new)
+            ),
+            updated_at=File.updated_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    # Directories already present at the destination win; the leftovers are the duplicates
+    db.execute(
+        update(Directory)
+        .where(Directory.project_id == src, under_prefix(Directory.path, old))
+        .values(
+            project_id=dst,
+            path=_rebase(Directory.path, old, new),
+            name=case((Directory.path == old, new.split("/")[-1]), else_=Directory.name),
+        )
+        .prefix_with("OR IGNORE")
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        delete(Directory)
+        .where(Directory.project_id == src, under_prefix(Directory.path, old))
+        .execution_options(synchronize_session=False)
+    )
+    sync_link_sources(
+        db, select(File.id).where(File.project_id == dst, under_prefix(File.path, new))
+    )
+    if src != dst:
+        stage_invalidate(db, src, dst)
+    reindex_moved_prefix(db.connection(), dst, new)
+    for project_id in {src, dst}:
+        rebuild_tree_index(db, project_id)
+        rebuild_project_stats(db, project_id)
+    db.execute(
+        update(Project)
+        .where(Project.id.in_({src, dst}))
+        .values(updated_at=now_utc())
+        .execution_options(synchronize_session=False)
+    )
+    # Loaded File/Directory objects still carry their old paths
+    db.flush()
+    db.expire_all()
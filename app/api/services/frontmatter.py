@@ -1,11 +1,10 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Iterable
-
 import hashlib
 import json
 import re
+from dataclasses import dataclass
+from typing import Any, Iterable
 
 import yaml
 
@@ -22,24 +21,41 @@ class PreparedFrontMatter:
     links: list[dict[str, str]]
 
 
-def extract_front_matter(content: str) -> tuple[dict[str, Any], str]:
-    if not content:
-        return {}, ""
+def _split_front_matter(content: str) -> tuple[str | None, str]:
     text = content.lstrip('\ufeff')  # strip BOM if present
     if not text.startswith('---'):
-        return {}, content
+        return None, content
     lines = text.splitlines()
     if not lines or lines[0].strip() != '---':
-        return {}, content
+        return None, content
     closing_index: int | None = None
     for idx in range(1, len(lines)):
         if lines[idx].strip() == '---':
             closing_index = idx
             break
     if closing_index is None:
-        return {}, content
+        return None, content
     metadata_block = '\n'.join(lines[1:closing_index])
     body = '\n'.join(lines[closing_index + 1 :])
+    return metadata_block, body
+
+
+def strip_front_matter(content: str) -> str:
+    """Return the markdown body without its YAML block (no YAML parsing)."""
+    if not content:
+        return ""
+    block, body = _split_front_matter(content)
+    if block is None:
+        return content
+    return body.lstrip('\n')
+
+
+def extract_front_matter(content: str) -> tuple[dict[str, Any], str]:
+    if not content:
+        return {}, ""
+    metadata_block, body = _split_front_matter(content)
+    if metadata_block is None:
+        return {}, content
     try:
         parsed = yaml.safe_load(metadata_block) or {}
     except Exception:
@@ -314,3 +330,38 @@ def build_metadata_signature(front_matter: dict[str, Any] | None) -> str | None:
     except Exception:
         payload = str(filtered)
     return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+
+# Bump when the summary/metadata derivation changes;
+# rows below it are recomputed by the backfill job
+LISTING_FIELDS_VERSION = 1
+_SUMMARY_LIMIT = 180
+
+
+def front_matter_description(front_matter: dict[str, Any] | None) -> str | None:
+    raw = front_matter.get("description") if isinstance(front_matter, dict) else None
+    if not isinstance(raw, str):
+        return None
+    return raw.strip() or None
+
+
+def derive_listing_fields(
+    front_matter: dict[str, Any] | None, content: str | None
+) -> dict[str, Any]:
+    """Description, card summary and metadata chips for a file, stored on the row at write time."""
+    front_matter = front_matter if isinstance(front_matter, dict) else {}
+    description = front_matter_description(front_matter)
+    if description:
+        summary = (
+            description
+            if len(description) <= _SUMMARY_LIMIT
+            else description[: _SUMMARY_LIMIT - 1].rstrip() + "…"
+        )
+    else:
+        summary = summarize_markdown(strip_front_matter(content or ""), limit=_SUMMARY_LIMIT)
+    return {
+        "description": description,
+        "summary": summary,
+        "metadata_fields": build_metadata_fields(front_matter),
+        "metadata_signature": build_metadata_signature(front_matter),
+    }
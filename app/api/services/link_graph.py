@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import copy
+import time
+from array import array
+from collections import OrderedDict, deque
+from threading import Lock
+from typing import Iterable, Literal
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from ..app_logging import get_logger
+from ..models import File, Link
+from ..settings import settings
+
+logger = get_logger(component="link_graph")
+
+Direction = Literal["out", "in", "both"]
+
+_SESSION_KEY = f"{__name__}.pending"
+
+
+def _csr(node_count: int, pairs: list[tuple[int, int]]) -> tuple[array, array]:
+    """Offsets/targets arrays for ``pairs`` grouped by their first element."""
+    offsets = array("i", [0]) * (node_count + 1)
+    for src, _ in pairs:
+        offsets[src + 1] += 1
+    for i in range(node_count):
+        offsets[i + 1] += offsets[i]
+    targets = array("i", [0]) * len(pairs)
+    cursor = array("i", offsets[:-1]) if node_count else array("i")
+    for src, dst in pairs:
+        targets[cursor[src]] = dst
+        cursor[src] += 1
+    return offsets, targets
+
+
+class LinkGraph:
+    """Resolved wikilinks of one project as compressed sparse rows, forward and reverse.
+
+    Files are nodes (orphans included), duplicate links collapse to one edge. Sources re-linked
+    after the build live in a small overlay that is folded back into the arrays once it grows.
+    A cached graph is never modified: commits publish a patched copy (see ``patched``), so
+    queries running on other threads keep a consistent snapshot.
+    """
+
+    def __init__(self, project_id: str, node_ids: list[str], edges: Iterable[tuple[str, str]]):
+        self.project_id = project_id
+        self.built_at = time.monotonic()
+        self.ids = list(node_ids)
+        self.index = {fid: i for i, fid in enumerate(self.ids)}
+        pairs = sorted(
+            {
+                (self.index[src], self.index[dst])
+                for src, dst in edges
+                if src in self.index and dst in self.index
+            }
+        )
+        self._load(pairs)
+
+    def _load(self, pairs: list[tuple[int, int]]) -> None:
+        n = len(self.ids)
+        self._out_offsets, self._out = _csr(n, pairs)
+        self._in_offsets, self._in = _csr(n, sorted((dst, src) for src, dst in pairs))
+        self._csr_nodes = n
+        # source -> replacement out-list, and the reverse edges those replacements add
+        self._patched: dict[int, list[int]] = {}
+        self._patched_in: dict[int, set[int]] = {}
+
+    def out_neighbors(self, i: int) -> list[int]:
+        patched = self._patched.get(i)
+        if patched is not None:
+            return patched
+        if i >= self._csr_nodes:
+            return []
+        return list(self._out[self._out_offsets[i] : self._out_offsets[i + 1]])
+
+    def in_neighbors(self, i: int) -> list[int]:
+        found: list[int] = []
+        if i < self._csr_nodes:
+            found = [
+                src
+                for src in self._in[self._in_offsets[i] : self._in_offsets[i + 1]]
+                if src not in self._patched
+            ]
+        extra = self._patched_in.get(i)
+        if extra:
+            found.extend(sorted(extra))
+        return found
+
+    def neighbors(self, i: int, direction: Direction) -> list[int]:
+        if direction == "out":
+            return self.out_neighbors(i)
+        if direction == "in":
+            return self.in_neighbors(i)
+        return sorted(set(self.out_neighbors(i)) | set(self.in_neighbors(i)))
+
+    def patched(self, file_ids: Iterable[str], sources: dict[str, list[str]]) -> "LinkGraph":
+        """A copy with ``file_ids`` as nodes and each source's outgoing edges swapped (as
+        upsert_links left them). The CSR arrays are shared, the overlay is copied.
+        """
+        graph = copy.copy(self)
+        graph.ids = list(self.ids)
+        graph.index = dict(self.index)
+        graph._patched = dict(self._patched)
+        graph._patched_in = {dst: set(srcs) for dst, srcs in self._patched_in.items()}
+        for file_id in file_ids:
+            graph._add_node(file_id)
+        graph._replace_sources(sources)
+        return graph
+
+    def _add_node(self, file_id: str) -> int:
+        i = self.index.get(file_id)
+        if i is None:
+            i = len(self.ids)
+            self.ids.append(file_id)
+            self.index[file_id] = i
+        return i
+
+    def _replace_sources(self, sources: dict[str, list[str]]) -> None:
+        for src_id, target_ids in sources.items():
+            src = self._add_node(src_id)
+            for old in self.out_neighbors(src):
+                bucket = self._patched_in.get(old)
+                if bucket is not None:
+                    bucket.discard(src)
+            # Targets may be files created since the build that nothing had staged yet
+            targets = sorted({self._add_node(t) for t in target_ids})
+            self._patched[src] = targets
+            for dst in targets:
+                self._patched_in.setdefault(dst, set()).add(src)
+        if len(self._patched) > max(64, len(self.ids) // 8):
+            self._compact()
+
+    def _compact(self) -> None:
+        pairs = sorted(
+            (src, dst) for src in range(len(self.ids)) for dst in self.out_neighbors(src)
+        )
+        self._load(pairs)
+
+    def degrees(self) -> tuple[list[int], list[int]]:
+        """(in, out) degree per node, links between distinct files only."""
+        n = len(self.ids)
+        in_deg, out_deg = [0] * n, [0] * n
+        for src in range(n):
+            for dst in self.out_neighbors(src):
+                if dst != src:
+                    out_deg[src] += 1
+                    in_deg[dst] += 1
+        return in_deg, out_deg
+
+    def neighborhood(
+        self, file_id: str, depth: int, direction: Direction = "both", limit: int = 500
+    ) -> tuple[dict[str, int], list[tuple[str, str]], bool]:
+        """Files within ``depth`` hops (id -> hops) and the edges among them.
+
+        The third value says whether ``limit`` cut the walk short.
+        """
+        start = self.index[file_id]
+        hops = {start: 0}
+        queue = deque([start])
+        truncated = False
+        while queue:
+            node = queue.popleft()
+            if hops[node] >= depth:
+                continue
+            for nxt in self.neighbors(node, direction):
+                if nxt in hops:
+                    continue
+                if len(hops) >= limit:
+                    truncated = True
+                    queue.clear()
+                    break
+                hops[nxt] = hops[node] + 1
+                queue.append(nxt)
+        edges = [
+            (self.ids[src], self.ids[dst])
+            for src in hops
+            for dst in self.out_neighbors(src)
+            if dst in hops and dst != src
+        ]
+        return {self.ids[i]: d for i, d in hops.items()}, edges, truncated
+
+    def orphans(self) -> list[str]:
+        in_deg, out_deg = self.degrees()
+        return [fid for fid, i, o in zip(self.ids, in_deg, out_deg) if not i and not o]
+
+    def most_linked(self, limit: int) -> list[tuple[str, int]]:
+        in_deg, _ = self.degrees()
+        ranked = sorted(
+            (i for i in range(len(self.ids)) if in_deg[i]), key=lambda i: (-in_deg[i], self.ids[i])
+        )
+        return [(self.ids[i], in_deg[i]) for i in ranked[:limit]]
+
+
+_GRAPHS: "OrderedDict[str, LinkGraph]" = OrderedDict()
+_LOCK = Lock()
+
+
+def build_graph(db: Session, project_id: str) -> LinkGraph:
+    node_ids = list(
+        db.scalars(select(File.id).where(File.project_id == project_id).order_by(File.id))
+    )
+    edges = db.execute(
+        select(Link.src_file_id, Link.target_file_id).where(
+            Link.project_id == project_id, Link.target_file_id.is_not(None)
+        )
+    ).all()
+    return LinkGraph(project_id, node_ids, edges)
+
+
+def get_graph(db: Session, project_id: str) -> LinkGraph:
+    """The cached graph for ``project_id``.
+
+    Built from the links table when missing or older than link_graph_ttl.
+    """
+    with _LOCK:
+        graph = _GRAPHS.get(project_id)
+        if graph is not None and time.monotonic() - graph.built_at < settings.link_graph_ttl:
+            _GRAPHS.move_to_end(project_id)
+            return graph
+    started = time.perf_counter()
+    graph = build_graph(db, project_id)
+    logger.info(
+        "link_graph.built",
+        project_id=project_id,
+        nodes=len(graph.ids),
+        edges=len(graph._out),
+        duration_ms=int((time.perf_counter() - started) * 1000),
+    )
+    with _LOCK:
+        _GRAPHS[project_id] = graph
+        _GRAPHS.move_to_end(project_id)
+        while len(_GRAPHS) > settings.link_graph_max_projects:
+            _GRAPHS.popitem(last=False)
+    return graph
+
+
+def invalidate_graph(project_id: str | None = None) -> None:
+    with _LOCK:
+        if project_id is None:
+            _GRAPHS.clear()
+        else:
+            _GRAPHS.pop(project_id, None)
+
+
+# Link writes are staged on the session and reach the cached graphs only once it commits
+
+
+def _pending(db: Session) -> dict:
+    return db.info.setdefault(
+        _SESSION_KEY, {"nodes": {}, "sources": {}, "projects": set(), "files": set()}
+    )
+
+
+def stage_add_file(db: Session, project_id: str, file_id: str) -> None:
+    """Record a created file, so it shows up (as an orphan until linked) without a rebuild."""
+    _pending(db)["nodes"].setdefault(project_id, set()).add(file_id)
+
+
+def stage_sources(db: Session, project_id: str, sources: dict[str, list[str]]) -> None:
+    """Record the resolved out-links of re-linked sources (from upsert_links)."""
+    _pending(db)["sources"].setdefault(project_id, {}).update(sources)
+
+
+def stage_invalidate(db: Session, *project_ids: str | None) -> None:
+    """Drop these projects' graphs at commit (None: every graph), for bulk UPDATEs of links."""
+    _pending(db)["projects"].update(project_ids)
+
+
+def stage_invalidate_file(db: Session, file_id: str) -> None:
+    """Drop whichever cached graph holds ``file_id`` at commit (deletes, relinks aimed at it)."""
+    _pending(db)["files"].add(file_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session: Session) -> None:
+    pending = session.info.pop(_SESSION_KEY, None)
+    if not pending:
+        return
+    with _LOCK:
+        if None in pending["projects"]:
+            _GRAPHS.clear()
+            return
+        for project_id in pending["projects"]:
+            _GRAPHS.pop(project_id, None)
+        if pending["files"]:
+            for project_id in [
+                pid for pid, g in _GRAPHS.items() if not pending["files"].isdisjoint(g.index)
+            ]:
+                _GRAPHS.pop(project_id, None)
+        for project_id in pending["nodes"].keys() | pending["sources"].keys():
+            graph = _GRAPHS.get(project_id)
+            if graph is not None:
+                _GRAPHS[project_id] = graph.patched(
+                    pending["nodes"].get(project_id, ()), pending["sources"].get(project_id, {})
+                )
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_SESSION_KEY, None)
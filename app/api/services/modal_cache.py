@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import json
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from threading import Lock
+from typing import Any
+
+import redis
+
+from ..app_logging import get_logger
+from ..settings import settings
+
+logger = get_logger(component="projects.modal_cache")
+
+CACHE_PREFIX = "modal:"
+_INDEX_KEY = CACHE_PREFIX + "index"
+# After a Redis error, serve from the local tier only for a while
+# instead of reconnecting per request
+_REDIS_RETRY_SECONDS = 30.0
+
+
+@dataclass
+class ModalCacheEntry:
+    signature: str
+    summary: dict[str, Any]
+    last_modified: str | None
+
+
+_LOCAL: "OrderedDict[str, tuple[float, ModalCacheEntry]]" = OrderedDict()
+_LOCAL_LOCK = Lock()
+_redis_down_until = 0.0
+
+
+def _redis_client() -> redis.Redis | None:
+    if time.monotonic() < _redis_down_until:
+        return None
+    return redis.from_url(settings.redis_url, socket_connect_timeout=0.25, socket_timeout=0.25)
+
+
+def _mark_redis_down(exc: Exception) -> None:
+    global _redis_down_until
+    _redis_down_until = time.monotonic() + _REDIS_RETRY_SECONDS
+    logger.warning("modal_cache.redis_unavailable", error=str(exc))
+
+
+def _local_get(project_id: str, signature: str) -> ModalCacheEntry | None:
+    with _LOCAL_LOCK:
+        item = _LOCAL.get(project_id)
+        if item is None:
+            return None
+        expires_at, entry = item
+        if expires_at < time.monotonic() or entry.signature != signature:
+            _LOCAL.pop(project_id, None)
+            return None
+        _LOCAL.move_to_end(project_id)
+        return entry
+
+
+def _local_put(project_id: str, entry: ModalCacheEntry) -> None:
+    with _LOCAL_LOCK:
+        _LOCAL[project_id] = (time.monotonic() + settings.project_modal_cache_ttl, entry)
+        _LOCAL.move_to_end(project_id)
+        while len(_LOCAL) > settings.project_modal_cache_max_entries:
+            _LOCAL.popitem(last=False)
+
+
+def get_modal_entry(project_id: str, signature: str) -> ModalCacheEntry | None:
+    """Cached summary for ``project_id`` if it was built for ``signature``.
+
+    Process-local first, then Redis.
+    """
+    entry = _local_get(project_id, signature)
+    if entry is not None:
+        return entry
+    client = _redis_client()
+    if client is None:
+        return None
+    try:
+        raw = client.get(CACHE_PREFIX + project_id)
+    except redis.RedisError as exc:
+        _mark_redis_down(exc)
+        return None
+    if not raw:
+        return None
+    try:
+        entry = ModalCacheEntry(**json.loads(raw))
+    except (ValueError, TypeError):
+        return None
+    if entry.signature != signature:
+        return None
+    _local_put(project_id, entry)
+    return entry
+
+
+def store_modal_entry(project_id: str, entry: ModalCacheEntry) -> None:
+    _local_put(project_id, entry)
+    client = _redis_client()
+    if client is None:
+        return
+    ttl = settings.project_modal_cache_ttl
+    max_entries = settings.project_modal_cache_max_entries
+    try:
+        pipe = client.pipeline()
+        pipe.set(
+            CACHE_PREFIX + project_id, json.dumps(asdict(entry), separators=(",", ":")), ex=ttl
+        )
+        pipe.zadd(_INDEX_KEY, {project_id: time.time()})
+        # Drop index members whose keys have already expired, then evict the oldest beyond the bound
+        pipe.zremrangebyscore(_INDEX_KEY, "-inf", time.time() - ttl)
+        pipe.zcard(_INDEX_KEY)
+        size = pipe.execute()[-1]
+        if size > max_entries:
+            evicted = client.zpopmin(_INDEX_KEY, size - max_entries)
+            if evicted:
+                client.delete(
+                    *[
+                        CACHE_PREFIX + (member.decode() if isinstance(member, bytes) else member)
+                        for member, _ in evicted
+                    ]
+                )
+    except redis.RedisError as exc:
+        _mark_redis_down(exc)
+
+
+def invalidate_modal_entry(project_id: str) -> None:
+    with _LOCAL_LOCK:
+        _LOCAL.pop(project_id, None)
+    client = _redis_client()
+    if client is None:
+        return
+    try:
+        pipe = client.pipeline()
+        pipe.delete(CACHE_PREFIX + project_id)
+        pipe.zrem(_INDEX_KEY, project_id)
+        pipe.execute()
+    except redis.RedisError as exc:
+        _mark_redis_down(exc)
@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import datetime as dt
+from dataclasses import dataclass
+from typing import Iterable, Sequence
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..models import File, Project, ProjectStats
+
+SPARKLINE_DAYS = 7
+_SNIPPET_LIMIT = 200
+
+_LANGUAGE_MAP = {
+    "md": "Markdown",
+    "markdown": "Markdown",
+    "py": "Python",
+    "ts": "TypeScript",
+    "tsx": "TypeScript",
+    "js": "JavaScript",
+    "jsx": "JavaScript",
+    "json": "JSON",
+    "yaml": "YAML",
+    "yml": "YAML",
+    "sh": "Shell",
+    "css": "CSS",
+    "scss": "CSS",
+    "html": "HTML",
+    "sql": "SQL",
+    "txt": "Text",
+    "rs": "Rust",
+    "go": "Go",
+    "java": "Java",
+    "kt": "Kotlin",
+    "swift": "Swift",
+    "c": "C",
+    "cpp": "C++",
+}
+
+
+def infer_language(path: str) -> str:
+    ext = path.rsplit(".", 1)[-1].lower() if "." in path else ""
+    if ext in _LANGUAGE_MAP:
+        return _LANGUAGE_MAP[ext]
+    return ext.upper() if ext else "Other"
+
+
+@dataclass
+class FileStatsEntry:
+    id: str
+    path: str
+    title: str
+    updated_at: dt.datetime | None
+
+
+def file_stats_entry(f: File) -> FileStatsEntry:
+    return FileStatsEntry(id=f.id, path=f.path or "", title=f.title or "", updated_at=f.updated_at)
+
+
+def _utc(value: dt.datetime | None) -> dt.datetime | None:
+    if not value:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=dt.timezone.utc)
+    return value.astimezone(dt.timezone.utc)
+
+
+def _is_readme(path: str | None) -> bool:
+    return bool(path) and path.lower().endswith("readme.md")
+
+
+def _snippet(content: str | None) -> str | None:
+    source = (content or "").strip().replace("\n", " ")
+    if not source:
+        return None
+    return source[:_SNIPPET_LIMIT] + ("…" if len(source) > _SNIPPET_LIMIT else "")
+
+
+def _day_key(value: dt.datetime | None) -> str | None:
+    stamp = _utc(value)
+    return stamp.date().isoformat() if stamp else None
+
+
+def _trim_days(days: dict[str, int], today: dt.date) -> dict[str, int]:
+    cutoff = (today - dt.timedelta(days=SPARKLINE_DAYS - 1)).isoformat()
+    return {day: count for day, count in days.items() if day >= cutoff and count > 0}
+
+
+def _bump(counts: dict[str, int], key: str | None, delta: int) -> None:
+    if not key:
+        return
+    value = counts.get(key, 0) + delta
+    if value > 0:
+        counts[key] = value
+    else:
+        counts.pop(key, None)
+
+
+def _set_highlight(stats: ProjectStats, entry: FileStatsEntry | None, content: str | None) -> None:
+    stats.highlight_file_id = entry.id if entry else None
+    stats.highlight_title = entry.title if entry else None
+    stats.highlight_path = entry.path if entry else None
+    stats.highlight_snippet = _snippet(content) if entry else None
+
+
+def _set_last_file(stats: ProjectStats, entry: FileStatsEntry | None) -> None:
+    stats.last_file_id = entry.id if entry else None
+    stats.last_file_title = entry.title if entry else None
+    stats.last_file_path = entry.path if entry else None
+    stats.last_edited_at = entry.updated_at if entry else None
+
+
+def _latest_file(db: Session, project_id: str) -> File | None:
+    return db.scalars(
+        select(File).where(File.project_id == project_id).order_by(File.updated_at.desc()).limit(1)
+    ).first()
+
+
+def _find_highlight(db: Session, project_id: str) -> File | None:
+    # README wins; otherwise the most recently edited file
+    readme = db.scalars(
+        select(File)
+        .where(File.project_id == project_id, func.lower(File.path).like("%readme.md"))
+        .order_by(File.path)
+        .limit(1)
+    ).first()
+    return readme or _latest_file(db, project_id)
+
+
+def apply_file_change(
+    db: Session,
+    project_id: str,
+    added: FileStatsEntry | None = None,
+    removed: FileStatsEntry | None = None,
+    content: str | None = None,
+) -> None:
+    """Fold one file create/update/move/delete into ``project_stats``.
+
+    ``removed`` is the file as it was before the write, ``added`` as it is after
+    (both for updates and moves). ``content`` is the body of ``added``, used for
+    the card snippet (loaded on demand when omitted). Call inside the writing
+    session before commit.
+    """
+    db.flush()
+    stats = db.get(ProjectStats, project_id)
+    if stats is None:
+        rebuild_project_stats(db, project_id)
+        return
+
+    languages = dict(stats.language_counts or {})
+    days = dict(stats.edit_days or {})
+    file_count = stats.file_count or 0
+    if removed is not None:
+        file_count -= 1
+        _bump(languages, infer_language(removed.path), -1)
+        _bump(days, _day_key(removed.updated_at), -1)
+    if added is not None:
+        if added.updated_at is None:
+            added.updated_at = dt.datetime.now(tz=dt.timezone.utc)
+        file_count += 1
+        _bump(languages, infer_language(added.path), 1)
+        _bump(days, _day_key(added.updated_at), 1)
+
+    stats.file_count = max(file_count, 0)
+    stats.language_counts = languages
+    stats.edit_days = _trim_days(days, dt.datetime.now(tz=dt.timezone.utc).date())
+
+    last_edited = _utc(stats.last_edited_at)
+    if added is not None and (last_edited is None or _utc(added.updated_at) >= last_edited):
+        _set_last_file(stats, added)
+    elif removed is not None and removed.id == stats.last_file_id:
+        latest = _latest_file(db, project_id)
+        _set_last_file(stats, file_stats_entry(latest) if latest else None)
+
+    if added is not None and (_is_readme(added.path) or not _is_readme(stats.highlight_path)):
+        if content is None:
+            content = db.scalar(select(File.content_md).where(File.id == added.id))
+        _set_highlight(stats, added, content)
+    elif removed is not None and removed.id == stats.highlight_file_id:
+        target = _find_highlight(db, project_id)
+        _set_highlight(
+            stats,
+            file_stats_entry(target) if target else None,
+            target.content_md if target else None,
+        )
+    db.add(stats)
+
+
+def apply_file_move(
+    db: Session,
+    old_project_id: str,
+    removed: FileStatsEntry,
+    new_project_id: str,
+    added: FileStatsEntry,
+) -> None:
+    if old_project_id == new_project_id:
+        apply_file_change(db, new_project_id, added=added, removed=removed)
+        return
+    apply_file_change(db, old_project_id, removed=removed)
+    apply_file_change(db, new_project_id, added=added)
+
+
+def rebuild_project_stats(db: Session, project_id: str) -> ProjectStats:
+    """Recompute one project's stats from ``files`` (metadata only, one body for the snippet)."""
+    rows = db.execute(
+        select(File.id, File.path, File.title, File.updated_at).where(File.project_id == project_id)
+    ).all()
+    languages: dict[str, int] = {}
+    days: dict[str, int] = {}
+    latest: FileStatsEntry | None = None
+    for file_id, path, title, updated_at in rows:
+        entry = FileStatsEntry(
+            id=file_id, path=path or "", title=title or "", updated_at=updated_at
+        )
+        _bump(languages, infer_language(entry.path), 1)
+        _bump(days, _day_key(updated_at), 1)
+        if updated_at and (latest is None or _utc(updated_at) > _utc(latest.updated_at)):
+            latest = entry
+
+    stats = db.get(ProjectStats, project_id) or ProjectStats(project_id=project_id)
+    stats.file_count = len(rows)
+    stats.language_counts = languages
+    stats.edit_days = _trim_days(days, dt.datetime.now(tz=dt.timezone.utc).date())
+    _set_last_file(stats, latest)
+    target = _find_highlight(db, project_id)
+    _set_highlight(
+        stats, file_stats_entry(target) if target else None, target.content_md if target else None
+    )
+    db.add(stats)
+    return stats
+
+
+def load_project_stats(db: Session, project_ids: Sequence[str]) -> dict[str, ProjectStats]:
+    """Stats rows for ``project_ids``; rows missing (e.g. pre-migration projects) are built once."""
+    if not project_ids:
+        return {}
+    rows = db.scalars(select(ProjectStats).where(ProjectStats.project_id.in_(project_ids))).all()
+    stats_map = {row.project_id: row for row in rows}
+    missing = [pid for pid in project_ids if pid not in stats_map]
+    if missing:
+        for pid in missing:
+            stats_map[pid] = rebuild_project_stats(db, pid)
+        db.commit()
+    return stats_map
+
+
+def sparkline_from_stats(stats: ProjectStats | None, now: dt.datetime) -> list[int]:
+    if stats is None or not stats.file_count:
+        return []
+    today = now.date()
+    days = stats.edit_days or {}
+    return [
+        days.get((today - dt.timedelta(days=SPARKLINE_DAYS - 1 - idx)).isoformat(), 0)
+        for idx in range(SPARKLINE_DAYS)
+    ]
+
+
+def rebuild_all_project_stats(db: Session, project_ids: Iterable[str] | None = None) -> int:
+    ids = (
+        list(project_ids) if project_ids is not None else list(db.scalars(select(Project.id)).all())
+    )
+    for pid in ids:
+        rebuild_project_stats(db, pid)
+    db.commit()
+    return len(ids)
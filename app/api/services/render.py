@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from collections import OrderedDict
+from threading import Lock
+from typing import Any
+
+import markdown_it
+from markdown_it import MarkdownIt
+
+from ..app_logging import get_logger
+from ..settings import settings
+
+logger = get_logger(component="render")
+
+# One renderer for every call site; Mermaid/KaTeX are handled on the client
+_MD = MarkdownIt("commonmark").enable("table").enable("strikethrough")
+# Part of every cache key, so changing the preset, plugins or library version
+# invalidates old entries
+RENDERER_CONFIG = f"markdown-it-py/{markdown_it.__version__}:commonmark+table+strikethrough"
+
+_CACHE: "OrderedDict[str, str]" = OrderedDict()
+_CACHE_LOCK = Lock()
+_STATS = {"hits": 0, "misses": 0, "disk_hits": 0}
+
+
+def render_key(md_text: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(RENDERER_CONFIG.encode())
+    digest.update(b"\0")
+    digest.update(md_text.encode("utf-8", "surrogatepass"))
+    return digest.hexdigest()
+
+
+def _disk_path(key: str) -> str | None:
+    root = settings.render_cache_dir
+    if not root:
+        return None
+    return os.path.join(root, key[:2], f"{key}.html")
+
+
+def _disk_get(key: str) -> str | None:
+    path = _disk_path(key)
+    if path is None:
+        return None
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return fh.read()
+    except OSError:
+        return None
+
+
+def _disk_put(key: str, html: str) -> None:
+    path = _disk_path(key)
+    if path is None:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(html)
+        os.replace(tmp, path)
+    except OSError as exc:
+        logger.warning("render_cache.disk_write_failed", error=str(exc))
+
+
+def _remember(key: str, html: str) -> None:
+    with _CACHE_LOCK:
+        _CACHE[key] = html
+        _CACHE.move_to_end(key)
+        while len(_CACHE) > settings.render_cache_max_entries:
+            _CACHE.popitem(last=False)
+
+
+def render_markdown(md_text: str) -> str:
+    """Markdown -> HTML through a sha256-keyed LRU (and the on-disk cache when configured)."""
+    md_text = md_text or ""
+    key = render_key(md_text)
+    with _CACHE_LOCK:
+        html = _CACHE.get(key)
+        if html is not None:
+            _CACHE.move_to_end(key)
+            _STATS["hits"] += 1
+            return html
+    html = _disk_get(key)
+    if html is not None:
+        with _CACHE_LOCK:
+            _STATS["disk_hits"] += 1
+        _remember(key, html)
+        return html
+    html = _MD.render(md_text)
+    with _CACHE_LOCK:
+        _STATS["misses"] += 1
+    _remember(key, html)
+    _disk_put(key, html)
+    return html
+
+
+def render_cache_stats() -> dict[str, Any]:
+    with _CACHE_LOCK:
+        return {
+            **_STATS,
+            "entries": len(_CACHE),
+            "max_entries": settings.render_cache_max_entries,
+            "disk": bool(settings.render_cache_dir),
+            "renderer": RENDERER_CONFIG,
+        }
+
+
+def clear_render_cache() -> None:
+    with _CACHE_LOCK:
+        _CACHE.clear()
+        for name in _STATS:
+            _STATS[name] = 0
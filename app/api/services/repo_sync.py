@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import datetime as dt
+import os
+from typing import Iterator, Union
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from ..app_logging import get_logger
+from ..events_pub import publish_event
+from ..git_ops import GitError, ahead_behind, current_branch, fetch_remote
+from ..models import ArtifactRepo, Project, Repo
+from ..settings import settings
+
+logger = get_logger(component="repos.sync")
+
+FETCH_JOB = "worker.jobs.git_jobs.fetch_repo_status"
+TICK_JOB = "worker.jobs.git_jobs.fetch_due_repos"
+TICK_JOB_ID = "git.fetch_due_repos"
+
+SyncTarget = Union[Repo, ArtifactRepo]
+_KINDS: dict[str, type] = {"repo": Repo, "artifacts": ArtifactRepo}
+
+
+def _now() -> dt.datetime:
+    return dt.datetime.now(tz=dt.timezone.utc)
+
+
+def repo_path(project: Project | None, repo: Repo) -> str:
+    if repo.scope == "project" and project is not None:
+        return os.path.join(settings.data_dir, "projects", project.slug, "repos", repo.id)
+    return os.path.join(settings.data_dir, "repos", repo.id)
+
+
+def artifacts_path(project: Project) -> str:
+    return os.path.join(settings.data_dir, "projects", project.slug, "artifacts")
+
+
+def _target_path(db: Session, target: SyncTarget) -> str | None:
+    project = db.get(Project, target.project_id) if target.project_id else None
+    if isinstance(target, ArtifactRepo):
+        return artifacts_path(project) if project else None
+    if target.scope == "project" and project is None:
+        return None
+    return repo_path(project, target)
+
+
+def _kind(target: SyncTarget) -> str:
+    return "artifacts" if isinstance(target, ArtifactRepo) else "repo"
+
+
+def backoff_seconds(failures: int) -> int:
+    """Delay before the next fetch: the normal interval, doubled per consecutive failure.
+
+    Capped at settings.repo_fetch_max_backoff.
+    """
+    interval = max(int(settings.repo_fetch_interval), 1)
+    if failures <= 0:
+        return interval
+    return min(
+        interval * (2 ** min(failures, 16)), max(int(settings.repo_fetch_max_backoff), interval)
+    )
+
+
+def sync_target(db: Session, target: SyncTarget, fetch: bool = True) -> bool:
+    """Fetch ``target``'s remote and store ahead/behind; returns True when the counts changed.
+
+    ``fetch=False`` recounts against the remote refs already on disk (after a pull or push).
+    Failures are recorded on the row and push ``next_fetch_at`` out exponentially; the cached
+    counts are left as they were.
+    """
+    path = _target_path(db, target)
+    now = _now()
+    if not path or not os.path.isdir(os.path.join(path, ".git")):
+        target.next_fetch_at = now + dt.timedelta(seconds=backoff_seconds(0))
+        db.commit()
+        return False
+    try:
+        fetched = fetch_remote(path) if fetch else False
+        state = ahead_behind(path, current_branch(path) or target.default_branch)
+    except GitError as exc:
+        target.fetch_failures = (target.fetch_failures or 0) + 1
+        target.fetch_error = getattr(exc, "message", None) or str(exc)
+        target.next_fetch_at = now + dt.timedelta(seconds=backoff_seconds(target.fetch_failures))
+        db.commit()
+        logger.warning(
+            "repo_sync.fetch_failed",
+            kind=_kind(target),
+            id=target.id,
+            failures=target.fetch_failures,
+            error=target.fetch_error,
+        )
+        return False
+
+    changed = (target.ahead or 0, target.behind or 0) != (state["ahead"], state["behind"])
+    target.ahead = state["ahead"]
+    target.behind = state["behind"]
+    target.fetch_failures = 0
+    target.fetch_error = None
+    if fetched:
+        target.last_fetched_at = now
+    target.next_fetch_at = now + dt.timedelta(seconds=backoff_seconds(0))
+    db.commit()
+    if changed and target.project_id:
+        publish_event(
+            project_id=target.project_id,
+            event_type=f"{_kind(target)}.status",
+            payload={
+                "repo_id": target.id,
+                "branch": state["branch"],
+                "ahead": state["ahead"],
+                "behind": state["behind"],
+            },
+        )
+    return changed
+
+
+def load_target(db: Session, kind: str, target_id: str) -> SyncTarget | None:
+    model = _KINDS.get(kind)
+    return db.get(model, target_id) if model else None
+
+
+def _due(db: Session, now: dt.datetime) -> Iterator[SyncTarget]:
+    for model in (Repo, ArtifactRepo):
+        yield from db.scalars(
+            select(model).where(or_(model.next_fetch_at.is_(None), model.next_fetch_at <= now))
+        ).all()
+
+
+def sync_due(db: Session, now: dt.datetime | None = None) -> dict:
+    """Fetch every repo whose ``next_fetch_at`` has passed (or was never scheduled)."""
+    now = now or _now()
+    fetched = changed = 0
+    for target in _due(db, now):
+        fetched += 1
+        if sync_target(db, target):
+            changed += 1
+    return {"fetched": fetched, "changed": changed}
+
+
+def enqueue_fetch(kind: str, target_id: str) -> str | None:
+    """Queue an immediate fetch for one repo; None when the queue is unreachable."""
+    import redis as _redis
+    import rq as _rq
+
+    try:
+        q = _rq.Queue("default", connection=_redis.from_url(settings.redis_url))
+        # Fixed job id so repeated refreshes of one repo collapse into a single queued fetch
+        job = q.enqueue(
+            FETCH_JOB, kind, target_id, job_id=f"git.fetch:{kind}:{target_id}", job_timeout=120
+        )
+    except _redis.RedisError as exc:
+        logger.warning("repo_sync.enqueue_failed", kind=kind, id=target_id, error=str(exc))
+        return None
+    return job.id
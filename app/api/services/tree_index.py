@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session, aliased
+
+from ..models import Directory, File, ProjectTreeDir, parent_dir
+
+
+def _dir_chain(dir_path: str) -> list[str]:
+    """The root ("") and every prefix of ``dir_path``: "a/b" -> ["", "a", "a/b"]."""
+    parts = [seg for seg in dir_path.split("/") if seg]
+    return [""] + ["/".join(parts[: i + 1]) for i in range(len(parts))]
+
+
+def _row_values(project_id: str, path: str) -> dict:
+    parts = [seg for seg in path.split("/") if seg]
+    return {
+        "project_id": project_id,
+        "path": path,
+        "parent_path": parent_dir(path) if path else None,
+        "name": parts[-1] if parts else "",
+        "depth": len(parts),
+    }
+
+
+def _bump(
+    db: Session,
+    project_id: str,
+    path: str,
+    files: int = 0,
+    subtree_files: int = 0,
+    persisted: int = 0,
+) -> None:
+    stmt = insert(ProjectTreeDir).values(
+        **_row_values(project_id, path),
+        file_count=max(files, 0),
+        subtree_files=max(subtree_files, 0),
+        subtree_persisted=max(persisted, 0),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ProjectTreeDir.project_id, ProjectTreeDir.path],
+        set_={
+            "file_count": ProjectTreeDir.file_count + files,
+            "subtree_files": ProjectTreeDir.subtree_files + subtree_files,
+            "subtree_persisted": ProjectTreeDir.subtree_persisted + persisted,
+        },
+    )
+    db.execute(stmt)
+
+
+def _prune(db: Session, project_id: str, paths: Iterable[str]) -> None:
+    db.query(ProjectTreeDir).filter(
+        ProjectTreeDir.project_id == project_id,
+        ProjectTreeDir.path.in_([p for p in paths if p]),
+        ProjectTreeDir.subtree_files <= 0,
+        ProjectTreeDir.subtree_persisted <= 0,
+    ).delete(synchronize_session=False)
+
+
+def _is_indexed(db: Session, project_id: str) -> bool:
+    return (
+        db.scalar(
+            select(ProjectTreeDir.path).where(
+                ProjectTreeDir.project_id == project_id, ProjectTreeDir.path == ""
+            )
+        )
+        is not None
+    )
+
+
+def rebuild_tree_index(db: Session, project_id: str) -> None:
+    """Recompute one project's directory index from file paths and persisted directories."""
+    counts: dict[str, list[int]] = {"": [0, 0, 0]}
+    for (dir_path,) in db.execute(select(File.dir_path).where(File.project_id == project_id)):
+        chain = _dir_chain(dir_path or "")
+        for path in chain:
+            counts.setdefault(path, [0, 0, 0])[1] += 1
+        counts[chain[-1]][0] += 1
+    for (path,) in db.execute(select(Directory.path).where(Directory.project_id == project_id)):
+        for prefix in _dir_chain(path or ""):
+            counts.setdefault(prefix, [0, 0, 0])[2] += 1
+
+    db.query(ProjectTreeDir).filter(ProjectTreeDir.project_id == project_id).delete(
+        synchronize_session=False
+    )
+    db.execute(
+        insert(ProjectTreeDir),
+        [
+            {
+                **_row_values(project_id, path),
+                "file_count": files,
+                "subtree_files": subtree_files,
+                "subtree_persisted": persisted,
+            }
+            for path, (files, subtree_files, persisted) in counts.items()
+        ],
+    )
+
+
+def ensure_tree_index(db: Session, project_id: str) -> None:
+    """Build the index for projects that have none yet (pre-migration data, bulk imports)."""
+    if not _is_indexed(db, project_id):
+        rebuild_tree_index(db, project_id)
+        db.commit()
+
+
+def apply_file_paths(
+    db: Session,
+    project_id: str,
+    removed: str | None = None,
+    added: str | None = None,
+) -> None:
+    """Fold a file create (``added``), delete (``removed``) or path change (both) into the index.
+
+    Call inside the writing session before commit; unindexed projects are left for
+    ensure_tree_index.
+    """
+    db.flush()
+    if not _is_indexed(db, project_id):
+        return
+    removed_dir = parent_dir(removed) if removed is not None else None
+    added_dir = parent_dir(added) if added is not None else None
+    if removed_dir == added_dir:
+        return
+    if removed_dir is not None:
+        chain = _dir_chain(removed_dir)
+        for path in chain:
+            _bump(db, project_id, path, files=-1 if path == removed_dir else 0, subtree_files=-1)
+        _prune(db, project_id, chain)
+    if added_dir is not None:
+        for path in _dir_chain(added_dir):
+            _bump(db, project_id, path, files=1 if path == added_dir else 0, subtree_files=1)
+
+
+def move_file_path(
+    db: Session, old_project_id: str, old_path: str, new_project_id: str, new_path: str
+) -> None:
+    if old_project_id == new_project_id:
+        apply_file_paths(db, new_project_id, removed=old_path, added=new_path)
+        return
+    apply_file_paths(db, old_project_id, removed=old_path)
+    apply_file_paths(db, new_project_id, added=new_path)
+
+
+def _visible(row, include_persisted: bool):
+    if include_persisted:
+        return or_(row.subtree_files > 0, row.subtree_persisted > 0)
+    return row.subtree_files > 0
+
+
+def list_tree_dirs(
+    db: Session,
+    project_id: str,
+    parent_path: str | None = None,
+    contains: str | None = None,
+    include_persisted: bool = False,
+) -> list[tuple[ProjectTreeDir, int]]:
+    """Directories under ``parent_path`` (or whose path contains ``contains``) with child counts.
+
+    The child count is direct files plus visible direct subdirectories, read through the
+    (project_id, parent_path) index so cost follows the listed folder, not the project.
+    """
+    child = aliased(ProjectTreeDir)
+    child_dirs = (
+        select(func.count())
+        .select_from(child)
+        .where(
+            child.project_id == ProjectTreeDir.project_id,
+            child.parent_path == ProjectTreeDir.path,
+            _visible(child, include_persisted),
+        )
+        .scalar_subquery()
+    )
+    stmt = select(ProjectTreeDir, ProjectTreeDir.file_count + child_dirs).where(
+        ProjectTreeDir.project_id == project_id,
+        ProjectTreeDir.path != "",
+        _visible(ProjectTreeDir, include_persisted),
+    )
+    if contains:
+        stmt = stmt.where(func.instr(func.lower(ProjectTreeDir.path), contains.lower()) > 0)
+    else:
+        stmt = stmt.where(ProjectTreeDir.parent_path == (parent_path or ""))
+    return [
+        (row, int(count or 0))
+        for row, count in db.execute(stmt.order_by(ProjectTreeDir.path)).all()
+    ]
+
+
+def count_tree_dirs(db: Session, project_id: str, include_persisted: bool = False) -> int:
+    return int(
+        db.scalar(
+            select(func.count()).where(
+                and_(
+                    ProjectTreeDir.project_id == project_id,
+                    ProjectTreeDir.path != "",
+                    _visible(ProjectTreeDir, include_persisted),
+                )
+            )
+        )
+        or 0
+    )
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import os
+import queue
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+from sqlalchemy.orm import Session
+
+from ..app_logging import get_logger
+from ..events_pub import fanout_event, record_event
+
+logger = get_logger(component="unit_of_work")
+
+Task = Callable[[], None]
+
+# Post-commit side effects (Redis fan-out, the on-disk mirror) run on one daemon thread, in
+# commit order, so two saves of the same file can never land on disk out of order.
+_QUEUE: "queue.Queue[tuple[list[Task], list[str]]]" = queue.Queue()
+_DRAINER: threading.Thread | None = None
+_DRAINER_LOCK = threading.Lock()
+_PENDING: dict[str, int] = {}
+_PENDING_LOCK = threading.Condition()
+_IN_FLIGHT = 0
+
+
+def _drain_forever() -> None:
+    global _IN_FLIGHT
+    while True:
+        tasks, paths = _QUEUE.get()
+        try:
+            for task in tasks:
+                try:
+                    task()
+                except Exception as exc:
+                    logger.warning(
+                        "post_commit.task_failed",
+                        task=getattr(task, "__name__", repr(task)),
+                        error=str(exc),
+                    )
+        finally:
+            with _PENDING_LOCK:
+                for path in paths:
+                    remaining = _PENDING.get(path, 0) - 1
+                    if remaining > 0:
+                        _PENDING[path] = remaining
+                    else:
+                        _PENDING.pop(path, None)
+                _IN_FLIGHT -= 1
+                _PENDING_LOCK.notify_all()
+
+
+def _ensure_drainer() -> None:
+    global _DRAINER
+    if _DRAINER is not None and _DRAINER.is_alive():
+        return
+    with _DRAINER_LOCK:
+        if _DRAINER is None or not _DRAINER.is_alive():
+            _DRAINER = threading.Thread(target=_drain_forever, name="post-commit", daemon=True)
+            _DRAINER.start()
+
+
+def _submit(tasks: list[Task], paths: list[str]) -> None:
+    global _IN_FLIGHT
+    if not tasks:
+        return
+    with _PENDING_LOCK:
+        for path in paths:
+            _PENDING[path] = _PENDING.get(path, 0) + 1
+        _IN_FLIGHT += 1
+    _ensure_drainer()
+    _QUEUE.put((tasks, paths))
+
+
+def mirror_pending(abs_path: str) -> bool:
+    """True while a committed write/remove of ``abs_path`` has not reached the disk yet.
+
+    A pending move of a directory above ``abs_path`` counts too.
+    """
+    path = os.path.abspath(abs_path)
+    with _PENDING_LOCK:
+        while path not in _PENDING:
+            parent = os.path.dirname(path)
+            if parent == path:
+                return False
+            path = parent
+        return True
+
+
+def flush_post_commit(timeout: float = 10.0) -> bool:
+    """Block until queued side effects have run; call before touching the disk mirror directly."""
+    with _PENDING_LOCK:
+        return _PENDING_LOCK.wait_for(lambda: _IN_FLIGHT == 0, timeout=timeout)
+
+
+def _write_mirror(abs_path: str, content: str) -> None:
+    os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+    with open(abs_path, "w") as fh:
+        fh.write(content)
+
+
+def _remove_mirror(abs_path: str) -> None:
+    if os.path.isfile(abs_path):
+        os.remove(abs_path)
+
+
+def _move_mirror(old_abs: str, new_abs: str, content: str) -> None:
+    os.makedirs(os.path.dirname(new_abs), exist_ok=True)
+    if os.path.isfile(old_abs):
+        shutil.move(old_abs, new_abs)
+    else:
+        with open(new_abs, "w") as fh:
+            fh.write(content or "")
+
+
+def _move_mirror_dir(old_abs: str, new_abs: str) -> None:
+    if not os.path.isdir(old_abs):
+        os.makedirs(new_abs, exist_ok=True)
+        return
+    os.makedirs(os.path.dirname(new_abs), exist_ok=True)
+    if not os.path.exists(new_abs):
+        shutil.move(old_abs, new_abs)
+        return
+    # Moving onto an existing directory merges the two trees
+    for root, _dirs, names in os.walk(old_abs):
+        target = os.path.join(new_abs, os.path.relpath(root, old_abs))
+        os.makedirs(target, exist_ok=True)
+        for name in names:
+            os.replace(os.path.join(root, name), os.path.join(target, name))
+    shutil.rmtree(old_abs, ignore_errors=True)
+
+
+class UnitOfWork:
+    """One write transaction plus the side effects that may only happen once it commits.
+
+    Rows, search index and links are written through ``db`` (pass ``db.connection()`` to
+    Core-level helpers so they share the transaction). Events are persisted in the same
+    commit; their Redis fan-out and the file mirror are queued and run after ``commit``
+    returns, so request latency is one commit. Nothing is queued if the transaction fails.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._tasks: list[Task] = []
+        self._paths: list[str] = []
+
+    def after_commit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        def task() -> None:
+            fn(*args, **kwargs)
+
+        task.__name__ = getattr(fn, "__name__", "task")
+        self._tasks.append(task)
+
+    def publish(self, project_id: str, event_type: str, payload: dict) -> None:
+        record_event(self.db, project_id, event_type, payload)
+        self.after_commit(fanout_event, project_id, event_type, payload)
+
+    def write_file(self, abs_path: str, content: str) -> None:
+        abs_path = os.path.abspath(abs_path)
+        self._paths.append(abs_path)
+        self.after_commit(_write_mirror, abs_path, content)
+
+    def remove_file(self, abs_path: str) -> None:
+        abs_path = os.path.abspath(abs_path)
+        self._paths.append(abs_path)
+        self.after_commit(_remove_mirror, abs_path)
+
+    def move_file(self, old_abs: str, new_abs: str, content: str) -> None:
+        """Move the mirror file, or write ``content`` at ``new_abs`` if there is nothing to move."""
+        old_abs, new_abs = os.path.abspath(old_abs), os.path.abspath(new_abs)
+        self._paths.extend([old_abs, new_abs])
+        self.after_commit(_move_mirror, old_abs, new_abs, content)
+
+    def move_dir(self, old_abs: str, new_abs: str) -> None:
+        """Rename a mirror directory in one step (merging into ``new_abs`` if it already exists)."""
+        old_abs, new_abs = os.path.abspath(old_abs), os.path.abspath(new_abs)
+        self._paths.extend([old_abs, new_abs])
+        self.after_commit(_move_mirror_dir, old_abs, new_abs)
+
+    @contextmanager
+    def savepoint(self) -> Iterator[None]:
+        """Scope one item of a batch: on error only its rows and queued side effects are undone."""
+        conn = self.db.connection()
+        if not conn.connection.dbapi_connection.in_transaction:
+            # pysqlite defers BEGIN to the first DML, and RELEASE of a SAVEPOINT that opened the
+            # transaction would commit it
+            conn.exec_driver_sql("BEGIN")
+        tasks, paths = len(self._tasks), len(self._paths)
+        try:
+            with self.db.begin_nested():
+                yield
+        except Exception:
+            del self._tasks[tasks:], self._paths[paths:]
+            raise
+
+    def commit(self) -> None:
+        try:
+            self.db.commit()
+        except Exception:
+            self.discard()
+            raise
+        tasks, paths = self._tasks, self._paths
+        self._tasks, self._paths = [], []
+        _submit(tasks, paths)
+
+    def discard(self) -> None:
+        self._tasks, self._paths = [], []
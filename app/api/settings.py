@@ -28,6 +28,25 @@ class Settings(BaseSettings):
     search_filters_v2: int = 1
     tags_v2: int = 1
     project_modal: int = 0
+    files_batch_max_items: int = 500
+    render_cache_max_entries: int = 2048
+    render_cache_dir: str | None = (
+        None  # e.g. data/render-cache; unset keeps the cache in memory only
+    )
+    link_graph_max_projects: int = 32
+    link_graph_ttl: int = (
+        300  # rebuild from the links table after this long, picking up other processes' writes
+    )
+    project_modal_cache_ttl: int = 300
+    project_modal_cache_max_entries: int = 512
+    git_history_cache_ttl: int = 86400
+    git_history_cache_max_commits: int = 1000
+    git_repo_handle_idle_seconds: int = 120
+    git_repo_handle_max: int = 64
+    # Worker-side remote fetches behind the cached repo/artifacts status
+    repo_fetch_interval: int = 300
+    repo_fetch_max_backoff: int = 3600
+    repo_fetch_tick: int = 60
     project_statuses: str | None = None
     file_types: str | None = None
     project_templates: str | None = None
@@ -1,11 +1,9 @@
 from __future__ import annotations
 
-from fastapi.testclient import TestClient
-
+from api.db import Base, engine, init_db
 from api.main import app
 from api.seed import ensure_seed
-from api.db import init_db, Base, engine
-
+from fastapi.testclient import TestClient
 
 HEADERS = {"X-Token": "devtoken"}
 
@@ -85,3 +83,105 @@ def test_tag_filtering() -> None:
         headers=HEADERS,
     ).json()
     assert all(tag in p.get("tags", []) for p in filtered.get("projects", []))
+
+
+def test_card_stats_follow_file_writes() -> None:
+    client = _make_client()
+    ensure_seed()
+    project = client.post("/api/projects", json={"name": "Stats Cards"}, headers=HEADERS).json()
+
+    def card() -> dict:
+        payload = client.get("/api/projects", params={"limit": 50}, headers=HEADERS).json()
+        return next(p for p in payload["projects"] if p["id"] == project["id"])
+
+    assert card()["file_count"] == 0
+
+    created = client.post(
+        f"/api/files/project/{project['id']}",
+        json={"title": "Main", "path": "src/main.py", "content_md": "print('hello')"},
+        headers=HEADERS,
+    ).json()
+    current = card()
+    assert current["file_count"] == 1
+    assert current["language_mix"] == [{"language": "Python", "count": 1}]
+    assert current["activity_sparkline"][-1] == 1
+    assert current["highlight"]["path"] == "src/main.py"
+
+    client.put(
+        f"/api/files/{created['id']}",
+        json={"title": "Readme", "path": "src/README.md", "content_md": "# Readme"},
+        headers=HEADERS,
+    )
+    current = card()
+    assert current["language_mix"] == [{"language": "Markdown", "count": 1}]
+    assert current["highlight"]["path"] == "src/README.md"
+
+    client.delete(f"/api/files/{created['id']}", headers=HEADERS)
+    current = card()
+    assert current["file_count"] == 0
+    assert current["language_mix"] == []
+    assert current["highlight"] is None
+
+
+def test_keyset_pagination_filters_and_total() -> None:
+    client = _make_client()
+    ensure_seed()
+    for idx in range(3):
+        client.post(
+            "/api/projects", json={"name": f"Paged {idx}", "status": "draft"}, headers=HEADERS
+        )
+
+    first = client.get(
+        "/api/projects", params={"limit": 2, "include_total": "true"}, headers=HEADERS
+    ).json()
+    total = first["total"]
+    assert total >= 3
+    seen = [p["id"] for p in first["projects"]]
+    cursor = first["next_cursor"]
+    while cursor:
+        page = client.get(
+            "/api/projects", params={"limit": 2, "cursor": cursor}, headers=HEADERS
+        ).json()
+        assert page["total"] is None
+        seen.extend(p["id"] for p in page["projects"])
+        cursor = page["next_cursor"]
+    assert len(seen) == len(set(seen)) == total
+
+    by_name = client.get(
+        "/api/projects", params={"limit": 50, "sort": "name"}, headers=HEADERS
+    ).json()
+    names = [p["name"].lower() for p in by_name["projects"]]
+    assert names == sorted(names)
+
+    drafts = client.get(
+        "/api/projects", params={"status": "draft", "limit": 50}, headers=HEADERS
+    ).json()
+    assert {p["name"] for p in drafts["projects"]} >= {"Paged 0", "Paged 1", "Paged 2"}
+    assert all(p["status"] == "draft" for p in drafts["projects"])
+
+    assert (
+        client.get("/api/projects", params={"cursor": "p1.garbage"}, headers=HEADERS).status_code
+        == 400
+    )
+
+
+def test_name_cursor_pages_through_non_ascii_names() -> None:
+    client = _make_client()
+    ensure_seed()
+    created = {"Über Alpha", "Über Beta", "Ésprit"}
+    for name in created:
+        client.post("/api/projects", json={"name": name}, headers=HEADERS)
+
+    seen: list[str] = []
+    cursor = None
+    while True:
+        params = {"limit": 1, "sort": "name", **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/projects", params=params, headers=HEADERS).json()
+        seen.extend(p["id"] for p in page["projects"])
+        names = {p["name"] for p in page["projects"]}
+        created -= names
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen))
+    assert not created
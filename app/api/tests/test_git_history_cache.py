@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import os
+
+from api import git_ops
+from api.git_ops import ensure_repo, repo_history
+from git import Repo
+
+
+def _commit(path: str, name: str) -> str:
+    with open(os.path.join(path, name), "w") as fh:
+        fh.write(name)
+    repo = Repo(path)
+    repo.index.add([name])
+    return repo.index.commit(f"add {name}").hexsha
+
+
+def test_repo_history_is_cached_by_head_and_extended_incrementally(tmp_path, monkeypatch):
+    path = str(tmp_path / "repo")
+    ensure_repo(path)
+    shas = [_commit(path, f"f{i}.md") for i in range(3)]
+
+    first = repo_history(path, limit=2)
+    assert [c["sha"] for c in first] == shas[::-1][:2]
+
+    walks: list[tuple] = []
+    real_walk = git_ops._walk_history
+
+    def counting_walk(repo, rev, limit=None, skip=0):
+        walks.append((rev, limit, skip))
+        return real_walk(repo, rev, limit, skip)
+
+    monkeypatch.setattr(git_ops, "_walk_history", counting_walk)
+
+    # Unchanged HEAD: served without touching git
+    assert [c["sha"] for c in repo_history(path, limit=2)] == shas[::-1][:2]
+    assert walks == []
+
+    # Deeper request only walks the missing tail
+    full = repo_history(path, limit=10)
+    assert [c["message"] for c in full][-1] == "chore: init artifacts repo"
+    assert len(full) == 4
+    assert walks == [(shas[-1], 8, 2)]
+
+    # New commit is prepended from head..new without re-walking the log
+    walks.clear()
+    newest = _commit(path, "f3.md")
+    again = repo_history(path, limit=10)
+    assert [c["sha"] for c in again][:2] == [newest, shas[-1]]
+    assert len(again) == 5
+    assert walks == [(f"{shas[-1]}..{newest}", git_ops.settings.git_history_cache_max_commits, 0)]
+
+
+def test_repo_handles_are_reused_and_evicted_when_idle(tmp_path, monkeypatch):
+    path = str(tmp_path / "handles")
+    ensure_repo(path)
+    git_ops.close_repo_handles()
+
+    with git_ops.open_repo(path) as first:
+        first.head.commit.message  # starts the persistent cat-file process
+    with git_ops.open_repo(path) as second:
+        assert second is first
+
+    closed: list = []
+    monkeypatch.setattr(git_ops, "_close_handle", lambda handle: closed.append(handle.repo))
+    monkeypatch.setattr(git_ops.settings, "git_repo_handle_idle_seconds", 0)
+    other = str(tmp_path / "other")
+    ensure_repo(other)
+    with git_ops.open_repo(other):
+        pass
+    assert closed == [first]
+    with git_ops.open_repo(path) as third:
+        assert third is not first
+    git_ops.close_repo_handles()
+
+
+def test_ingest_commits_walks_back_past_one_page(monkeypatch):
+    from api.db import SessionLocal
+    from api.main import app
+    from api.models import Activity, Project
+    from api.services import activity
+    from api.settings import settings
+    from fastapi.testclient import TestClient
+    from sqlalchemy import select
+
+    monkeypatch.setattr(activity, "_COMMIT_INGEST_LIMIT", 2)
+    with TestClient(app) as client:
+        headers = {"X-Token": "devtoken"}
+        body = {"name": "Deep History"}
+        project = client.post("/api/projects", json=body, headers=headers).json()
+    path = os.path.join(settings.data_dir, "projects", project["slug"], "artifacts")
+    ensure_repo(path)
+
+    def logged() -> set[str]:
+        with SessionLocal() as session:
+            refs = session.scalars(
+                select(Activity.ref).where(
+                    Activity.project_id == project["id"], Activity.type == "commit"
+                )
+            )
+            return {ref.removeprefix("commit:") for ref in refs}
+
+    def ingest() -> int:
+        with SessionLocal() as session:
+            return activity.ingest_commits(session, session.get(Project, project["id"]))
+
+    for i in range(5):
+        _commit(path, f"old{i}.md")
+    assert ingest() == 6
+    assert logged() == {c["sha"] for c in repo_history(path, limit=50)}
+
+    # Five new commits span three pages; the walk stops at the first page reaching logged history
+    for i in range(5):
+        _commit(path, f"new{i}.md")
+    assert ingest() == 6
+    assert logged() == {c["sha"] for c in repo_history(path, limit=50)}
+    assert len(logged()) == 11
+    assert ingest() == 0
@@ -11,3 +11,370 @@ def test_extract_wikilinks_ignores_broken():
     # Our simple regex matches well-formed [[...]] only
     assert extract_wikilinks(md)[-1] == "Z"
 
+
+def test_upsert_links_diffs_rows_and_resolves_only_referenced_titles():
+    from api.db import SessionLocal, engine
+    from api.links import upsert_links
+    from api.main import app
+    from api.models import File, Link
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    headers = {"X-Token": "devtoken"}
+    with TestClient(app) as client:
+        pid = client.post("/api/projects", json={"name": "Link Diff"}, headers=headers).json()["id"]
+        for title in ("Alpha", "Beta", "Unrelated"):
+            client.post(
+                f"/api/files/project/{pid}",
+                json={"title": title, "path": f"{title}.md", "content_md": title},
+                headers=headers,
+            )
+        src_id = client.post(
+            f"/api/files/project/{pid}",
+            json={
+                "title": "Src",
+                "path": "src.md",
+                "content_md": "[[Alpha]] [[Beta]] [[Alpha]] [[Missing]]",
+            },
+            headers=headers,
+        ).json()["id"]
+
+        with SessionLocal() as session:
+            before = {
+                link.id: (link.target_title, link.target_file_id)
+                for link in session.query(Link).filter(Link.src_file_id == src_id)
+            }
+            assert sorted(title for title, _ in before.values()) == [
+                "Alpha",
+                "Alpha",
+                "Beta",
+                "Missing",
+            ]
+            assert sum(1 for _, target in before.values() if target is None) == 1
+
+            statements: list[str] = []
+            listener = lambda conn, cursor, sql, *args: statements.append(sql)  # noqa: E731
+            event.listen(engine, "before_cursor_execute", listener)
+            try:
+                src = session.get(File, src_id)
+                upsert_links(session, pid, src, "[[Alpha]] [[Gamma]] [[Missing]]")
+            finally:
+                event.remove(engine, "before_cursor_execute", listener)
+
+            after = {
+                link.id: link.target_title
+                for link in session.query(Link).filter(Link.src_file_id == src_id)
+            }
+            assert sorted(after.values()) == ["Alpha", "Gamma", "Missing"]
+            # Surviving links keep their rows; only Gamma is new
+            kept = {lid for lid, (title, _) in before.items() if title in ("Alpha", "Missing")}
+            assert len(set(after) & kept) == 2
+            assert sum(1 for sql in statements if sql.startswith("INSERT INTO links")) == 1
+            title_queries = [sql for sql in statements if "FROM files" in sql and "title IN" in sql]
+            assert len(title_queries) == 1
+
+
+def test_links_follow_file_create_rename_and_delete():
+    from api.db import SessionLocal
+    from api.main import app
+    from api.models import Link
+    from fastapi.testclient import TestClient
+    from worker.jobs.file_jobs import relink_dangling_links
+
+    headers = {"X-Token": "devtoken"}
+
+    def target_of(src_id):
+        with SessionLocal() as session:
+            return session.query(Link.target_file_id).filter(Link.src_file_id == src_id).scalar()
+
+    with TestClient(app) as client:
+        pid = client.post("/api/projects", json={"name": "Relink"}, headers=headers).json()["id"]
+
+        def create(title, content=""):
+            body = {"title": title, "path": f"{title.lower()}.md", "content_md": content}
+            return client.post(f"/api/files/project/{pid}", json=body, headers=headers).json()
+
+        src = create("Src", "see [[Future]]")
+        assert target_of(src["id"]) is None
+
+        # Creating the target resolves the dangling link without resaving Src
+        future = create("Future")
+        assert target_of(src["id"]) == future["id"]
+        backlinks = client.get(f"/api/files/{future['id']}/backlinks", headers=headers).json()
+        assert [f["id"] for f in backlinks] == [src["id"]]
+
+        # Renaming it away (without rewriting sources) releases the link; a new "Future" claims it
+        client.put(
+            f"/api/files/{future['id']}",
+            json={"title": "Later", "path": "future.md", "content_md": "", "rewrite_links": False},
+            headers=headers,
+        )
+        assert target_of(src["id"]) is None
+        replacement = create("Future")
+        assert target_of(src["id"]) == replacement["id"]
+
+        assert client.delete(f"/api/files/{replacement['id']}", headers=headers).status_code == 204
+        assert target_of(src["id"]) is None
+
+        # The maintenance job repairs links the incremental path never saw
+        revived = create("Future")
+        stale = create("Stale")
+        with SessionLocal() as session:
+            session.query(Link).filter(Link.src_file_id == src["id"]).update(
+                {"target_file_id": stale["id"]}
+            )
+            session.commit()
+        assert relink_dangling_links(pid)["links"] == 1
+        assert target_of(src["id"]) == revived["id"]
+
+
+def test_backlinks_load_file_bodies_with_the_rows():
+    from api.db import engine
+    from api.main import app
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    headers = {"X-Token": "devtoken"}
+    with TestClient(app) as client:
+        pid = client.post(
+            "/api/projects", json={"name": "Backlink Bodies"}, headers=headers
+        ).json()["id"]
+
+        def create(title, content):
+            body = {"title": title, "path": f"{title.lower()}.md", "content_md": content}
+            return client.post(f"/api/files/project/{pid}", json=body, headers=headers).json()["id"]
+
+        target = create("Hub", "hub")
+        sources = {create(f"Spoke{i}", f"body {i} [[Hub]]") for i in range(4)}
+
+        statements: list[str] = []
+        listener = lambda conn, cursor, sql, *args: statements.append(sql)  # noqa: E731
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            resp = client.get(f"/api/files/{target}/backlinks", headers=headers)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert resp.status_code == 200
+        assert {f["id"] for f in resp.json()} == sources
+        assert all(f["content_md"].startswith("body ") for f in resp.json())
+        assert sum(1 for sql in statements if "FROM files" in sql) <= 2
+
+
+def test_batch_renames_rewrite_referencing_files_in_one_pass():
+    from api.db import SessionLocal, engine
+    from api.main import app
+    from api.models import File, Link
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event, text
+
+    headers = {"X-Token": "devtoken"}
+    with TestClient(app) as client:
+        pid = client.post("/api/projects", json={"name": "Rename Rewrite"}, headers=headers).json()[
+            "id"
+        ]
+
+        def create(title, content):
+            body = {"title": title, "path": f"{title.lower()}.md", "content_md": content}
+            return client.post(f"/api/files/project/{pid}", json=body, headers=headers).json()["id"]
+
+        alpha, beta = create("Alpha", "first"), create("Beta", "second")
+        src = create("Src", "See [[Alpha]] then [[Beta]].")
+        create("Bystander", "mentions Alpha in plain text")
+
+        statements: list[str] = []
+        listener = lambda conn, cursor, sql, *args: statements.append(sql)  # noqa: E731
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            # Swapped renames must not chain: Alpha -> Gamma, Beta -> Alpha
+            resp = client.post(
+                "/api/files/batch",
+                json={
+                    "items": [
+                        {
+                            "op": "update",
+                            "file_id": alpha,
+                            "path": "alpha.md",
+                            "title": "Gamma",
+                            "content_md": "first",
+                        },
+                        {
+                            "op": "update",
+                            "file_id": beta,
+                            "path": "beta.md",
+                            "title": "Alpha",
+                            "content_md": "second",
+                        },
+                    ]
+                },
+                headers=headers,
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert resp.status_code == 200, resp.text
+        assert not any("LIKE" in sql and "content_md" in sql for sql in statements)
+
+        with SessionLocal() as session:
+            assert session.get(File, src).content_md == "See [[Gamma]] then [[Alpha]]."
+            assert session.get(File, src).summary == "See [[Gamma]] then [[Alpha]]."
+            targets = {
+                link.target_title: link.target_file_id
+                for link in session.query(Link).filter(Link.src_file_id == src)
+            }
+            assert targets == {"Gamma": alpha, "Alpha": beta}
+
+        with engine.connect() as conn:
+            hits = (
+                conn.execute(
+                    text("SELECT file_id FROM search_index WHERE search_index MATCH 'Gamma'")
+                )
+                .scalars()
+                .all()
+            )
+            assert src in hits
+
+
+def test_link_graph_neighborhoods_orphans_and_incremental_updates():
+    from api.main import app
+    from api.services import link_graph
+    from fastapi.testclient import TestClient
+
+    headers = {"X-Token": "devtoken"}
+    with TestClient(app) as client:
+        pid = client.post("/api/projects", json={"name": "Link Graph"}, headers=headers).json()[
+            "id"
+        ]
+
+        def create(title, content=""):
+            body = {"title": title, "path": f"{title.lower()}.md", "content_md": content}
+            return client.post(f"/api/files/project/{pid}", json=body, headers=headers).json()["id"]
+
+        c = create("C")
+        b = create("B", "[[C]] [[C]]")
+        a = create("A", "[[B]] [[Missing]] [[A]]")
+        lonely = create("Lonely")
+        graph_url = f"/api/projects/{pid}/graph"
+
+        resp = client.get(
+            f"{graph_url}/neighborhood", params={"file_id": a, "depth": 1}, headers=headers
+        )
+        assert resp.status_code == 200, resp.text
+        body = resp.json()
+        assert [(n["file_id"], n["distance"]) for n in body["nodes"]] == [(a, 0), (b, 1)]
+        assert body["edges"] == [{"src_file_id": a, "target_file_id": b}]
+
+        body = client.get(
+            f"{graph_url}/neighborhood",
+            params={"file_id": c, "depth": 2, "direction": "in"},
+            headers=headers,
+        ).json()
+        assert {n["file_id"]: n["distance"] for n in body["nodes"]} == {c: 0, b: 1, a: 2}
+        body = client.get(
+            f"{graph_url}/neighborhood",
+            params={"file_id": c, "depth": 2, "direction": "out"},
+            headers=headers,
+        ).json()
+        assert [n["file_id"] for n in body["nodes"]] == [c]
+        body = client.get(
+            f"{graph_url}/neighborhood",
+            params={"file_id": a, "depth": 3, "limit": 2},
+            headers=headers,
+        ).json()
+        assert len(body["nodes"]) == 2 and body["truncated"] is True
+
+        orphans = client.get(f"{graph_url}/orphans", headers=headers).json()
+        assert [n["file_id"] for n in orphans["items"]] == [lonely]
+        ranked = client.get(f"{graph_url}/most-linked", headers=headers).json()["items"]
+        assert {(n["file_id"], n["in_degree"]) for n in ranked} == {(b, 1), (c, 1)}
+
+        # Saving a file publishes a patched copy of the cached graph instead of rebuilding it
+        graph = link_graph.get_graph(None, pid)
+        client.put(
+            f"/api/files/{lonely}",
+            json={"title": "Lonely", "path": "lonely.md", "content_md": "[[C]]"},
+            headers=headers,
+        )
+        patched = link_graph.get_graph(None, pid)
+        assert patched is not graph and patched.built_at == graph.built_at
+        # Readers still holding the old snapshot see it unchanged
+        assert graph.out_neighbors(graph.index[lonely]) == []
+        assert client.get(f"{graph_url}/orphans", headers=headers).json()["total"] == 0
+        ranked = client.get(
+            f"{graph_url}/most-linked", params={"limit": 1}, headers=headers
+        ).json()["items"]
+        assert [(n["file_id"], n["in_degree"]) for n in ranked] == [(c, 2)]
+
+        # A file created after the build is a node right away, and links to it are kept
+        fresh = create("Fresh")
+        assert [
+            n["file_id"]
+            for n in client.get(f"{graph_url}/orphans", headers=headers).json()["items"]
+        ] == [fresh]
+        client.put(
+            f"/api/files/{lonely}",
+            json={"title": "Lonely", "path": "lonely.md", "content_md": "[[C]] [[Fresh]]"},
+            headers=headers,
+        )
+        assert client.get(f"{graph_url}/orphans", headers=headers).json()["total"] == 0
+        assert link_graph.get_graph(None, pid).built_at == graph.built_at
+
+        # Deleting a linked file drops the cached graph; the next read rebuilds without it
+        assert client.delete(f"/api/files/{c}", headers=headers).status_code == 204
+        body = client.get(
+            f"{graph_url}/neighborhood", params={"file_id": a, "depth": 3}, headers=headers
+        ).json()
+        assert link_graph.get_graph(None, pid).built_at != graph.built_at
+        assert {n["file_id"] for n in body["nodes"]} == {a, b}
+        ranked = client.get(f"{graph_url}/most-linked", headers=headers).json()["items"]
+        assert {(n["file_id"], n["in_degree"]) for n in ranked} == {(b, 1), (fresh, 1)}
+
+        missing = client.get(
+            f"{graph_url}/neighborhood", params={"file_id": "nope"}, headers=headers
+        )
+        assert missing.status_code == 404
+
+
+def test_link_graph_file_lookups_are_chunked(monkeypatch):
+    from api.db import engine
+    from api.main import app
+    from api.routers import link_graph as link_graph_router
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    headers = {"X-Token": "devtoken"}
+    monkeypatch.setattr(link_graph_router, "_META_CHUNK", 2)
+    with TestClient(app) as client:
+        body = {"name": "Chunked Graph"}
+        pid = client.post("/api/projects", json=body, headers=headers).json()["id"]
+        ids = []
+        for i in range(5):
+            body = {"title": f"Alone {i}", "path": f"alone-{i}.md", "content_md": ""}
+            created = client.post(f"/api/files/project/{pid}", json=body, headers=headers)
+            ids.append(created.json()["id"])
+        orphans_url = f"/api/projects/{pid}/graph/orphans"
+        client.get(orphans_url, headers=headers)
+
+        statements: list[str] = []
+        listener = lambda conn, cursor, sql, *args: statements.append(sql)  # noqa: E731
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            resp = client.get(orphans_url, params={"limit": 3}, headers=headers)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert resp.status_code == 200
+        assert resp.json()["total"] == 5
+        assert [n["file_id"] for n in resp.json()["items"]] == ids[:3]
+        assert sum(1 for sql in statements if "files.id IN" in sql) == 3
+
+
+def test_link_graph_patches_are_copies_and_keep_unseen_targets():
+    from api.services.link_graph import LinkGraph
+
+    graph = LinkGraph("p", ["a", "b"], [("a", "b"), ("a", "b"), ("b", "b")])
+    assert graph.orphans() == []
+    # "new" was created elsewhere after the build; the edge to it must not be dropped
+    patched = graph.patched([], {"b": ["new"]})
+    assert patched.most_linked(5) == [("b", 1), ("new", 1)]
+    assert patched.neighborhood("new", 2, "in")[0] == {"new": 0, "b": 1, "a": 2}
+    # The original snapshot is untouched
+    assert graph.ids == ["a", "b"] and graph.out_neighbors(1) == [1]
+    assert graph.patched(["c"], {}).orphans() == ["c"]
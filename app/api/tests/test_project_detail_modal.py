@@ -2,11 +2,10 @@ from __future__ import annotations
 
 from contextlib import contextmanager
 
-from fastapi.testclient import TestClient
-
 from api.main import app
 from api.seed import ensure_seed
 from api.settings import settings
+from fastapi.testclient import TestClient
 
 
 def _auth_headers() -> dict[str, str]:
@@ -70,3 +69,230 @@ def test_project_modal_summary_tree_preview_and_activity_endpoints():
         assert "items" in activity
         assert isinstance(activity["items"], list)
         assert "sources" in activity
+
+
+def test_project_tree_query_and_path_lookup_use_path_index():
+    ensure_seed()
+    client = TestClient(app)
+
+    with project_modal_enabled():
+        project_id, _ = _get_project_id(client)
+
+        tree_resp = client.get(
+            f"/api/projects/{project_id}/tree", params={"q": "LAN.m"}, headers=_auth_headers()
+        )
+        assert tree_resp.status_code == 200
+        paths = [node["path"] for node in tree_resp.json()["items"]]
+        assert paths == ["ideation/plan.md"]
+
+        dir_resp = client.get(
+            f"/api/projects/{project_id}/tree", params={"q": "idea"}, headers=_auth_headers()
+        )
+        assert dir_resp.status_code == 200
+        dir_paths = {node["path"] for node in dir_resp.json()["items"]}
+        assert {"ideation", "ideation/plan.md"} <= dir_paths
+
+    paths_resp = client.get(
+        "/api/search/paths", params={"q": "prd", "project_id": project_id}, headers=_auth_headers()
+    )
+    assert paths_resp.status_code == 200
+    assert [item["path"] for item in paths_resp.json()["items"]] == ["prd.md"]
+
+
+def test_project_modal_cache_revalidates_with_cheap_signature():
+    ensure_seed()
+    client = TestClient(app)
+
+    with project_modal_enabled():
+        project_id, _ = _get_project_id(client)
+
+        first = client.get(f"/api/projects/{project_id}/modal", headers=_auth_headers())
+        assert first.status_code == 200
+        etag = first.headers["ETag"]
+
+        cached = client.get(f"/api/projects/{project_id}/modal", headers=_auth_headers())
+        assert cached.json() == first.json()
+        assert cached.headers["ETag"] == etag
+
+        not_modified = client.get(
+            f"/api/projects/{project_id}/modal",
+            headers={**_auth_headers(), "If-None-Match": f'"{etag}"'},
+        )
+        assert not_modified.status_code == 304
+
+        created = client.post(
+            f"/api/files/project/{project_id}",
+            json={"title": "Modal Cache", "path": "notes/modal-cache.md", "content_md": "# Modal"},
+            headers=_auth_headers(),
+        )
+        assert created.status_code == 201
+
+        changed = client.get(
+            f"/api/projects/{project_id}/modal",
+            headers={**_auth_headers(), "If-None-Match": f'"{etag}"'},
+        )
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+        assert changed.json()["file_count"] == first.json()["file_count"] + 1
+
+
+def test_project_tree_levels_follow_directory_index():
+    ensure_seed()
+    client = TestClient(app)
+
+    with project_modal_enabled():
+        project = client.post(
+            "/api/projects", json={"name": "Tree Index"}, headers=_auth_headers()
+        ).json()
+        pid = project["id"]
+        created = {}
+        for path in ("docs/api/auth.md", "docs/intro.md", "root.md"):
+            resp = client.post(
+                f"/api/files/project/{pid}",
+                json={"title": path, "path": path, "content_md": "x"},
+                headers=_auth_headers(),
+            )
+            created[path] = resp.json()["id"]
+
+        def level(path: str | None = None) -> dict[str, dict]:
+            params = {"path": path} if path else {}
+            resp = client.get(f"/api/projects/{pid}/tree", params=params, headers=_auth_headers())
+            assert resp.status_code == 200
+            return {node["path"]: node for node in resp.json()["items"]}
+
+        root = level()
+        assert set(root) == {"docs", "root.md"}
+        assert root["docs"]["children_count"] == 2
+
+        docs = level("docs")
+        assert set(docs) == {"docs/api", "docs/intro.md"}
+        assert docs["docs/api"]["children_count"] == 1
+
+        client.delete(f"/api/files/{created['docs/api/auth.md']}", headers=_auth_headers())
+        assert set(level("docs")) == {"docs/intro.md"}
+
+        client.put(
+            f"/api/files/{created['root.md']}",
+            json={"title": "root", "path": "notes/root.md", "content_md": "x"},
+            headers=_auth_headers(),
+        )
+        root = level()
+        assert set(root) == {"docs", "notes"}
+        assert level("notes")["notes/root.md"]["type"] == "file"
+
+
+def test_project_activity_pages_through_activity_log():
+    ensure_seed()
+    client = TestClient(app)
+
+    with project_modal_enabled():
+        project = client.post(
+            "/api/projects", json={"name": "Activity Log"}, headers=_auth_headers()
+        ).json()
+        pid = project["id"]
+        for idx in range(3):
+            client.post(
+                f"/api/files/project/{pid}",
+                json={"title": f"Note {idx}", "path": f"note-{idx}.md", "content_md": "x"},
+                headers=_auth_headers(),
+            )
+
+        seen: list[dict] = []
+        cursor = None
+        while True:
+            params: dict = {"limit": 2, "types[]": "file_change"}
+            if cursor:
+                params["cursor"] = cursor
+            resp = client.get(
+                f"/api/projects/{pid}/activity", params=params, headers=_auth_headers()
+            )
+            assert resp.status_code == 200
+            payload = resp.json()
+            seen.extend(payload["items"])
+            cursor = payload["next_cursor"]
+            if not cursor:
+                break
+
+        assert [item["message"] for item in seen] == [
+            "Note 2 created",
+            "Note 1 created",
+            "Note 0 created",
+        ]
+        assert all(item["type"] == "file_change" for item in seen)
+        assert "files" in payload["sources"]
+
+        commits = client.get(
+            f"/api/projects/{pid}/activity", params={"types[]": "commit"}, headers=_auth_headers()
+        )
+        assert commits.json()["items"] == []
+
+        bad = client.get(
+            f"/api/projects/{pid}/activity", params={"cursor": "nope"}, headers=_auth_headers()
+        )
+        assert bad.status_code == 400
+
+
+def test_project_modal_signature_covers_paths():
+    from api.db import engine
+    from sqlalchemy import text
+
+    ensure_seed()
+    client = TestClient(app)
+
+    with project_modal_enabled():
+        project_id, _ = _get_project_id(client)
+        created = client.post(
+            f"/api/files/project/{project_id}",
+            json={"title": "Signature Path", "path": "sig/before.md", "content_md": "# Sig"},
+            headers=_auth_headers(),
+        )
+        assert created.status_code == 201
+        etag = client.get(f"/api/projects/{project_id}/modal", headers=_auth_headers()).headers[
+            "ETag"
+        ]
+
+        # A path-only change keeps the counts and every updated_at
+        with engine.begin() as conn:
+            conn.execute(
+                text("UPDATE files SET path = 'sig/after.md' WHERE id = :id"),
+                {"id": created.json()["id"]},
+            )
+
+        changed = client.get(
+            f"/api/projects/{project_id}/modal",
+            headers={**_auth_headers(), "If-None-Match": f'"{etag}"'},
+        )
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+
+
+def test_project_modal_follows_directory_moves():
+    client = TestClient(app)
+
+    with project_modal_enabled():
+        body = {"name": "Modal Move"}
+        project_id = client.post("/api/projects", json=body, headers=_auth_headers()).json()["id"]
+        created = client.post(
+            f"/api/files/project/{project_id}",
+            json={"title": "Readme", "path": "docs/README.md", "content_md": "# Readme"},
+            headers=_auth_headers(),
+        )
+        assert created.status_code == 201
+        first = client.get(f"/api/projects/{project_id}/modal", headers=_auth_headers())
+        assert first.json()["readme_path"] == "docs/README.md"
+        etag = first.headers["ETag"]
+
+        moved = client.post(
+            "/api/files/batch/move",
+            json={"dirs": [{"from_project_id": project_id, "path": "docs", "new_path": "guides"}]},
+            headers=_auth_headers(),
+        )
+        assert moved.status_code == 200 and not moved.json()["failures"]
+
+        after = client.get(
+            f"/api/projects/{project_id}/modal",
+            headers={**_auth_headers(), "If-None-Match": f'"{etag}"'},
+        )
+        assert after.status_code == 200
+        assert after.headers["ETag"] != etag
+        assert after.json()["readme_path"] == "guides/README.md"
@@ -1,12 +1,11 @@
 from __future__ import annotations
 
-from fastapi.testclient import TestClient
-
+from api.db import SessionLocal
 from api.main import app
+from api.models import Event, File
 from api.seed import ensure_seed
-from api.db import SessionLocal
-from api.models import Event
-
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect, select
 
 HEADERS = {"X-Token": "devtoken"}
 
@@ -83,3 +82,505 @@ def test_project_files_metadata_and_directories():
     directories = dirs_resp.json()
     paths = [item["path"] for item in directories]
     assert "docs" in paths
+
+
+def test_file_bodies_are_deferred_and_content_stats_tracked():
+    ensure_seed()
+    client = TestClient(app)
+    project_id = client.get("/api/projects", headers=HEADERS).json()["projects"][0]["id"]
+    body = {"title": "Sized", "path": "sized.md", "content_md": "héllo"}
+    created = client.post(f"/api/files/project/{project_id}", json=body, headers=HEADERS).json()
+
+    with SessionLocal() as session:
+        row = session.scalars(select(File).where(File.id == created["id"])).one()
+        assert {"content_md", "rendered_html"} <= inspect(row).unloaded
+        first_sha = row.content_sha256
+        assert row.size_bytes == len(row.content_md.encode("utf-8"))
+        assert first_sha
+
+    update = {"title": "Sized", "path": "sized.md", "content_md": "changed body"}
+    assert (
+        client.put(f"/api/files/{created['id']}", json=update, headers=HEADERS).status_code == 200
+    )
+    with SessionLocal() as session:
+        row = session.get(File, created["id"])
+        assert row.content_sha256 != first_sha
+        assert row.size_bytes == len(row.content_md.encode("utf-8"))
+
+
+def test_file_save_is_one_commit_with_deferred_side_effects(monkeypatch):
+    import os
+
+    from api.db import engine
+    from api.services import unit_of_work
+    from api.settings import settings
+    from sqlalchemy import event, text
+
+    with TestClient(app) as client:
+        project = client.post(
+            "/api/projects", json={"name": "Unit Of Work"}, headers=HEADERS
+        ).json()
+        body = {"title": "Saved", "path": "notes/saved.md", "content_md": "first [[Other]]"}
+        created = client.post(
+            f"/api/files/project/{project['id']}", json=body, headers=HEADERS
+        ).json()
+        unit_of_work.flush_post_commit()
+        abs_path = os.path.join(
+            settings.data_dir, "projects", project["slug"], "files", "notes", "saved.md"
+        )
+
+        # Hold the drainer so the mirror write is observably deferred
+        gate = unit_of_work.threading.Event()
+        real_write = unit_of_work._write_mirror
+
+        def gated_write(path, content):
+            gate.wait(5)
+            real_write(path, content)
+
+        monkeypatch.setattr(unit_of_work, "_write_mirror", gated_write)
+        commits: list[int] = []
+        listener = lambda conn: commits.append(1)  # noqa: E731
+        event.listen(engine, "commit", listener)
+        try:
+            resp = client.put(
+                f"/api/files/{created['id']}",
+                json={**body, "content_md": "second [[Other]] [[Third]]"},
+                headers=HEADERS,
+            )
+        finally:
+            event.remove(engine, "commit", listener)
+        assert resp.status_code == 200
+        assert len(commits) == 1
+
+        # Row, search index, links and event are visible as soon as the request returns
+        with engine.connect() as conn:
+            assert (
+                conn.execute(
+                    text(
+                        "SELECT COUNT(*) FROM search_index"
+                        " WHERE file_id = :fid AND search_index MATCH 'second'"
+                    ),
+                    {"fid": created["id"]},
+                ).scalar()
+                == 1
+            )
+            assert (
+                conn.execute(
+                    text("SELECT COUNT(*) FROM links WHERE src_file_id = :fid"),
+                    {"fid": created["id"]},
+                ).scalar()
+                == 2
+            )
+        with SessionLocal() as session:
+            assert (
+                session.query(Event)
+                .filter(Event.type == "file.updated")
+                .filter(Event.project_id == project["id"])
+                .count()
+                == 1
+            )
+
+        # While the mirror write is pending, raw serves the committed row, not the stale file
+        with open(abs_path) as fh:
+            assert fh.read() == "first [[Other]]"
+        raw = client.get(f"/api/files/{created['id']}/raw", headers=HEADERS)
+        assert raw.text == "second [[Other]] [[Third]]"
+
+        gate.set()
+        assert unit_of_work.flush_post_commit()
+        with open(abs_path) as fh:
+            assert fh.read() == "second [[Other]] [[Third]]"
+
+
+def test_batch_write_creates_and_updates_in_one_transaction():
+    from api.db import engine
+    from api.models import Link
+    from api.services.unit_of_work import flush_post_commit
+    from sqlalchemy import text
+
+    with TestClient(app) as client:
+        project = client.post(
+            "/api/projects", json={"name": "Batch Writes"}, headers=HEADERS
+        ).json()
+        pid = project["id"]
+        existing = client.post(
+            f"/api/files/project/{pid}",
+            json={"title": "Existing", "path": "existing.md", "content_md": "old"},
+            headers=HEADERS,
+        ).json()
+
+        resp = client.post(
+            "/api/files/batch",
+            json={
+                "items": [
+                    {
+                        "project_id": pid,
+                        "title": "Alpha",
+                        "path": "batch/alpha.md",
+                        "content_md": "see [[Beta]]",
+                    },
+                    {
+                        "project_id": pid,
+                        "title": "Beta",
+                        "path": "batch/beta.md",
+                        "content_md": "back to [[Alpha]]",
+                    },
+                    {
+                        "op": "update",
+                        "file_id": existing["id"],
+                        "path": "existing.md",
+                        "content_md": "zebrafish",
+                        "tags": ["Batch"],
+                    },
+                    {"project_id": "missing", "path": "nope.md", "content_md": "x"},
+                    {"op": "update", "file_id": "missing", "path": "nope.md", "content_md": "x"},
+                ]
+            },
+            headers=HEADERS,
+        )
+        assert resp.status_code == 200, resp.text
+        payload = resp.json()
+        assert (payload["created"], payload["updated"], payload["failed"]) == (2, 1, 2)
+        assert [r["status"] for r in payload["results"]] == [
+            "created",
+            "created",
+            "updated",
+            "error",
+            "error",
+        ]
+        assert payload["results"][3]["error"]["code"] == "NOT_FOUND"
+        alpha_id, beta_id = payload["results"][0]["file_id"], payload["results"][1]["file_id"]
+
+        with SessionLocal() as session:
+            # Links resolve against files created in the same batch
+            targets = {
+                row.src_file_id: row.target_file_id
+                for row in session.query(Link).filter(Link.src_file_id.in_([alpha_id, beta_id]))
+            }
+            assert targets == {alpha_id: beta_id, beta_id: alpha_id}
+            batch_events = (
+                session.query(Event)
+                .filter(Event.project_id == pid, Event.type == "files.batch_written")
+                .all()
+            )
+            assert len(batch_events) == 1
+            assert (
+                batch_events[0].payload["created"] == 2 and batch_events[0].payload["updated"] == 1
+            )
+            assert session.get(File, existing["id"]).tags == ["Batch"]
+
+        with engine.connect() as conn:
+            hits = (
+                conn.execute(
+                    text("SELECT file_id FROM search_index WHERE search_index MATCH 'zebrafish'")
+                )
+                .scalars()
+                .all()
+            )
+            assert hits == [existing["id"]]
+
+        flush_post_commit()
+
+        too_many = client.post(
+            "/api/files/batch",
+            json={
+                "items": [
+                    {"project_id": pid, "path": f"f{i}.md", "content_md": ""} for i in range(501)
+                ]
+            },
+            headers=HEADERS,
+        )
+        assert too_many.status_code == 400
+        assert too_many.json()["detail"]["code"] == "BATCH_TOO_LARGE"
+
+
+def test_batch_write_rejects_repeated_items():
+    from api.db import engine
+    from api.models import Link
+    from sqlalchemy import text
+
+    with TestClient(app) as client:
+        pid = client.post(
+            "/api/projects", json={"name": "Batch Duplicates"}, headers=HEADERS
+        ).json()["id"]
+        target = client.post(
+            f"/api/files/project/{pid}",
+            json={"title": "Target", "path": "target.md", "content_md": ""},
+            headers=HEADERS,
+        ).json()
+        file_id = client.post(
+            f"/api/files/project/{pid}",
+            json={"title": "Twice", "path": "twice.md", "content_md": "old"},
+            headers=HEADERS,
+        ).json()["id"]
+
+        resp = client.post(
+            "/api/files/batch",
+            json={
+                "items": [
+                    {
+                        "op": "update",
+                        "file_id": file_id,
+                        "path": "twice.md",
+                        "content_md": "first [[Target]]",
+                    },
+                    {
+                        "op": "update",
+                        "file_id": file_id,
+                        "path": "twice.md",
+                        "content_md": "second [[Target]]",
+                    },
+                    {"project_id": pid, "path": "fresh.md", "content_md": ""},
+                    {"project_id": pid, "path": "fresh.md", "content_md": ""},
+                ]
+            },
+            headers=HEADERS,
+        )
+        assert resp.status_code == 200, resp.text
+        payload = resp.json()
+        assert [r["status"] for r in payload["results"]] == ["updated", "error", "created", "error"]
+        assert {payload["results"][i]["error"]["code"] for i in (1, 3)} == {"DUPLICATE_ITEM"}
+
+        with SessionLocal() as session:
+            assert session.get(File, file_id).content_md == "first [[Target]]"
+            links = session.query(Link).filter(Link.src_file_id == file_id).all()
+            assert [link.target_file_id for link in links] == [target["id"]]
+            assert (
+                session.query(File).filter(File.project_id == pid, File.path == "fresh.md").count()
+                == 1
+            )
+
+        with engine.connect() as conn:
+            for table in ("search_index", "file_suggest_index", "file_path_index"):
+                rows = conn.execute(
+                    text(f"SELECT count(*) FROM {table} WHERE file_id = :id"), {"id": file_id}
+                ).scalar()
+                assert rows == 1, table
+
+
+def test_listing_fields_are_stored_on_write_and_backfilled(monkeypatch):
+    import api.models as models
+    from api.db import SessionLocal, engine
+    from api.models import File
+    from api.routers import files as files_router
+    from sqlalchemy import event, update
+    from worker.jobs.file_jobs import backfill_listing_fields
+
+    with TestClient(app) as client:
+        project = client.post(
+            "/api/projects", json={"name": "Listing Fields"}, headers=HEADERS
+        ).json()
+        body = {
+            "title": "Plan",
+            "path": "plan.md",
+            "content_md": "Ship the [importer](https://example.com) next week.",
+            "front_matter": {"status": "draft"},
+        }
+        created = client.post(
+            f"/api/files/project/{project['id']}", json=body, headers=HEADERS
+        ).json()
+        assert created["summary"] == "Ship the importer next week."
+        assert created["metadata_fields"][0]["label"] == "Status"
+
+        with SessionLocal() as session:
+            row = session.get(File, created["id"])
+            assert (row.summary, row.description) == ("Ship the importer next week.", None)
+            assert row.metadata_signature == created["metadata_signature"]
+
+        # Body and front matter both change; the fields are derived once, at flush
+        derive_calls: list[int] = []
+        real_derive = models.derive_listing_fields
+        monkeypatch.setattr(
+            models, "derive_listing_fields", lambda *a: derive_calls.append(1) or real_derive(*a)
+        )
+        updated = client.put(
+            f"/api/files/{created['id']}",
+            json={**body, "front_matter": {"status": "done", "description": "Importer rollout"}},
+            headers=HEADERS,
+        ).json()
+        monkeypatch.undo()
+        assert len(derive_calls) == 1
+        assert (updated["summary"], updated["description"]) == (
+            "Importer rollout",
+            "Importer rollout",
+        )
+        assert updated["metadata_signature"] != created["metadata_signature"]
+
+        # Rows from before the columns existed are derived on read until the job fills them in
+        with SessionLocal() as session:
+            session.execute(
+                update(File)
+                .where(File.id == created["id"])
+                .values(
+                    summary=None,
+                    description=None,
+                    metadata_fields=None,
+                    metadata_signature=None,
+                    derived_version=None,
+                )
+            )
+            session.commit()
+            stamp = session.get(File, created["id"]).updated_at
+        # Stale rows come with their body in the listing query instead of one lazy load each
+        monkeypatch.setattr(files_router, "_LISTING_FIELDS_CURRENT", False)
+        statements: list[str] = []
+        listener = lambda conn, cursor, sql, *args: statements.append(sql)  # noqa: E731
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            recent = client.get("/api/files/recent", params={"limit": 50}, headers=HEADERS).json()
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert not [sql for sql in statements if sql.lstrip().startswith("SELECT files.content_md")]
+        assert {item["id"]: item["summary"] for item in recent["items"]}[
+            created["id"]
+        ] == "Importer rollout"
+
+        assert backfill_listing_fields()["files"] >= 1
+        with SessionLocal() as session:
+            row = session.get(File, created["id"])
+            assert (row.summary, row.derived_version) == ("Importer rollout", 1)
+            assert row.metadata_fields == updated["metadata_fields"]
+            assert row.updated_at == stamp
+
+
+def test_batch_move_directory_is_one_set_based_transaction():
+    import os
+
+    from api.db import SessionLocal, engine
+    from api.models import Event, File, Link
+    from api.services.unit_of_work import flush_post_commit
+    from api.settings import settings
+    from sqlalchemy import event, text
+
+    with TestClient(app) as client:
+        project = client.post("/api/projects", json={"name": "Bulk Move"}, headers=HEADERS).json()
+        pid = project["id"]
+        ids = {}
+        for path, content in [
+            ("notes/a.md", "alpha links [[Deep]]"),
+            ("notes/sub/deep.md", "deepwater"),
+            ("notes2/keep.md", "sibling prefix"),
+        ]:
+            body = {
+                "title": os.path.basename(path)[:-3].title(),
+                "path": path,
+                "content_md": content,
+            }
+            ids[path] = client.post(f"/api/files/project/{pid}", json=body, headers=HEADERS).json()[
+                "id"
+            ]
+        flush_post_commit()
+
+        commits: list[int] = []
+        listener = lambda conn: commits.append(1)  # noqa: E731
+        event.listen(engine, "commit", listener)
+        try:
+            resp = client.post(
+                "/api/files/batch/move",
+                json={
+                    "dirs": [{"from_project_id": pid, "path": "notes", "new_path": "archive/notes"}]
+                },
+                headers=HEADERS,
+            )
+        finally:
+            event.remove(engine, "commit", listener)
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["files_count"] == 2 and not resp.json()["failures"]
+        assert len(commits) == 1
+
+        with SessionLocal() as session:
+            rows = {
+                f.id: (f.path, f.dir_path)
+                for f in session.query(File).filter(File.project_id == pid)
+            }
+            assert rows[ids["notes/a.md"]] == ("archive/notes/a.md", "archive/notes")
+            assert rows[ids["notes/sub/deep.md"]] == (
+                "archive/notes/sub/deep.md",
+                "archive/notes/sub",
+            )
+            assert rows[ids["notes2/keep.md"]] == ("notes2/keep.md", "notes2")
+            link = session.query(Link).filter(Link.src_file_id == ids["notes/a.md"]).one()
+            assert link.src_path == "archive/notes/a.md"
+            events = (
+                session.query(Event)
+                .filter(Event.project_id == pid, Event.type == "files.batch_moved")
+                .all()
+            )
+            assert len(events) == 1 and events[0].payload["files"] == 2
+
+        with engine.connect() as conn:
+            hit = conn.execute(
+                text("SELECT path FROM search_index WHERE search_index MATCH 'deepwater'")
+            ).scalar_one()
+            assert hit == "archive/notes/sub/deep.md"
+
+        flush_post_commit()
+        files_dir = os.path.join(settings.data_dir, "projects", project["slug"], "files")
+        assert os.path.isfile(os.path.join(files_dir, "archive", "notes", "sub", "deep.md"))
+        assert not os.path.exists(os.path.join(files_dir, "notes"))
+        tree = client.get(
+            f"/api/projects/{pid}/files/tree", params={"path": "archive"}, headers=HEADERS
+        )
+        assert tree.status_code == 200
+
+
+def test_batch_move_rolls_back_only_the_failing_item(monkeypatch):
+    import os
+    import sqlite3
+
+    from api.db import engine
+    from api.routers import files as files_router
+    from api.services.unit_of_work import flush_post_commit
+    from api.settings import settings
+
+    with TestClient(app) as client:
+        body = {"name": "Partial Move"}
+        project = client.post("/api/projects", json=body, headers=HEADERS).json()
+        pid = project["id"]
+        ids = {}
+        for path in ["a.md", "b.md"]:
+            body = {"title": path[:-3].upper(), "path": path, "content_md": path}
+            created = client.post(f"/api/files/project/{pid}", json=body, headers=HEADERS)
+            ids[path] = created.json()["id"]
+        flush_post_commit()
+
+        committed_early: list[str] = []
+        real_move_file_path = files_router.move_file_path
+
+        def failing_move_file_path(db, old_pid, old_path, new_pid, new_path):
+            if old_path == "b.md":
+                # The first item's savepoint was released, but nothing may be committed yet
+                other = sqlite3.connect(engine.url.database, timeout=0)
+                try:
+                    sql = "SELECT path FROM files WHERE id = ?"
+                    committed_early.append(other.execute(sql, (ids["a.md"],)).fetchone()[0])
+                finally:
+                    other.close()
+                raise RuntimeError("tree index unavailable")
+            return real_move_file_path(db, old_pid, old_path, new_pid, new_path)
+
+        monkeypatch.setattr(files_router, "move_file_path", failing_move_file_path)
+        resp = client.post(
+            "/api/files/batch/move",
+            json={
+                "files": [
+                    {"file_id": ids["a.md"], "new_path": "moved/a.md"},
+                    {"file_id": ids["b.md"], "new_path": "moved/b.md"},
+                ]
+            },
+            headers=HEADERS,
+        )
+        assert resp.status_code == 200, resp.text
+        assert committed_early == ["a.md"]
+        assert resp.json()["failures"] == ["file[1]: tree index unavailable"]
+        assert [m["file_id"] for m in resp.json()["moved_files"]] == [ids["a.md"]]
+
+        with SessionLocal() as session:
+            paths = {f.id: f.path for f in session.query(File).filter(File.project_id == pid)}
+            assert paths == {ids["a.md"]: "moved/a.md", ids["b.md"]: "b.md"}
+
+        flush_post_commit()
+        files_dir = os.path.join(settings.data_dir, "projects", project["slug"], "files")
+        assert os.path.isfile(os.path.join(files_dir, "moved", "a.md"))
+        assert os.path.isfile(os.path.join(files_dir, "b.md"))
+        assert not os.path.exists(os.path.join(files_dir, "moved", "b.md"))
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import re
+
+import pytest
+from api.db import engine
+from api.seed import ensure_seed
+from sqlalchemy import text
+
+# Hot queries from the projects, files, dirs, links and groups routers.
+# (name, sql, ordered): ordered queries must also avoid a temp b-tree sort.
+HOT_QUERIES = (
+    ("project_files", "SELECT id, path FROM files WHERE project_id = :pid", False),
+    ("file_by_path", "SELECT id FROM files WHERE project_id = :pid AND path = :path", False),
+    (
+        "dir_has_files",
+        "SELECT id FROM files WHERE project_id = :pid AND path LIKE :prefix LIMIT 1",
+        False,
+    ),
+    (
+        "activity_files",
+        "SELECT id, path, updated_at FROM files WHERE project_id = :pid"
+        " ORDER BY updated_at DESC LIMIT 40",
+        True,
+    ),
+    (
+        "recent_files",
+        "SELECT files.id, projects.slug FROM files JOIN projects ON files.project_id = projects.id "
+        "ORDER BY files.updated_at DESC LIMIT 21",
+        True,
+    ),
+    (
+        "activity_events",
+        "SELECT id, type FROM events WHERE project_id = :pid ORDER BY created_at DESC LIMIT 40",
+        True,
+    ),
+    (
+        "activity_page",
+        "SELECT id FROM activity WHERE project_id = :pid AND type IN ('job', 'event') "
+        "AND (timestamp, id) < (:ts, 10) ORDER BY timestamp DESC, id DESC LIMIT 21",
+        False,
+    ),
+    ("outgoing_links", "SELECT id FROM links WHERE src_file_id = :fid", False),
+    (
+        "backlinks",
+        "SELECT id FROM links WHERE project_id = :pid "
+        "AND (target_file_id = :fid OR (target_file_id IS NULL AND target_title = :title))",
+        False,
+    ),
+    ("project_dirs", "SELECT id, path FROM directories WHERE project_id = :pid", False),
+    (
+        "group_members",
+        "SELECT id FROM project_group_memberships WHERE group_id = :gid ORDER BY sort_order",
+        True,
+    ),
+    ("project_group", "SELECT id FROM project_group_memberships WHERE project_id = :pid", False),
+    ("tag_projects", "SELECT project_id FROM project_tags WHERE tag_id = :tid", False),
+    (
+        "link_titles",
+        "SELECT id, title FROM files WHERE project_id = :pid AND title IN (:title, :path)",
+        False,
+    ),
+    (
+        "tree_level_files",
+        "SELECT id, path FROM files WHERE project_id = :pid AND dir_path = :path",
+        False,
+    ),
+    (
+        "tree_level_dirs",
+        "SELECT d.path, (SELECT COUNT(*) FROM project_tree_dirs c"
+        " WHERE c.project_id = d.project_id "
+        "AND c.parent_path = d.path AND c.subtree_files > 0) FROM project_tree_dirs d "
+        "WHERE d.project_id = :pid AND d.parent_path = :path ORDER BY d.path",
+        True,
+    ),
+    (
+        "dashboard_projects",
+        "SELECT id FROM projects WHERE is_archived = 0 AND (updated_at, id) < (:ts, :pid) "
+        "ORDER BY updated_at DESC, id DESC LIMIT 21",
+        True,
+    ),
+    (
+        "dashboard_projects_by_name",
+        "SELECT id FROM projects WHERE is_archived = 0 ORDER BY lower(name), id LIMIT 21",
+        True,
+    ),
+)
+
+_PARAMS = {
+    "ts": "2025-01-01 00:00:00",
+    "pid": "p",
+    "path": "a.md",
+    "prefix": "a/%",
+    "fid": "f",
+    "title": "A",
+    "gid": "g",
+    "tid": 1,
+}
+# "SCAN t USING INDEX ix" is an ordered index walk (bounded by LIMIT);
+# a bare or covering scan reads everything
+_FULL_SCAN = re.compile(r"^SCAN \w+(?: USING COVERING INDEX \w+)?$")
+
+
+@pytest.fixture(scope="module")
+def migrated():
+    ensure_seed()
+
+
+@pytest.mark.parametrize("name,sql,ordered", HOT_QUERIES, ids=[q[0] for q in HOT_QUERIES])
+def test_hot_query_uses_index(migrated, name, sql, ordered):
+    with engine.connect() as conn:
+        plan = [row[3] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), _PARAMS).all()]
+    scans = [detail for detail in plan if _FULL_SCAN.match(detail)]
+    assert not scans, f"{name} falls back to a full scan: {plan}"
+    if ordered:
+        assert not any(
+            "TEMP B-TREE" in detail for detail in plan
+        ), f"{name} sorts without an index: {plan}"
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from api.main import app
+from api.services import render
+from fastapi.testclient import TestClient
+
+HEADERS = {"X-Token": "devtoken"}
+
+
+def test_render_cache_counts_hits_and_reads_disk_tier(tmp_path, monkeypatch):
+    render.clear_render_cache()
+    client = TestClient(app)
+
+    first = client.post(
+        "/api/render/markdown", json={"md": "# Cached\n\n| a |\n|---|\n| b |"}, headers=HEADERS
+    ).json()
+    second = client.post(
+        "/api/render/markdown", json={"md": "# Cached\n\n| a |\n|---|\n| b |"}, headers=HEADERS
+    ).json()
+    assert first == second and "<table>" in first["html"]
+    stats = client.get("/api/render/stats", headers=HEADERS).json()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+    # Keys cover the renderer config, not just the text
+    assert render.render_key("x") != render.render_key("x ")
+    monkeypatch.setattr(render, "RENDERER_CONFIG", render.RENDERER_CONFIG + "+plugin")
+    assert render.render_markdown("# Cached\n\n| a |\n|---|\n| b |") == first["html"]
+    assert render.render_cache_stats()["misses"] == 2
+
+    monkeypatch.setattr(render.settings, "render_cache_dir", str(tmp_path / "render"))
+    html = render.render_markdown("on *disk*")
+    render.clear_render_cache()
+    assert render.render_markdown("on *disk*") == html
+    assert render.render_cache_stats()["disk_hits"] == 1
+
+    monkeypatch.setattr(render.settings, "render_cache_max_entries", 2)
+    for text in ("a", "b", "c"):
+        render.render_markdown(text)
+    assert render.render_cache_stats()["entries"] == 2
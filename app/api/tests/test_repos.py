@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from fastapi.testclient import TestClient
+import os
 
 from api.main import app
 from api.seed import ensure_seed
 from api.settings import settings
+from fastapi.testclient import TestClient
 
 
 def test_create_repo_and_status_project_scope():
@@ -40,3 +41,70 @@ def test_create_repo_and_status_project_scope():
     st = sr.json()
     assert "ahead" in st and "behind" in st and "dirty" in st
 
+
+def test_artifacts_status_is_served_from_fetch_state(tmp_path, monkeypatch):
+    import datetime as dt
+
+    from api.db import SessionLocal
+    from api.git_ops import GitError
+    from api.models import ArtifactRepo
+    from api.services import repo_sync
+    from git import Repo as GitRepo
+
+    headers = {"X-Token": "devtoken"}
+    with TestClient(app) as c:
+        project = c.post("/api/projects", json={"name": "Fetch State"}, headers=headers).json()
+        pid = project["id"]
+        remote = str(tmp_path / "remote.git")
+        GitRepo.init(remote, bare=True)
+        assert (
+            c.post(
+                f"/api/projects/{pid}/artifacts/connect", json={"repo_url": remote}, headers=headers
+            ).status_code
+            == 200
+        )
+        art_dir = os.path.join(settings.data_dir, "projects", project["slug"], "artifacts")
+        c.post(
+            f"/api/projects/{pid}/artifacts/commit",
+            json={"paths": [], "message": "first", "push": False},
+            headers=headers,
+        )
+        GitRepo(art_dir).git.push("-u", "origin", "HEAD")
+
+        db = SessionLocal()
+        try:
+            ar = db.query(ArtifactRepo).filter(ArtifactRepo.project_id == pid).one()
+            repo_sync.sync_target(db, ar)
+            assert (ar.ahead, ar.behind, ar.fetch_failures) == (0, 0, 0)
+            assert ar.last_fetched_at is not None
+
+            # Local-only commit: counted from refs on disk, no fetch needed
+            c.post(
+                f"/api/projects/{pid}/artifacts/commit",
+                json={"paths": [], "message": "second", "push": False},
+                headers=headers,
+            )
+
+            def no_fetch(path):
+                raise AssertionError("status must not fetch")
+
+            monkeypatch.setattr(repo_sync, "fetch_remote", no_fetch)
+            st = c.get(f"/api/projects/{pid}/artifacts/status", headers=headers).json()
+            assert (st["ahead"], st["behind"]) == (1, 0)
+            assert st["last_fetched"] is not None
+
+            def failing_fetch(path):
+                raise GitError("NETWORK_ERROR", "offline")
+
+            monkeypatch.setattr(repo_sync, "fetch_remote", failing_fetch)
+            db.refresh(ar)
+            before = dt.datetime.now(tz=dt.timezone.utc)
+            assert repo_sync.sync_target(db, ar) is False
+            assert ar.fetch_failures == 1 and ar.fetch_error == "offline"
+            assert ar.ahead == 1
+            next_at = ar.next_fetch_at.replace(tzinfo=dt.timezone.utc)
+            assert next_at >= before + dt.timedelta(seconds=repo_sync.backoff_seconds(1) - 1)
+            # Backed-off repo is skipped by the scheduler until its delay elapses
+            assert all(t.id != ar.id for t in repo_sync._due(db, before))
+        finally:
+            db.close()
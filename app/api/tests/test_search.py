@@ -1,9 +1,8 @@
 from __future__ import annotations
 
-from fastapi.testclient import TestClient
-
 from api.main import app
 from api.seed import ensure_seed
+from fastapi.testclient import TestClient
 
 
 def test_search_snippet_and_filters():
@@ -45,3 +44,135 @@ def test_search_invalid_query_leading_slash():
     assert r.status_code == 400
     detail = r.json().get("detail")
     assert detail["code"] == "BAD_QUERY"
+
+
+def test_search_facets_are_exact_and_invalidated_on_index_write():
+    ensure_seed()
+    c = TestClient(app)
+    headers = {"X-Token": "devtoken"}
+
+    def facets() -> dict:
+        r = c.get(
+            "/api/search",
+            params={"q": "facetcount", "scope": "files", "facets": 1, "limit": 1},
+            headers=headers,
+        )
+        assert r.status_code == 200
+        return r.json()["facets"]
+
+    assert facets()["languages"] == []
+    pid = c.get("/api/projects", headers=headers).json()["projects"][0]["id"]
+    for idx in range(3):
+        r = c.post(
+            f"/api/files/project/{pid}",
+            json={
+                "path": f"facets/count-{idx}.md",
+                "content_md": "facetcount",
+                "title": f"Facet {idx}",
+            },
+            headers=headers,
+        )
+        assert r.status_code == 201
+
+    result = facets()
+    assert result["languages"] == [{"label": "markdown", "slug": "markdown", "count": 3}]
+    assert [(p["id"], p["count"]) for p in result["projects"]] == [(pid, 3)]
+    assert "statuses" in result
+
+
+def test_search_suggest_matches_partial_words():
+    ensure_seed()
+    c = TestClient(app)
+    r = c.get("/api/search/suggest", params={"q": "pla"}, headers={"X-Token": "devtoken"})
+    assert r.status_code == 200
+    items = r.json()["items"]
+    assert items
+    assert set(items[0].keys()) == {"id", "title", "project_slug"}
+    assert any(item["title"] == "plan.md" for item in items)
+
+    r = c.get("/api/search/suggest", params={"q": "p"}, headers={"X-Token": "devtoken"})
+    assert r.status_code == 200
+    assert r.json()["items"] == []
+
+
+def test_search_cache_generation_is_persisted_and_bumped_on_commit():
+    from api.db import engine
+    from api.search import remove_from_index, search_index_generation
+    from sqlalchemy import create_engine
+
+    headers = {"X-Token": "devtoken"}
+    with TestClient(app) as c:
+        pid = c.post("/api/projects", json={"name": "Facet Generation"}, headers=headers).json()[
+            "id"
+        ]
+        ids = [
+            c.post(
+                f"/api/files/project/{pid}",
+                json={
+                    "path": f"gen/{idx}.md",
+                    "content_md": "generationfacet",
+                    "title": f"Gen {idx}",
+                },
+                headers=headers,
+            ).json()["id"]
+            for idx in range(3)
+        ]
+
+        def project_count() -> int:
+            r = c.get(
+                "/api/search",
+                params={"q": "generationfacet", "scope": "files", "facets": 1},
+                headers=headers,
+            )
+            return {p["id"]: p["count"] for p in r.json()["facets"]["projects"]}.get(pid, 0)
+
+        assert project_count() == 3
+        with engine.connect() as conn:
+            before = search_index_generation(conn)
+
+        # A rolled-back write leaves the generation (and the cached counts) alone
+        with engine.connect() as conn:
+            remove_from_index(conn, ids[0])
+            conn.rollback()
+        with engine.connect() as conn:
+            assert search_index_generation(conn) == before
+        assert project_count() == 3
+
+        # A delete committed by another process (a worker) is seen through the persisted counter
+        other = create_engine(str(engine.url))
+        with other.begin() as conn:
+            remove_from_index(conn, ids[0])
+        other.dispose()
+        assert project_count() == 2
+
+
+def test_search_suggest_cache_sees_writes_from_other_processes():
+    from api.db import engine
+    from api.search import remove_from_index
+    from sqlalchemy import create_engine
+
+    headers = {"X-Token": "devtoken"}
+    with TestClient(app) as c:
+        pid = c.post("/api/projects", json={"name": "Suggest Generation"}, headers=headers).json()[
+            "id"
+        ]
+        fid = c.post(
+            f"/api/files/project/{pid}",
+            json={"path": "zq.md", "content_md": "", "title": "Zanquil"},
+            headers=headers,
+        ).json()["id"]
+
+        def suggested() -> list[str]:
+            return [
+                item["id"]
+                for item in c.get(
+                    "/api/search/suggest", params={"q": "zanq"}, headers=headers
+                ).json()["items"]
+            ]
+
+        assert suggested() == [fid]
+        other = create_engine(str(engine.url))
+        with other.begin() as conn:
+            remove_from_index(conn, fid)
+        other.dispose()
+        assert suggested() == []
@@ -1,9 +1,8 @@
 from __future__ import annotations
 
-from fastapi.testclient import TestClient
-
 from api.main import app
 from api.seed import ensure_seed
+from fastapi.testclient import TestClient
 
 
 def test_saved_search_crud_and_query():
@@ -44,3 +43,74 @@ def test_search_filters_scope_and_pagination():
     )
     assert r2.status_code == 200
     assert "results" in r2.json()
+
+
+def test_search_keyset_cursor_pages_without_overlap():
+    ensure_seed()
+    c = TestClient(app)
+    headers = {"X-Token": "devtoken"}
+    pid = c.get("/api/projects", headers=headers).json()["projects"][0]["id"]
+    for idx in range(5):
+        r = c.post(
+            f"/api/files/project/{pid}",
+            json={
+                "path": f"notes/keyset-{idx}.md",
+                "content_md": f"# Keyset {idx}\n\nkeysetpage",
+                "title": f"Keyset {idx}",
+            },
+            headers=headers,
+        )
+        assert r.status_code == 201
+
+    seen: list[str] = []
+    cursor = None
+    for _ in range(10):
+        params = {"q": "keysetpage", "scope": "files", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        payload = c.get("/api/search", params=params, headers=headers).json()
+        seen.extend(item["id"] for item in payload["results"])
+        cursor = payload["next_cursor"]
+        if not cursor:
+            break
+        assert cursor.startswith("k1.")
+    assert len(seen) == len(set(seen))
+    assert len(seen) >= 5
+
+    legacy = c.get(
+        "/api/search",
+        params={"q": "keysetpage", "scope": "files", "limit": 2, "cursor": 2},
+        headers=headers,
+    ).json()
+    assert [item["id"] for item in legacy["results"]] == seen[2:4]
+
+
+def test_project_search_uses_fts_index_and_stays_in_sync():
+    ensure_seed()
+    c = TestClient(app)
+    headers = {"X-Token": "devtoken"}
+    r = c.post(
+        "/api/projects",
+        json={
+            "name": "Orbital Planner",
+            "description": "Satellite scheduling notes",
+            "tags": ["space"],
+        },
+        headers=headers,
+    )
+    assert r.status_code == 201
+    pid = r.json()["id"]
+
+    def project_ids(q: str) -> list[str]:
+        r = c.get("/api/search", params={"q": q, "scope": "projects"}, headers=headers)
+        assert r.status_code == 200
+        return [item["id"] for item in r.json()["results"]]
+
+    assert project_ids("orbi") == [pid]
+    assert project_ids("satellite") == [pid]
+    assert project_ids("space") == [pid]
+
+    r = c.patch(f"/api/projects/{pid}", json={"description": "Launch windows"}, headers=headers)
+    assert r.status_code == 200
+    assert project_ids("satellite") == []
+    assert project_ids("launch") == [pid]
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from api.db import engine
+from api.search import SEARCH_INDEX_SHADOW_TABLE, rebuild_search_index
+from api.seed import ensure_seed
+from sqlalchemy import text
+
+
+def test_rebuild_search_index_swaps_shadow_table_and_reports_progress():
+    ensure_seed()
+    with engine.connect() as conn:
+        before = conn.execute(text("SELECT COUNT(*) FROM search_index")).scalar()
+
+    reports: list[dict] = []
+    result = rebuild_search_index(engine, batch_size=1, progress=reports.append)
+
+    assert result["status"] == "ok"
+    assert result["rows"] == result["total"] == before
+    assert [r["phase"] for r in reports][-1] == "done"
+    assert any(r["phase"] == "indexing" and r["rows"] > 0 for r in reports)
+    with engine.connect() as conn:
+        shadow = conn.execute(
+            text("SELECT name FROM sqlite_master WHERE name = :name"),
+            {"name": SEARCH_INDEX_SHADOW_TABLE},
+        ).first()
+        assert shadow is None
+        rows = conn.execute(
+            text("SELECT file_id FROM search_index WHERE search_index MATCH 'demo'")
+        ).all()
+        assert rows
+
+
+def test_rebuild_search_index_does_not_hold_the_write_lock_between_pages():
+    import sqlite3
+
+    ensure_seed()
+    writes: list[int] = []
+
+    def write_while_indexing(report: dict) -> None:
+        if report["phase"] != "indexing" or not report["rows"] or writes:
+            return
+        # A writer with no busy timeout fails at once if the rebuild still holds the lock
+        other = sqlite3.connect(engine.url.database, timeout=0)
+        try:
+            other.execute("UPDATE projects SET description = description")
+            other.commit()
+            writes.append(1)
+        finally:
+            other.close()
+
+    rebuild_search_index(engine, batch_size=1, progress=write_while_indexing)
+    assert writes == [1]
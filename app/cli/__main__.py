@@ -2,15 +2,14 @@ from __future__ import annotations
 
 import json
 import sys
-from typing import Optional
 import time
+from typing import Optional
 
 import requests
 import typer
 
 from .config import load_config
 
-
 app = typer.Typer(help="Ideas CLI")
 
 
@@ -60,11 +59,14 @@ def search(
     status: Optional[str] = typer.Option(None, help="Status filter"),
     sort: str = typer.Option("score", help="Sort: score|updated"),
     limit: int = typer.Option(20, help="Limit"),
-    offset: int = typer.Option(0, help="Offset"),
+    offset: int = typer.Option(0, help="Offset (legacy; prefer --cursor)"),
+    cursor: Optional[str] = typer.Option(None, help="Resume after a previous page (next_cursor)"),
 ):
     cfg, s = client()
     params: dict[str, str] = {"q": q, "limit": str(limit), "scope": "files"}
-    if offset:
+    if cursor:
+        params["cursor"] = cursor
+    elif offset:
         params["cursor"] = str(offset)
     if project:
         p = find_project_by_slug(s, cfg.api_base, project)
@@ -82,6 +84,8 @@ def search(
     payload = r.json()
     for item in payload.get("results", []):
         typer.echo(f"{item['id']}\t{item['name']}\t{item.get('path','')}")
+    if payload.get("next_cursor"):
+        typer.echo(f"next: --cursor {payload['next_cursor']}", err=True)
 
 
 saved = typer.Typer(help="Saved searches")
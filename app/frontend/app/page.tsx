@@ -180,7 +180,7 @@ async function fetchProjects(params: {
   return {
     projects: projects as ProjectCard[],
     next_cursor: typeof (payload as any)?.next_cursor === 'string' ? (payload as any).next_cursor : null,
-    total: typeof (payload as any)?.total === 'number' ? (payload as any).total : projects.length,
+    total: typeof (payload as any)?.total === 'number' ? (payload as any).total : null,
     limit: typeof (payload as any)?.limit === 'number' ? (payload as any).limit : 20,
     view: typeof (payload as any)?.view === 'string' ? (payload as any).view : params.view,
     filters:
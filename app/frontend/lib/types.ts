@@ -108,7 +108,7 @@ export type ProjectCard = z.infer<typeof ProjectCardSchema>
 export const ProjectListResponseSchema = z.object({
   projects: z.array(ProjectCardSchema),
   next_cursor: z.string().nullable().optional(),
-  total: z.number(),
+  total: z.number().nullable().optional(),
   limit: z.number(),
   view: z.string(),
   filters: z.record(z.string(), z.unknown()).catch({}).default({}),
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from typing import Any
+
+from api.app_logging import get_logger  # type: ignore
+from api.db import SessionLocal  # type: ignore
+from api.links import relink_dangling  # type: ignore
+from api.models import File  # type: ignore
+from api.services.frontmatter import LISTING_FIELDS_VERSION, derive_listing_fields  # type: ignore
+from sqlalchemy import bindparam, select, update
+
+logger = get_logger(component="files.jobs")
+
+_BATCH_SIZE = 500
+
+
+def backfill_listing_fields(batch_size: int = _BATCH_SIZE) -> dict[str, Any]:
+    # Derive description/summary/metadata for rows written before the columns existed
+    # (or with an older LISTING_FIELDS_VERSION); updated_at is left untouched
+    logger.info("backfill_listing_fields.start")
+    stale = File.listing_fields_stale()
+    stmt = (
+        update(File)
+        .where(File.id == bindparam("b_id"))
+        .values(
+            description=bindparam("b_description"),
+            summary=bindparam("b_summary"),
+            metadata_fields=bindparam("b_metadata_fields"),
+            metadata_signature=bindparam("b_metadata_signature"),
+            derived_version=LISTING_FIELDS_VERSION,
+            updated_at=File.updated_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    updated = 0
+    db = SessionLocal()
+    try:
+        while True:
+            rows = db.execute(
+                select(File.id, File.front_matter, File.content_md).where(stale).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            params = []
+            for file_id, front_matter, content in rows:
+                fields = derive_listing_fields(front_matter, content)
+                params.append(
+                    {"b_id": file_id, **{f"b_{name}": value for name, value in fields.items()}}
+                )
+            db.connection().execute(stmt, params)
+            db.commit()
+            updated += len(params)
+    finally:
+        db.close()
+    result = {"status": "ok", "files": updated}
+    logger.info("backfill_listing_fields.complete", **result)
+    return result
+
+
+def relink_dangling_links(project_id: str | None = None) -> dict[str, Any]:
+    # Catch-all for links the incremental relinker could not see (imports, moves across
+    # projects, rows written before it existed)
+    logger.info("relink_dangling_links.start", project_id=project_id)
+    db = SessionLocal()
+    try:
+        relinked = relink_dangling(db, project_id)
+        db.commit()
+    finally:
+        db.close()
+    result = {"status": "ok", "links": relinked}
+    logger.info("relink_dangling_links.complete", **result)
+    return result
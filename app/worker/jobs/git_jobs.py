@@ -1,9 +1,25 @@
 from __future__ import annotations
 
+import datetime as dt
 import os
+import uuid
+from typing import Any
 
+import redis
+from api.app_logging import get_logger  # type: ignore
+from api.db import SessionLocal  # type: ignore
+from api.git_ops import commit_and_push, ensure_repo
+from api.services.repo_sync import (  # type: ignore
+    TICK_JOB,
+    TICK_JOB_ID,
+    load_target,
+    sync_due,
+    sync_target,
+)
 from api.settings import settings as api_settings  # type: ignore
-from api.git_ops import ensure_repo, commit_and_push
+from rq import Queue, get_current_job
+
+logger = get_logger(component="git.jobs")
 
 
 def connect(slug: str, repo_url: str | None = None) -> dict:
@@ -18,3 +34,54 @@ def commit(slug: str, paths: list[str], message: str | None = None) -> dict:
     art_dir = os.path.join(proj_dir, "artifacts")
     return commit_and_push(art_dir, paths, message)
 
+
+def fetch_repo_status(kind: str, target_id: str) -> dict[str, Any]:
+    db = SessionLocal()
+    try:
+        target = load_target(db, kind, target_id)
+        if target is None:
+            return {"status": "missing"}
+        changed = sync_target(db, target)
+        return {"status": "ok", "changed": changed, "ahead": target.ahead, "behind": target.behind}
+    finally:
+        db.close()
+
+
+def fetch_due_repos() -> dict[str, Any]:
+    # Periodic tick: fetch repos whose backoff has elapsed. The next tick is scheduled even when
+    # this one fails, so one locked database or network error cannot end the loop.
+    conn = redis.from_url(api_settings.redis_url)
+    job = get_current_job()
+    owner = conn.get(TICK_JOB_ID)
+    if job is not None and owner is not None and owner.decode() != job.id:
+        # A newer loop owns the schedule; let this one die out
+        return {"status": "superseded"}
+    db = SessionLocal()
+    try:
+        result = sync_due(db)
+    finally:
+        db.close()
+        schedule_fetch_tick(connection=conn)
+    if result["fetched"]:
+        logger.info("fetch_due_repos.complete", **result)
+    return result
+
+
+def schedule_fetch_tick(delay: int | None = None, start: bool = False, connection=None) -> bool:
+    """Enqueue the next tick under a fresh job id and record it as the pending one.
+
+    ``start`` only schedules when no tick is pending (worker startup), so however many workers
+    start there is one loop. The record outlives the delay plus the job timeout, so a loop lost
+    with a crashed worker is picked up again by the next worker start.
+    """
+    conn = connection or redis.from_url(api_settings.redis_url)
+    seconds = api_settings.repo_fetch_tick if delay is None else delay
+    job_id = f"{TICK_JOB_ID}:{uuid.uuid4().hex}"
+    if not conn.set(TICK_JOB_ID, job_id, nx=start, ex=seconds + 900):
+        return False
+    q = Queue("default", connection=conn)
+    # result_ttl=0: finished ticks leave nothing behind
+    q.enqueue_in(
+        dt.timedelta(seconds=seconds), TICK_JOB, job_id=job_id, job_timeout=600, result_ttl=0
+    )
+    return True
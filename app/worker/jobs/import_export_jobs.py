@@ -12,7 +12,6 @@ from typing import Iterable
 
 import redis
 from git import Repo  # type: ignore
-from markdown_it import MarkdownIt
 
 from api.settings import settings as api_settings  # type: ignore
 from api.db import SessionLocal  # type: ignore
@@ -25,6 +24,7 @@ from api.utils import slugify  # type: ignore
 from api.app_logging import get_logger  # type: ignore
 from api.services.frontmatter import prepare_front_matter  # type: ignore
 from api.services.tagging import ensure_tags  # type: ignore
+from api.services.render import render_markdown  # type: ignore
 
 
 def _publish(project_id: str, evt: str, payload: dict | None = None) -> None:
@@ -44,11 +44,8 @@ def _safe_rel(path: str) -> str:
     return "/".join(parts)
 
 
-_md = MarkdownIt("commonmark").enable("table").enable("strikethrough")
-
-
 def _render_markdown(md_text: str) -> str:
-    return _md.render(md_text)
+    return render_markdown(md_text)
 
 
 def _search_blob(title: str, body: str, front_matter: dict) -> str:
@@ -1,46 +1,36 @@
 from __future__ import annotations
 
-from sqlalchemy import text
-
-from api.db import engine
-from api.models import File, Project
-from api.search import index_file
-from api.settings import settings
-from sqlalchemy.orm import Session
-from api.db import SessionLocal
-
-
-def reindex_all() -> dict[str, str]:
-    # Drop and recreate multi-column FTS5 table, then reindex all files
-    with engine.begin() as conn:
-        # Create new FTS schema
-        conn.exec_driver_sql("DROP TABLE IF EXISTS search_index;")
-        conn.exec_driver_sql(
-            """
-            CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
-                file_id UNINDEXED,
-                project_id UNINDEXED,
-                project_slug UNINDEXED,
-                project_name UNINDEXED,
-                title,
-                body,
-                path,
-                tags,
-                language,
-                updated_at UNINDEXED,
-                is_archived UNINDEXED,
-                project_status UNINDEXED
-            );
-            """
-        )
-    # Walk all files
-    db: Session = SessionLocal()
+from typing import Any
+
+from api.app_logging import get_logger  # type: ignore
+from api.db import engine  # type: ignore
+from api.search import rebuild_project_search_index, rebuild_search_index  # type: ignore
+from rq import get_current_job
+
+logger = get_logger(component="search.jobs")
+
+
+def _progress_to_job_meta(stats: dict[str, Any]) -> None:
+    job = get_current_job()
+    if job is None:
+        return
+    job.meta["progress"] = stats
     try:
-        for f in db.query(File).all():
-            proj = db.get(Project, f.project_id)
-            rel_path = f.path
-            with engine.begin() as conn:
-                index_file(conn, f.id, f"{f.title}\n{f.content_md}")
-    finally:
-        db.close()
-    return {"status": "ok"}
+        job.save_meta()
+    except Exception:
+        pass
+
+
+def reindex_all(batch_size: int = 500) -> dict[str, Any]:
+    # Build into a shadow FTS table and swap it in; search keeps serving the old index meanwhile
+    logger.info("reindex_all.start", batch_size=batch_size)
+    result = rebuild_search_index(engine, batch_size=batch_size, progress=_progress_to_job_meta)
+    logger.info("reindex_all.complete", **result)
+    return result
+
+
+def reindex_projects() -> dict[str, Any]:
+    logger.info("reindex_projects.start")
+    result = rebuild_project_search_index(engine)
+    logger.info("reindex_projects.complete", **result)
+    return result
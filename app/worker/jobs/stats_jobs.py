@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from typing import Any
+
+from api.app_logging import get_logger  # type: ignore
+from api.db import SessionLocal  # type: ignore
+from api.models import Project  # type: ignore
+from api.services.project_stats import rebuild_all_project_stats  # type: ignore
+from api.services.tree_index import rebuild_tree_index  # type: ignore
+from sqlalchemy import select
+
+logger = get_logger(component="stats.jobs")
+
+
+def rebuild_project_stats(project_id: str | None = None) -> dict[str, Any]:
+    # Recompute dashboard card stats and the tree directory index from files;
+    # used after bulk imports or to repair drift
+    logger.info("rebuild_project_stats.start", project_id=project_id)
+    db = SessionLocal()
+    try:
+        project_ids = [project_id] if project_id else list(db.scalars(select(Project.id)).all())
+        count = rebuild_all_project_stats(db, project_ids)
+        for pid in project_ids:
+            rebuild_tree_index(db, pid)
+        db.commit()
+    finally:
+        db.close()
+    result = {"status": "ok", "projects": count}
+    logger.info("rebuild_project_stats.complete", **result)
+    return result
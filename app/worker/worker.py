@@ -3,9 +3,10 @@ from __future__ import annotations
 import os
 import sys
 
-import rq
 import redis
+import rq
 
+from .jobs.git_jobs import schedule_fetch_tick
 from .settings import REDIS_URL
 
 
@@ -13,6 +14,8 @@ def main() -> None:
     conn = redis.from_url(REDIS_URL)
     with rq.Connection(conn):
         q = rq.Queue("default")
+        # Start the periodic repo fetch loop unless another worker already runs it
+        schedule_fetch_tick(0, start=True, connection=conn)
         w = rq.Worker([q])
         w.work(with_scheduler=True)
 